@@ -0,0 +1,128 @@
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "livebot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "shared"))
+
+from fakes import format_ms, peak_rss_mb, percentiles, quiet, report
+from stream_history import StreamHistory
+
+# livebot's stream history over months of simulated polling: every channel streams on a weekly
+# routine (with some noise), each live channel is sampled once per poll interval, old samples
+# are downsampled, and /streamstats' query is timed over the whole window.
+
+START = datetime(2026, 1, 5, tzinfo=timezone.utc).timestamp()
+GAMES = ["Just Chatting", "Chess", "Minecraft", "Elden Ring", "Art", "Music"]
+
+
+def make_routines(channels, rng):
+    # login -> [(weekday, start hour, hours)]
+    routines = {}
+    for i in range(channels):
+        days = rng.sample(range(7), rng.randint(2, 6))
+        hour = rng.randrange(24)
+        routines[f"streamer{i}"] = [(day, (hour + rng.choice([0, 0, 1, -1])) % 24, rng.uniform(1.5, 6)) for day in days]
+    return routines
+
+
+def db_size(history):
+    # The database file alone, with the WAL folded back in
+    history._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return history.path.stat().st_size
+
+
+def run(args):
+    rng = random.Random(1)
+    tmp = tempfile.TemporaryDirectory()
+    history = StreamHistory(Path(tmp.name) / "history.db", raw_days=args.raw_days)
+    routines = make_routines(args.channels, rng)
+
+    # Expand the routines into (start, end, login, stream id, base viewers, games) sessions
+    sessions = []
+    for login, routine in routines.items():
+        base = int(rng.lognormvariate(4, 1.2))
+        for week in range(int(args.days / 7) + 1):
+            for day, hour, hours in routine:
+                start = START + (week * 7 + day) * 86400 + hour * 3600 + rng.randint(-900, 900)
+                if start < START + args.days * 86400:
+                    # Some streams switch game halfway through
+                    games = rng.sample(GAMES, 2 if rng.random() < 0.3 else 1)
+                    sessions.append((start, start + hours * 3600, login, f"{login}-{int(start)}", base, games))
+    sessions.sort()
+
+    end = START + args.days * 86400
+    live = {}
+    viewers = {}
+    record_times = []
+    samples = 0
+    next_session = 0
+    now = START
+    while now < end:
+        while next_session < len(sessions) and sessions[next_session][0] <= now:
+            session = sessions[next_session]
+            live[session[2]] = session
+            viewers[session[2]] = session[4]
+            next_session += 1
+        streams = {}
+        for login, (start, stop, _, stream_id, base, games) in list(live.items()):
+            if now >= stop:
+                del live[login]
+                history.end(login)
+                continue
+            viewers[login] = max(0, viewers[login] + rng.randint(-base // 10 - 1, base // 10 + 1))
+            streams[login] = {"id": stream_id, "viewer_count": viewers[login], "title": "stream",
+                              "game_name": games[int((now - start) / (stop - start) * len(games))]}
+        if streams:
+            started = time.perf_counter()
+            history.record(streams, now)
+            record_times.append(time.perf_counter() - started)
+            samples += len(streams)
+        now += args.interval
+    history.flush()
+
+    size = db_size(history)
+    report(f"{args.channels:,} channels, {args.days} simulated day(s), {len(sessions):,} streams, {samples:,} samples")
+    report(f"record        {format_ms(percentiles(record_times))} per poll, "
+           f"{samples / sum(record_times):,.0f} samples/s")
+    report(f"storage       {size / 1024 / 1024:.1f} MB on disk, {size / samples:.1f} bytes/sample "
+           f"(totals and indexes included) before compaction")
+
+    started = time.perf_counter()
+    downsampled, dropped = history.compact(now=end)
+    compact_s = time.perf_counter() - started
+    history._db.execute("VACUUM")
+    size = db_size(history)
+    report(f"compact       {downsampled:,} segment(s) downsampled, {dropped} dropped in {compact_s:.1f}s, "
+           f"{size / 1024 / 1024:.1f} MB after")
+
+    query_times = []
+    logins = list(routines)
+    for login in rng.sample(logins, min(len(logins), 200)):
+        started = time.perf_counter()
+        stats = history.stats(login, START, timezone.utc)
+        if stats:
+            history.series(stats["latest"])
+        query_times.append(time.perf_counter() - started)
+    report(f"streamstats   {format_ms(percentiles(query_times))} per query over {args.days} day(s)")
+    report(f"memory        RSS peak {peak_rss_mb():.1f} MB")
+    history.close()
+    tmp.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream history recording, storage and /streamstats cost")
+    parser.add_argument("--channels", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--interval", type=int, default=60, help="seconds between polls of a live channel")
+    parser.add_argument("--raw-days", type=int, default=14, help="HISTORY_RAW_DAYS")
+    with quiet():
+        run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "livebot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "shared"))
+
+from channels import ChannelRegistry
+from fake_eventsub import FakeTwitch
+from fakes import FakeClient, FakeClock, format_ms, free_port, peak_rss_mb, percentiles, quiet, report
+from poll_scheduler import PollScheduler
+from twitch_client import TwitchClient
+
+# livebot's twitch_check path (rate-limit budget, due channels, batched Helix lookups, state
+# diff, rescheduling) for thousands of channels against the local fake Twitch server, with a
+# fake clock stepping one POLL_TICK per iteration. Channels flip live/offline at random and the
+# report includes how long (in simulated time) each flip took to be noticed.
+
+ANNOUNCE_CHANNEL_ID = 1
+
+
+async def run(args):
+    rng = random.Random(1)
+    clock = FakeClock()
+    fake = FakeTwitch("127.0.0.1", free_port(), ratelimit=args.ratelimit, clock=clock)
+    await fake.start()
+    twitch = TwitchClient(
+        "bench", "bench", helix_url=f"{fake.url}/helix", token_url=f"{fake.url}/oauth2/token", clock=clock
+    )
+    discord_client = FakeClient()
+    announcements = discord_client.get_partial_messageable(ANNOUNCE_CHANNEL_ID)
+
+    logins = [f"streamer{i}" for i in range(args.channels)]
+    channels = ChannelRegistry(logins)
+    scheduler = PollScheduler(tick=args.tick, clock=clock)
+    for login in logins:
+        scheduler.add(login)
+    for login in rng.sample(logins, int(len(logins) * args.live_share)):
+        await fake.go_online(login)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    ticks = int(args.hours * 3600 / args.tick)
+    flips_per_tick = len(logins) * args.flip_rate * args.tick / 3600
+    flipped_at = {}
+    detection = []
+    tick_times = []
+    polled = 0
+    errors = 0
+    for _ in range(ticks):
+        clock.advance(args.tick)
+        for login in rng.sample(logins, min(len(logins), int(flips_per_tick + rng.random()))):
+            if login in fake.streams:
+                await fake.go_offline(login)
+            else:
+                await fake.go_online(login)
+            flipped_at.setdefault(login, clock())
+
+        tick_start = time.perf_counter()
+        budget = scheduler.batch_budget(twitch.ratelimit_remaining, twitch.ratelimit_reset)
+        due = scheduler.pop_due(budget)
+        if due:
+            try:
+                live_streams = await twitch.get_streams(due)
+            except Exception:
+                errors += 1
+                live_streams = None
+            if live_streams is not None:
+                went_live, went_offline = channels.apply(live_streams, due, now=clock())
+                for channel in went_live + went_offline:
+                    await announcements.send(f"{channel.login} {'live' if channel.live else 'offline'}")
+                    if channel.login in flipped_at:
+                        detection.append(clock() - flipped_at.pop(channel.login))
+            for login in due:
+                scheduler.reschedule(channels.get(login))
+            polled += len(due)
+        tick_times.append(time.perf_counter() - tick_start)
+
+    busy = sum(tick_times)
+    report(f"{len(logins):,} channels, {args.hours:g} simulated hour(s) in {ticks:,} ticks of {args.tick}s")
+    report(f"polling       {polled:,} channel checks, {polled / busy if busy else 0:,.0f} checks/s, {errors} failed tick(s)")
+    report(f"tick latency  {format_ms(percentiles(tick_times))}")
+    report(f"helix calls   {fake.calls.get('streams', 0):,} streams, {fake.calls.get('token', 0)} token, "
+           f"{fake.calls.get('ratelimited', 0)} rate-limited")
+    detect = percentiles(detection)
+    report(f"detection     {len(detection):,} flips seen ({len(flipped_at)} pending), "
+           + "  ".join(f"{name} {value:.0f}s" for name, value in detect.items()))
+    report(f"discord sends {discord_client.sends():,}")
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report(f"memory        tracemalloc peak {peak / 1024 / 1024:.1f} MB, RSS peak {peak_rss_mb():.1f} MB")
+    else:
+        report(f"memory        RSS peak {peak_rss_mb():.1f} MB")
+
+    await twitch.close()
+    await fake.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live poller cost against a local fake Twitch")
+    parser.add_argument("--channels", type=int, default=5000)
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--tick", type=int, default=5, help="POLL_TICK in seconds")
+    parser.add_argument("--live-share", type=float, default=0.05, help="share of channels live at the start")
+    parser.add_argument("--flip-rate", type=float, default=0.05, help="live/offline changes per channel per hour")
+    parser.add_argument("--ratelimit", type=int, default=800, help="Helix points per minute")
+    parser.add_argument("--tracemalloc", action="store_true", help="measure Python allocations (slower)")
+    with quiet():
+        asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
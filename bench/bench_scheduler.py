@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "reminderBot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "shared"))
+
+from delivery import DeliveryQueue, DeliveryStore
+from fakes import FakeClient, FakeClock, FakeGuild, format_ms, peak_rss_mb, percentiles, quiet, report
+from scheduler import ReminderScheduler, collect_due, mark_handled
+from storage import normalize_reminder
+
+# reminderBot's reminder_checker path (heap scheduling, catch-up, rescheduling) over weeks of
+# simulated time with a fake clock: every tick jumps straight to the next fire time, like
+# wait_until_due would. With --deliver the fires also go through the real delivery queue
+# (SQLite in a temp dir) into fake Discord channels.
+
+TIMEZONES = ["UTC", "Europe/Berlin", "America/New_York", "Asia/Tokyo", "Australia/Sydney"]
+
+# (share, schedule factory)
+SCHEDULE_MIX = [
+    (0.50, lambda rng: f"every day at {rng.randrange(24):02d}:{rng.randrange(0, 60, 5):02d}"),
+    (0.20, lambda rng: f"{rng.randrange(0, 60, 15)} {rng.randrange(24)} * * {rng.randrange(7)}"),
+    (0.15, lambda rng: f"every {rng.randint(1, 7)} days"),
+    (0.10, lambda rng: "0 9-17 * * 1-5"),
+    (0.05, lambda rng: "0 */6 * * *"),
+]
+
+# Monday 2 March 2026: two simulated weeks cover the US and EU DST switches
+START = datetime(2026, 3, 2, tzinfo=timezone.utc).timestamp()
+
+
+def make_reminders(count, guilds, channels_per_guild, since, seed=1):
+    rng = random.Random(seed)
+    shares = [share for share, _ in SCHEDULE_MIX]
+    reminders = {}
+    for i in range(1, count + 1):
+        _, factory = rng.choices(SCHEDULE_MIX, weights=shares)[0]
+        guild_id = rng.randrange(guilds) + 1
+        reminders[str(i)] = normalize_reminder({
+            "message": f"Reminder {i}",
+            "schedule": factory(rng),
+            "timezone": rng.choice(TIMEZONES),
+            "schedule_since": since,
+            "guild_id": guild_id,
+            "channel_id": guild_id * 1000 + rng.randrange(channels_per_guild),
+        })
+    return reminders
+
+
+async def run(args):
+    clock = FakeClock(START)
+    guilds = [FakeGuild(g, [g * 1000 + c for c in range(args.channels)]) for g in range(1, args.guilds + 1)]
+    client = FakeClient(guilds)
+    reminders = make_reminders(args.reminders, args.guilds, args.channels, int(START))
+
+    queue = store = None
+    if args.deliver:
+        tmp = tempfile.TemporaryDirectory()
+        store = DeliveryStore(Path(tmp.name) / "deliveries.db")
+        queue = DeliveryQueue(client, store, workers=args.workers, clock=clock)
+        queue.start()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    scheduler = ReminderScheduler(clock=clock)
+    started = time.perf_counter()
+    scheduler.rebuild(reminders)
+    rebuild_s = time.perf_counter() - started
+    report(f"{len(scheduler):,} reminders in {args.guilds} guild(s), rebuild {rebuild_s * 1000:.0f}ms")
+
+    end = START + args.weeks * 7 * 86400
+    tick_times = []
+    fires = 0
+    busy = 0.0
+    while True:
+        fire_ts = scheduler.next_fire_ts()
+        if fire_ts is None or fire_ts > end:
+            break
+        now = clock.set(fire_ts)
+        tick_start = time.perf_counter()
+        deliveries, handled = collect_due(scheduler, reminders, now, lambda r: r["channel_id"])
+        if queue and deliveries:
+            await queue.enqueue(deliveries)
+        mark_handled(scheduler, reminders, handled, now)
+        elapsed = time.perf_counter() - tick_start
+        tick_times.append(elapsed)
+        busy += elapsed
+        fires += len(deliveries)
+
+    report(f"{args.weeks} simulated week(s): {len(tick_times):,} ticks, {fires:,} fires, "
+           f"{fires / busy if busy else 0:,.0f} fires/s")
+    report(f"tick latency  {format_ms(percentiles(tick_times))}")
+
+    if queue:
+        drain_start = time.perf_counter()
+        while store.counts().get("pending"):
+            await asyncio.sleep(0.01)
+        drain_s = time.perf_counter() - drain_start
+        await queue.close()
+        counts = store.counts()
+        store.close()
+        tmp.cleanup()
+        report(f"deliveries    {counts}, {client.sends():,} channel sends, drained {drain_s:.1f}s after the last tick")
+
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report(f"memory        tracemalloc peak {peak / 1024 / 1024:.1f} MB, RSS peak {peak_rss_mb():.1f} MB")
+    else:
+        report(f"memory        RSS peak {peak_rss_mb():.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reminder scheduler throughput over simulated weeks")
+    parser.add_argument("--reminders", type=int, default=10_000)
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--channels", type=int, default=3, help="reminder channels per guild")
+    parser.add_argument("--weeks", type=int, default=2)
+    parser.add_argument("--deliver", action="store_true", help="also send through DeliveryQueue to fake channels")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--tracemalloc", action="store_true", help="measure Python allocations (slower)")
+    with quiet():
+        asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "reminderBot"))
+
+from triggers import DEFAULT_TRIGGERS, TriggerMatcher
+
+# Messages/sec for reminderBot's on_message trigger matching: the compiled matcher against a
+# straight loop over the same triggers (what the old if/elif chain did).
+
+
+def naive_match(triggers, content):
+    for trigger in triggers:
+        pattern = trigger["pattern"]
+        if trigger["match"] == "exact":
+            if content == pattern:
+                return trigger
+        elif pattern in content:
+            return trigger
+    return None
+
+
+def make_corpus(size, hit_rate, seed=1):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2000)]
+    patterns = [t["pattern"] for t in DEFAULT_TRIGGERS]
+    corpus = []
+    for _ in range(size):
+        if rng.random() < hit_rate:
+            pattern = rng.choice(patterns)
+            corpus.append(pattern if rng.random() < 0.5 else f"{rng.choice(words)} {pattern} {rng.choice(words)}")
+        else:
+            corpus.append(" ".join(rng.choices(words, k=rng.randint(3, 30))))
+    return corpus
+
+
+def run(label, fn, corpus):
+    start = time.perf_counter()
+    hits = sum(1 for content in corpus if fn(content) is not None)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {len(corpus) / elapsed:>12,.0f} msg/s  ({hits} hits)")
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--hit-rate", type=float, default=0.02)
+    parser.add_argument("--extra-triggers", type=int, default=0, help="add N random substring triggers")
+    args = parser.parse_args()
+
+    triggers = [dict(t, id=i, cooldown=0) for i, t in enumerate(DEFAULT_TRIGGERS, start=1)]
+    rng = random.Random(2)
+    for i in range(args.extra_triggers):
+        pattern = "".join(rng.choices(string.ascii_lowercase, k=8))
+        triggers.append({"id": len(triggers) + 1, "pattern": pattern, "match": "substring", "reply": "x", "cooldown": 0})
+
+    corpus = make_corpus(args.messages, args.hit_rate)
+    matcher = TriggerMatcher(triggers)
+    print(f"{len(triggers)} triggers, {len(corpus):,} messages")
+    naive_hits = run("naive", lambda c: naive_match(triggers, c), corpus)
+    compiled_hits = run("compiled", matcher.match, corpus)
+    if naive_hits != compiled_hits:
+        print("⚠️ hit counts differ")
+
+
+if __name__ == "__main__":
+    main()
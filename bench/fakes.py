@@ -0,0 +1,142 @@
+import asyncio
+import contextlib
+import itertools
+import os
+import resource
+import socket
+import sys
+import time
+
+# Stand-ins for the clock and the Discord objects the bots talk to, so the hot paths can be
+# driven offline and at simulated speed. Twitch is faked by livebot/fake_eventsub.FakeTwitch.
+
+
+class FakeClock:
+    # A wall clock that only moves when told to; pass it wherever `clock=time.time` is accepted
+
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return self.now
+
+    def set(self, ts):
+        # Never runs backwards
+        self.now = max(self.now, ts)
+        return self.now
+
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, channel, content, **kwargs):
+        self.id = next(self._ids)
+        self.channel = channel
+        self.content = content
+        self.embed = kwargs.get("embed")
+        self.nonce = kwargs.get("nonce")
+
+
+class FakeChannel:
+    # Records every send. `latency` simulates the API round trip; `fail` (an exception, or a
+    # callable taking the send count and returning one or None) makes sends raise.
+
+    def __init__(self, id, guild=None, latency=0.0, fail=None):
+        self.id = id
+        self.guild = guild
+        self.latency = latency
+        self.fail = fail
+        self.sent = []
+        self.calls = 0
+
+    async def send(self, content=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        error = self.fail(self.calls) if callable(self.fail) else self.fail
+        if error:
+            raise error
+        message = FakeMessage(self, content, **kwargs)
+        self.sent.append(message)
+        return message
+
+
+class FakeGuild:
+
+    def __init__(self, id, channel_ids=(), latency=0.0):
+        self.id = id
+        self.name = f"guild-{id}"
+        self.channels = {channel_id: FakeChannel(channel_id, self, latency) for channel_id in channel_ids}
+        self.members = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+
+class FakeClient:
+    # Enough of discord.Client for DeliveryQueue and announcement code: channel lookup by id,
+    # with unknown ids handed out as fresh FakeChannels like a partial messageable
+
+    def __init__(self, guilds=(), latency=0.0):
+        self.guilds = list(guilds)
+        self.latency = latency
+        self._channels = {cid: ch for guild in self.guilds for cid, ch in guild.channels.items()}
+
+    def get_guild(self, guild_id):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_partial_messageable(self, channel_id):
+        return self._channels.setdefault(channel_id, FakeChannel(channel_id, latency=self.latency))
+
+    def channels(self):
+        return list(self._channels.values())
+
+    def sends(self):
+        return sum(channel.calls for channel in self._channels.values())
+
+
+@contextlib.contextmanager
+def quiet():
+    # The bots log with print(); keep that out of the benchmark report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def report(*args):
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    # {"p50": .., "p95": .., "p99": .., "max": ..} of a list of numbers
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] for p in points}
+    result["max"] = ordered[-1]
+    return result
+
+
+def format_ms(stats):
+    return "  ".join(f"{name} {value * 1000:.2f}ms" for name, value in stats.items())
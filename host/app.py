@@ -0,0 +1,140 @@
+import os
+import sys
+import asyncio
+import signal
+from pathlib import Path
+import aiohttp
+import discord
+from discord import app_commands
+from discord.ext import commands
+from dotenv import load_dotenv
+
+# Runs livebot and reminderBot as extensions of one bot: one gateway connection, one member/
+# channel cache and one HTTP connection pool, instead of one of each per container.
+
+ROOT = Path(__file__).resolve().parent.parent
+# Extensions load as "<bot>.app" from the repository root. Each bot imports its own modules by
+# bare name (and the two never share a module name), so their folders go on the path as well.
+sys.path.insert(0, str(ROOT))
+sys.path += [str(ROOT / "shared"), str(ROOT / "livebot"), str(ROOT / "reminderBot")]
+
+import hosting
+from command_sync import sync_commands
+from member_cache import client_options
+
+load_dotenv()
+
+DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
+
+# --- HOST ---
+# Comma-separated bots to run in this process
+HOST_BOTS = [x.strip() for x in os.environ.get("HOST_BOTS", "livebot,reminderBot").split(",") if x.strip()]
+# Connections shared by the Discord client and the Twitch client
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "100"))
+SHARDED = os.environ.get("SHARDED", "0") == "1"
+MEMBER_CACHE = os.environ.get("MEMBER_CACHE", "full").lower()
+COMMAND_SYNC = os.environ.get("COMMAND_SYNC", "auto").lower()
+COMMAND_SYNC_FILE = Path(os.environ.get("COMMAND_SYNC_FILE", "data/command_sync.json"))
+DEV_GUILD_ID = int(os.environ.get("DEV_GUILD_ID", "0"))
+# ------------
+
+# --- METRICS ---
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_JSON_LOGS = os.environ.get("METRICS_JSON_LOGS", "false").lower() == "true"
+LOOP_LAG_THRESHOLD = float(os.environ.get("LOOP_LAG_THRESHOLD", "0.25"))
+# ---------------
+
+# Privileged gateway intents each bot needs on top of the defaults; the host asks for the union
+BOT_INTENTS = {
+    "livebot": [],
+    "reminderBot": ["members", "message_content"],
+}
+
+for name in HOST_BOTS:
+    if name not in BOT_INTENTS:
+        print(f"Unknown bot {name!r} in HOST_BOTS (known: {', '.join(BOT_INTENTS)})")
+HOST_BOTS = [name for name in HOST_BOTS if name in BOT_INTENTS]
+
+
+def extension(name):
+    return f"{name}.app"
+
+
+async def reload_bot(bot, name):
+    # Unloads (flushing and closing its stores) and re-imports one bot; the gateway stays up
+    await bot.reload_extension(extension(name))
+    print(f"🔄 Reloaded {name}")
+    await sync_commands(bot.tree, COMMAND_SYNC_FILE, COMMAND_SYNC, DEV_GUILD_ID)
+
+
+async def reload_all(bot):
+    for name in HOST_BOTS:
+        try:
+            await reload_bot(bot, name)
+        except commands.ExtensionError as e:
+            print(f"Failed to reload {name}: {e}")
+
+
+@app_commands.command(name="reloadbot", description="Reload one of the hosted bots without reconnecting")
+@app_commands.describe(name="Which bot to reload")
+@app_commands.choices(name=[app_commands.Choice(name=b, value=b) for b in HOST_BOTS])
+async def slash_reloadbot(interaction: discord.Interaction, name: str):
+    if not await interaction.client.is_owner(interaction.user):
+        await interaction.response.send_message("❌ Only the bot owner can reload bots.", ephemeral=True)
+        return
+    await interaction.response.defer(ephemeral=True)
+    try:
+        await reload_bot(interaction.client, name)
+    except commands.ExtensionError as e:
+        await interaction.followup.send(f"❌ Reload of `{name}` failed: {e}", ephemeral=True)
+        return
+    await interaction.followup.send(f"✅ Reloaded `{name}`.", ephemeral=True)
+
+
+async def main():
+    discord.utils.setup_logging()
+    intents = discord.Intents.default()
+    for name in HOST_BOTS:
+        for flag in BOT_INTENTS[name]:
+            setattr(intents, flag, True)
+    options = client_options(MEMBER_CACHE) if "reminderBot" in HOST_BOTS else {}
+
+    # One pool for everything: discord.py's own session and the one Twitch calls go through
+    connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, keepalive_timeout=60, ttl_dns_cache=300)
+    bot = hosting.build_bot(intents, sharded=SHARDED, connector=connector, **options)
+    bot.http_session = aiohttp.ClientSession(connector=connector, connector_owner=False)
+    bot.tree.add_command(slash_reloadbot)
+    instrumentation = hosting.Instrumentation(
+        bot, host=METRICS_HOST, port=METRICS_PORT, json_logs=METRICS_JSON_LOGS,
+        lag_threshold=LOOP_LAG_THRESHOLD, root=ROOT
+    )
+
+    async def setup_hook():
+        await instrumentation.start()
+        for name in HOST_BOTS:
+            await bot.load_extension(extension(name))
+            print(f"Loaded {name}")
+        await sync_commands(bot.tree, COMMAND_SYNC_FILE, COMMAND_SYNC, DEV_GUILD_ID)
+
+    bot.setup_hook = setup_hook
+    try:
+        # kill -HUP reloads every bot, like /reloadbot
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, lambda: asyncio.create_task(reload_all(bot)))
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        # Closing the bot unloads the extensions, which flushes and closes their stores
+        await hosting.serve(bot, DISCORD_TOKEN)
+    finally:
+        await bot.http_session.close()
+        await instrumentation.close()
+
+
+if __name__ == "__main__":
+    if not DISCORD_TOKEN:
+        print("DISCORD_TOKEN not set. Exiting.")
+    elif not HOST_BOTS:
+        print("HOST_BOTS names no bots to run. Exiting.")
+    else:
+        asyncio.run(main())
@@ -1,106 +1,509 @@
 import os
+import sys
+import asyncio
+import time
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import discord
-import requests
+from discord import app_commands
 from discord.ext import tasks
 from dotenv import load_dotenv
 
+# metrics.py, hosting.py and command_sync.py are shared with reminderBot; the Docker image copies them next to this file
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+
+import hosting
+import metrics
+from command_sync import sync_commands
+from twitch_client import TwitchClient, TWITCH_HELIX_URL, TWITCH_TOKEN_URL
+from eventsub import EventSubWebSocket, EventSubWebhook, TWITCH_EVENTSUB_WS_URL
+from channels import ChannelRegistry
+from poll_scheduler import PollScheduler
+from state_store import LiveStateStore
+from fanout import FanoutDispatcher, key_channel, load_subscriptions
+from stream_history import StreamHistory, WEEKDAYS, parse_started_at
+
 load_dotenv()
 
 DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
-DISCORD_CHANNEL_ID = int(os.environ.get("DISCORD_CHANNEL_ID"))
+# Default announcement channel for streamers without an entry in LIVEBOT_SUBSCRIPTIONS
+DISCORD_CHANNEL_ID = int(os.environ.get("DISCORD_CHANNEL_ID", "0"))
+# JSON file mapping streamer -> list of {"channel_id", "mention", "role_id"} targets
+LIVEBOT_SUBSCRIPTIONS = os.environ.get("LIVEBOT_SUBSCRIPTIONS", "data/subscriptions.json")
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", "8"))
 TWITCH_CLIENT_ID = os.environ.get("TWITCH_CLIENT_ID")
 TWITCH_CLIENT_SECRET = os.environ.get("TWITCH_CLIENT_SECRET")
 TWITCH_CHANNEL = os.environ.get("TWITCH_CHANNEL", "shanntidotes")
+# Comma-separated list of logins to watch; falls back to the single TWITCH_CHANNEL
+TWITCH_CHANNELS = [
+    x.strip() for x in os.environ.get("TWITCH_CHANNELS", TWITCH_CHANNEL).split(",") if x.strip()
+]
+TWITCH_TIMEOUT = float(os.environ.get("TWITCH_TIMEOUT", "10"))
+TWITCH_BATCH_CONCURRENCY = int(os.environ.get("TWITCH_BATCH_CONCURRENCY", "4"))
+LIVEBOT_STATE_DB = os.environ.get("LIVEBOT_STATE_DB", "data/livebot_state.db")
+
+# --- POLL SCHEDULING (seconds) ---
+POLL_TICK = float(os.environ.get("POLL_TICK", "5"))
+POLL_LIVE_INTERVAL = float(os.environ.get("POLL_LIVE_INTERVAL", "60"))
+POLL_HOT_INTERVAL = float(os.environ.get("POLL_HOT_INTERVAL", "30"))
+POLL_IDLE_INTERVAL = float(os.environ.get("POLL_IDLE_INTERVAL", "120"))
+# A channel is "hot" within this many seconds of a weekly time it has gone live before
+POLL_HOT_WINDOW = float(os.environ.get("POLL_HOT_WINDOW", "1800"))
+# Rate-limit points never spent by polling (left for EventSub lookups etc.)
+TWITCH_RATELIMIT_RESERVE = int(os.environ.get("TWITCH_RATELIMIT_RESERVE", "80"))
+# ---------------------------------
+TWITCH_HELIX_URL = os.environ.get("TWITCH_HELIX_URL", TWITCH_HELIX_URL)
+TWITCH_TOKEN_URL = os.environ.get("TWITCH_TOKEN_URL", TWITCH_TOKEN_URL)
+
+# --- EVENTSUB CONFIGURATION ---
+# "poll" (default) or "eventsub"; EventSub mode still polls channels without a live subscription
+LIVEBOT_MODE = os.environ.get("LIVEBOT_MODE", "poll").lower()
+EVENTSUB_TRANSPORT = os.environ.get("EVENTSUB_TRANSPORT", "websocket").lower()
+TWITCH_USER_TOKEN = os.environ.get("TWITCH_USER_TOKEN")
+TWITCH_EVENTSUB_WS_URL = os.environ.get("TWITCH_EVENTSUB_WS_URL", TWITCH_EVENTSUB_WS_URL)
+EVENTSUB_WEBHOOK_CALLBACK = os.environ.get("EVENTSUB_WEBHOOK_CALLBACK")
+EVENTSUB_WEBHOOK_SECRET = os.environ.get("EVENTSUB_WEBHOOK_SECRET")
+EVENTSUB_WEBHOOK_PORT = int(os.environ.get("EVENTSUB_WEBHOOK_PORT", "8080"))
+# ------------------------------
+
+# --- STREAM HISTORY ---
+# Viewer count, game and title from every poll of a live channel, for /streamstats
+LIVEBOT_HISTORY_DB = os.environ.get("LIVEBOT_HISTORY_DB", "data/stream_history.db")
+# Samples are kept as polled for this many days, then averaged into HISTORY_RESOLUTION-second buckets
+HISTORY_RAW_DAYS = int(os.environ.get("HISTORY_RAW_DAYS", "14"))
+HISTORY_RESOLUTION = int(os.environ.get("HISTORY_RESOLUTION", "300"))
+# Samples older than this are dropped; per-stream totals (peak, average, duration) are kept
+HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", "400"))
+# IANA timezone /streamstats reports go-live times in, unless the command names one
+STREAMSTATS_TIMEZONE = os.environ.get("STREAMSTATS_TIMEZONE", "UTC")
+# ----------------------
+
+# --- COMMAND SYNC ---
+# "auto" uploads slash commands only when they changed since the last sync, "force" always
+# uploads, "off" never does
+COMMAND_SYNC = os.environ.get("COMMAND_SYNC", "auto").lower()
+COMMAND_SYNC_FILE = Path(os.environ.get("COMMAND_SYNC_FILE", "data/command_sync.json"))
+# Also sync to this guild (instant, unlike global commands) for testing changes
+DEV_GUILD_ID = int(os.environ.get("DEV_GUILD_ID", "0"))
+# --------------------
+
+# --- METRICS ---
+# Prometheus endpoint at http://METRICS_HOST:METRICS_PORT/metrics; 0 turns it off
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+# One JSON line per tick/command/stall on stdout
+METRICS_JSON_LOGS = os.environ.get("METRICS_JSON_LOGS", "false").lower() == "true"
+# Event loop stalls longer than this (seconds) are logged with the blocking line
+LOOP_LAG_THRESHOLD = float(os.environ.get("LOOP_LAG_THRESHOLD", "0.25"))
+# ---------------
 
-intents = discord.Intents.default()
-client = discord.Client(intents=intents)
+# Set by setup(): the bot livebot runs on, standalone or inside host/app.py
+client = None
+fanout = None
 
-last_live_status = False
-TWITCH_TOKEN = None
-DISCORD_CHANNEL = None
+subscriptions = load_subscriptions(LIVEBOT_SUBSCRIPTIONS, TWITCH_CHANNELS, DISCORD_CHANNEL_ID)
 
-def get_twitch_token():
-    url = "https://id.twitch.tv/oauth2/token"
-    params = {
-        "client_id": TWITCH_CLIENT_ID,
-        "client_secret": TWITCH_CLIENT_SECRET,
-        "grant_type": "client_credentials"
+channels = ChannelRegistry(subscriptions)
+# Restore live state before the first poll so restarts don't re-announce running streams
+store = LiveStateStore(LIVEBOT_STATE_DB)
+print(f"Restored state for {store.load_into(channels)} channel(s)")
+history = StreamHistory(
+    LIVEBOT_HISTORY_DB, raw_days=HISTORY_RAW_DAYS, resolution=HISTORY_RESOLUTION,
+    retention_days=HISTORY_RETENTION_DAYS
+)
+twitch = TwitchClient(
+    TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET,
+    timeout=TWITCH_TIMEOUT, batch_concurrency=TWITCH_BATCH_CONCURRENCY,
+    helix_url=TWITCH_HELIX_URL, token_url=TWITCH_TOKEN_URL
+)
+eventsub = None
+
+scheduler = PollScheduler(
+    tick=POLL_TICK, live_interval=POLL_LIVE_INTERVAL, hot_interval=POLL_HOT_INTERVAL,
+    idle_interval=POLL_IDLE_INTERVAL, hot_window=POLL_HOT_WINDOW, reserve=TWITCH_RATELIMIT_RESERVE
+)
+for login in channels.logins():
+    scheduler.add(login)
+
+def viewer_bucket(count):
+    # Two significant figures, so small viewer swings don't trigger an edit
+    if not count:
+        return 0
+    return int(float(f"{count:.2g}"))
+
+def embed_fields(login, stream):
+    return {
+        "name": stream.get("user_name", login),
+        "title": stream.get("title", "Untitled"),
+        "game": stream.get("game_name", "Unknown"),
+        "viewers": viewer_bucket(stream.get("viewer_count")),
+        "thumbnail": stream.get("thumbnail_url", "").replace("{width}", "1280").replace("{height}", "720")
     }
-    resp = requests.post(url, params=params)
-    resp.raise_for_status()
-    return resp.json()["access_token"]
-
-def check_twitch_live():
-    global TWITCH_TOKEN
-    if not TWITCH_TOKEN:
-        TWITCH_TOKEN = get_twitch_token()
-
-    url = f"https://api.twitch.tv/helix/streams?user_login={TWITCH_CHANNEL}"
-    headers = {
-        "Client-ID": TWITCH_CLIENT_ID,
-        "Authorization": f"Bearer {TWITCH_TOKEN}"
+
+def build_live_embed(login, fields):
+    url = f"https://twitch.tv/{login}"
+    embed = discord.Embed(
+        title=f"{fields['name']} is now LIVE!",
+        description=f"**{fields['title']}**\nPlaying: {fields['game']}",
+        url=url,
+        color=discord.Color.purple()
+    )
+    if fields["thumbnail"]:
+        embed.set_thumbnail(url=fields["thumbnail"])
+    if fields["viewers"]:
+        embed.add_field(name="Viewers:", value=f"~{fields['viewers']:,}", inline=True)
+    embed.add_field(name="Watch here:", value=url, inline=False)
+    return embed
+
+def build_ended_embed(login, fields):
+    embed = discord.Embed(
+        title=f"{fields['name']} was live",
+        description=f"**{fields['title']}**\nPlayed: {fields['game']}",
+        url=f"https://twitch.tv/{login}",
+        color=discord.Color.dark_grey()
+    )
+    embed.add_field(name="Status:", value="Stream ended", inline=False)
+    return embed
+
+async def announce_live(channel):
+    if channel.stream_id and store.was_announced(channel.stream_id):
+        print(f"Stream {channel.stream_id} for {channel.login} was already announced")
+        return
+    targets = subscriptions.get(channel.login, [])
+    if not targets:
+        print(f"No announcement targets for {channel.login}")
+        return
+
+    result = await send_announcements(channel, targets)
+    if result.sent:
+        print(f"Announced live stream for {channel.login}: {channel.rendered['title']} -> {result.summary()}")
+    else:
+        print(f"Failed to announce live stream for {channel.login}: {result.summary()}")
+
+async def send_announcements(channel, targets):
+    # Posts the go-live message to `targets`. Failures that may clear up (5xx, rate limits that
+    # outlasted the retries) are kept in channel.failed_targets for retry_announcements(); no
+    # access or a deleted channel won't, so those are dropped.
+    fields = channel.rendered or embed_fields(channel.login, channel.stream)
+    embed = build_live_embed(channel.login, fields)
+
+    def send_to(target):
+        content = f"{target.mention_text()} 🎮 Live now!".strip()
+        return lambda dest: dest.send(content=content, embed=embed)
+
+    result = await fanout.dispatch({t.key: (t.channel_id, send_to(t)) for t in targets})
+    channel.messages.update({key: message.id for key, message in result.sent.items()})
+    channel.failed_targets = {
+        key for key, error in result.failed.items() if not isinstance(error, (discord.Forbidden, discord.NotFound))
     }
-    resp = requests.get(url, headers=headers)
+    if result.sent:
+        channel.rendered = fields
+        if channel.stream_id:
+            store.mark_announced(channel.stream_id, channel.login)
+    return result
 
-    if resp.status_code == 401:
-        # refresh token
-        TWITCH_TOKEN = get_twitch_token()
-        headers["Authorization"] = f"Bearer {TWITCH_TOKEN}"
-        resp = requests.get(url, headers=headers)
+async def retry_announcements(channel):
+    # Another go at targets whose go-live post failed, for as long as the stream is live
+    if not channel.failed_targets or not channel.live:
+        return False
+    targets = [t for t in subscriptions.get(channel.login, []) if t.key in channel.failed_targets]
+    if not targets:
+        channel.failed_targets = set()
+        return True
+    result = await send_announcements(channel, targets)
+    print(f"Retried live announcement for {channel.login}: {result.summary()}")
+    return True
 
-    resp.raise_for_status()
-    data = resp.json().get("data", [])
-    return data[0] if data else None
+async def edit_announcements(channel, embed, **kwargs):
+    def edit(message_id):
+        return lambda dest: dest.get_partial_message(message_id).edit(embed=embed, **kwargs)
 
-@tasks.loop(minutes=2)
-async def twitch_check():
-    global last_live_status
+    result = await fanout.dispatch({key: (key_channel(key), edit(mid)) for key, mid in channel.messages.items()})
+    for key, error in result.failed.items():
+        if isinstance(error, discord.NotFound):
+            # Message (or channel) is gone; stop trying to edit it
+            channel.messages.pop(key, None)
+    return result
+
+async def update_live(channel):
+    # Only touch Discord when something visible in the embed changed
+    fields = embed_fields(channel.login, channel.stream)
+    if not channel.messages or fields == channel.rendered:
+        return False
+    result = await edit_announcements(channel, build_live_embed(channel.login, fields))
+    if result.failed:
+        print(f"Failed to update live announcement for {channel.login}: {result.summary()}")
+    if result.sent:
+        channel.rendered = fields
+        return True
+    return False
+
+async def announce_offline(channel):
+    content = f"{channel.login} has ended the stream."
+    edited = {}
+    if channel.messages and channel.rendered:
+        result = await edit_announcements(channel, build_ended_embed(channel.login, channel.rendered), content=content)
+        edited = result.sent
+
+    # Targets whose announcement can't be edited get a plain line instead
+    missing = [t for t in subscriptions.get(channel.login, []) if t.key not in edited]
+    result = await fanout.dispatch({t.key: (t.channel_id, lambda dest: dest.send(content)) for t in missing})
+    print(f"Announced stream ended for {channel.login}: {len(edited)} edited, {result.summary()} sent")
+
+def reschedule(logins):
+    for login in logins:
+        channel = channels.get(login)
+        if channel:
+            scheduler.reschedule(channel)
+
+async def poll_channels(logins):
     try:
-        stream = check_twitch_live()
+        live_streams = await twitch.get_streams(logins)
     except Exception as e:
         print(f"Error checking Twitch: {e}")
+        reschedule(logins)
         return
 
-    if not DISCORD_CHANNEL:
-        print("Discord channel not ready yet")
-        return
+    went_live, went_offline = channels.apply(live_streams, logins, now=scheduler.clock())
+    reschedule(logins)
+    history.record(live_streams, scheduler.clock())
+    for channel in went_offline:
+        history.end(channel.login)
+    for channel in went_live:
+        await announce_live(channel)
+    for channel in went_offline:
+        await announce_offline(channel)
 
-    if stream and not last_live_status:
-        last_live_status = True
-        title = stream.get("title", "Untitled")
-        game = stream.get("game_name", "Unknown")
-        url = f"https://twitch.tv/{TWITCH_CHANNEL}"
-        thumbnail = stream.get("thumbnail_url", "").replace("{width}", "1280").replace("{height}", "720")
-
-        embed = discord.Embed(
-            title=f"{TWITCH_CHANNEL} is now LIVE!",
-            description=f"**{title}**\nPlaying: {game}",
-            url=url,
-            color=discord.Color.purple()
-        )
-        if thumbnail:
-            embed.set_thumbnail(url=thumbnail)
-        embed.add_field(name="Watch here:", value=url, inline=False)
+    announced = {channel.login for channel in went_live}
+    updated = []
+    for login in live_streams:
+        channel = channels.get(login)
+        if not channel or login in announced:
+            continue
+        retried = await retry_announcements(channel)
+        if await update_live(channel) or retried:
+            updated.append(channel)
+    store.save_channels(went_live + went_offline + updated)
 
-        try:
-            await DISCORD_CHANNEL.send(content="@everyone 🎮 Live now!", embed=embed)
-            print(f"Announced live stream: {title}")
-        except Exception as e:
-            print(f"Failed to send live announcement: {e}")
+@tasks.loop(seconds=POLL_TICK)
+async def twitch_check():
+    with metrics.tick("twitch_check"):
+        budget = scheduler.batch_budget(twitch.ratelimit_remaining, twitch.ratelimit_reset)
+        logins = scheduler.pop_due(budget)
+        if eventsub:
+            # Only poll what EventSub isn't covering (live ones still need embed updates)
+            polled = [login for login in logins if login not in eventsub.covered or channels.get(login).live]
+            reschedule(set(logins) - set(polled))
+            logins = polled
+        if logins:
+            await poll_channels(logins)
 
-    elif not stream and last_live_status:
-        last_live_status = False
+async def on_eventsub_event(sub_type, event):
+    login = event["broadcaster_user_login"].lower()
+    if sub_type == "stream.online":
+        channel = channels.get(login)
+        if not channel:
+            return
+        if channel.live and channel.stream_id == event.get("id"):
+            # Already announced; a redelivered event is a chance to retry targets that failed
+            if await retry_announcements(channel):
+                store.save_channels([channel])
+            return
+        # The event has no title/game, so look the stream up once
         try:
-            await DISCORD_CHANNEL.send(f"{TWITCH_CHANNEL} has ended the stream.")
-            print("Announced stream ended")
+            stream = (await twitch.get_streams([login])).get(login)
         except Exception as e:
-            print(f"Failed to send stream ended message: {e}")
+            print(f"Error fetching stream details for {login}: {e}")
+            stream = None
+        if not stream:
+            stream = {
+                "id": event.get("id"),
+                "user_login": login,
+                "user_name": event.get("broadcaster_user_name", login),
+                "started_at": event.get("started_at")
+            }
+        channel = channels.set_live(login, stream)
+        history.record({login: stream})
+        if channel:
+            await announce_live(channel)
+            store.save_channels([channel])
+    elif sub_type == "stream.offline":
+        channel = channels.set_offline(login)
+        history.end(login)
+        if channel:
+            await announce_offline(channel)
+            store.save_channels([channel])
+
+async def on_eventsub_status(connected):
+    # EventSub doesn't replay missed events, so resync everything on any transition
+    if client.is_ready():
+        await poll_channels(channels.logins())
+
+def create_eventsub():
+    if EVENTSUB_TRANSPORT == "webhook":
+        if not EVENTSUB_WEBHOOK_CALLBACK or not EVENTSUB_WEBHOOK_SECRET:
+            print("EVENTSUB_WEBHOOK_CALLBACK and EVENTSUB_WEBHOOK_SECRET are required; staying on polling")
+            return None
+        return EventSubWebhook(
+            twitch, channels, on_eventsub_event, EVENTSUB_WEBHOOK_SECRET, EVENTSUB_WEBHOOK_CALLBACK,
+            port=EVENTSUB_WEBHOOK_PORT, on_status=on_eventsub_status
+        )
+    if not TWITCH_USER_TOKEN:
+        print("TWITCH_USER_TOKEN is required for EventSub over WebSocket; staying on polling")
+        return None
+    return EventSubWebSocket(
+        twitch, channels, on_eventsub_event, TWITCH_USER_TOKEN,
+        url=TWITCH_EVENTSUB_WS_URL, on_status=on_eventsub_status
+    )
+
+@tasks.loop(hours=24)
+async def compact_history():
+    try:
+        downsampled, dropped = await asyncio.to_thread(history.compact)
+    except Exception as e:
+        print(f"Failed to compact stream history: {e}")
+        return
+    if downsampled or dropped:
+        print(f"Stream history: downsampled {downsampled} segment(s), dropped {dropped}")
+
+SPARK = "▁▂▃▄▅▆▇█"
+
+def sparkline(points, width=24):
+    # Viewer counts over one stream, squeezed into `width` block characters
+    if not points:
+        return ""
+    values = [viewers for _, viewers in points]
+    step = len(values) / width if len(values) > width else 1
+    picked = [values[int(i * step)] for i in range(min(width, len(values)))]
+    top = max(picked) or 1
+    return "".join(SPARK[min(len(SPARK) - 1, v * len(SPARK) // (top + 1))] for v in picked)
+
+def format_duration(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h {rest // 60:02d}m"
+
+def build_stats_embed(login, stats, days, tz):
+    embed = discord.Embed(
+        title=f"📊 {login} — last {days} day(s)",
+        url=f"https://twitch.tv/{login}",
+        color=discord.Color.purple()
+    )
+    embed.add_field(name="Streams:", value=f"{stats['streams']} ({stats['hours']:.1f}h total)", inline=True)
+    embed.add_field(
+        name="Viewers:",
+        value=f"peak {stats['peak']:,} (<t:{int(stats['peak_at'])}:d>)\navg {stats['avg_viewers']:,.0f}",
+        inline=True
+    )
+    embed.add_field(
+        name="Duration:",
+        value=f"avg {format_duration(stats['avg_duration'])}\nlongest {format_duration(stats['longest'])}",
+        inline=True
+    )
+    weekdays = " ".join(f"{WEEKDAYS[d]} {stats['by_weekday'][d]}" for d in range(7) if stats["by_weekday"][d])
+    hours = " ".join(f"{h:02d}h {n}" for h, n in sorted(stats["by_hour"].items()))
+    embed.add_field(name=f"Goes live ({tz}):", value=f"{weekdays}\n{hours}"[:1024], inline=False)
+    if stats["usual_slots"]:
+        usual = ", ".join(f"{WEEKDAYS[d]} {h:02d}:00 ({n}x)" for (d, h), n in stats["usual_slots"])
+        embed.add_field(name="Usually live around:", value=usual, inline=False)
+    if stats["games"]:
+        games = ", ".join(f"{game} ({format_duration(seconds)})" for game, seconds in stats["games"])
+        embed.add_field(name="Top games:", value=games[:1024], inline=False)
+    spark = sparkline(history.series(stats["latest"]))
+    if spark:
+        embed.add_field(name="Latest stream:", value=spark, inline=False)
+    return embed
+
+@app_commands.command(name="streamstats", description="Viewer and schedule stats for a watched Twitch channel")
+@app_commands.describe(
+    streamer="Twitch login (defaults to the first watched channel)",
+    days="How many days back to look",
+    timezone="Timezone for go-live times, e.g. Europe/Berlin"
+)
+async def slash_streamstats(interaction: discord.Interaction, streamer: str = None,
+                            days: app_commands.Range[int, 1, 3650] = 90, timezone: str = None):
+    login = (streamer or next(iter(channels.logins()), "")).strip().lower()
+    if login not in channels:
+        return await interaction.response.send_message(f"❌ `{login}` is not a watched channel.", ephemeral=True)
+    tz_name = timezone or STREAMSTATS_TIMEZONE
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return await interaction.response.send_message(f"❌ Unknown timezone `{tz_name}`.", ephemeral=True)
+
+    stats = history.stats(login, time.time() - days * 86400, tz)
+    if not stats:
+        return await interaction.response.send_message(
+            f"No streams recorded for `{login}` in the last {days} day(s).", ephemeral=True
+        )
+    embed = build_stats_embed(login, stats, days, tz_name)
+    channel = channels.get(login)
+    if channel.live:
+        started = parse_started_at(channel.started_at)
+        embed.description = f"🔴 Live now, since <t:{int(started)}:R>" if started else "🔴 Live now"
+    await interaction.response.send_message(embed=embed)
+
+@slash_streamstats.autocomplete("streamer")
+async def streamstats_streamer(interaction: discord.Interaction, current: str):
+    current = current.lower()
+    return [app_commands.Choice(name=login, value=login) for login in channels.logins() if current in login][:25]
 
-@client.event
 async def on_ready():
-    global DISCORD_CHANNEL
+    global eventsub
     print(f"Logged in as {client.user}")
-    DISCORD_CHANNEL = client.get_channel(DISCORD_CHANNEL_ID)
-    twitch_check.start()
+    await twitch.start(getattr(client, "http_session", None))
+    if LIVEBOT_MODE == "eventsub" and eventsub is None:
+        eventsub = create_eventsub()
+        if eventsub:
+            eventsub.start()
+    if not twitch_check.is_running():
+        twitch_check.start()
+    if not compact_history.is_running():
+        compact_history.start()
+
+async def setup(bot):
+    # Extension entry point. A host that shares its aiohttp session sets bot.http_session,
+    # and the Twitch client uses it instead of opening its own.
+    global client, fanout
+    client = bot
+    fanout = FanoutDispatcher(bot, workers=FANOUT_WORKERS)
+    bot.tree.add_command(slash_streamstats)
+    bot.add_listener(on_ready)
+    if bot.is_ready():
+        # Loaded or reloaded after connecting, so on_ready won't come round again
+        await on_ready()
+
+async def teardown(bot):
+    global eventsub
+    bot.remove_listener(on_ready)
+    bot.tree.remove_command(slash_streamstats.name)
+    await hosting.stop_loop(twitch_check)
+    await hosting.stop_loop(compact_history)
+    if eventsub:
+        await eventsub.close()
+        eventsub = None
+    await twitch.close()
+    store.close()
+    history.close()
+
+async def main():
+    discord.utils.setup_logging()
+    bot = hosting.build_bot(discord.Intents.default())
+    instrumentation = hosting.Instrumentation(
+        bot, host=METRICS_HOST, port=METRICS_PORT, json_logs=METRICS_JSON_LOGS,
+        lag_threshold=LOOP_LAG_THRESHOLD, root=Path(__file__).resolve().parent
+    )
+
+    async def setup_hook():
+        await instrumentation.start()
+        await setup(bot)
+        await sync_commands(bot.tree, COMMAND_SYNC_FILE, COMMAND_SYNC, DEV_GUILD_ID)
+
+    bot.setup_hook = setup_hook
+    try:
+        await hosting.serve(bot, DISCORD_TOKEN)
+    finally:
+        await teardown(bot)
+        await instrumentation.close()
 
-client.run(DISCORD_TOKEN)
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+# How many past go-live times to keep per channel for poll scheduling
+GOLIVE_HISTORY = 20
+
+
+@dataclass
+class ChannelState:
+    login: str
+    live: bool = False
+    user_id: str = None
+    stream_id: str = None
+    started_at: str = None
+    # Announcement message id per target (Target.key)
+    messages: dict = field(default_factory=dict, repr=False)
+    # Target keys whose go-live post failed with an error worth retrying while the stream is live
+    failed_targets: set = field(default_factory=set, repr=False)
+    # Fields last rendered into the announcement embed, for change detection
+    rendered: dict = field(default=None, repr=False)
+    stream: dict = field(default=None, repr=False)
+    golive_history: deque = field(default_factory=lambda: deque(maxlen=GOLIVE_HISTORY), repr=False)
+
+    def is_new_stream(self, stream):
+        # Offline -> live, or a different stream id than the one we announced (restarted during downtime)
+        if not self.live:
+            return True
+        stream_id = stream.get("id")
+        return bool(stream_id and self.stream_id and stream_id != self.stream_id)
+
+    def mark_live(self, stream, now=None):
+        if self.is_new_stream(stream):
+            self.golive_history.append(now if now is not None else time.time())
+            self.messages = {}
+            self.failed_targets = set()
+            self.rendered = None
+        self.live = True
+        self.stream = stream
+        self.stream_id = stream.get("id") or self.stream_id
+        self.started_at = stream.get("started_at") or self.started_at
+
+    def mark_offline(self):
+        # stream_id/started_at stay around for the end-of-stream edit
+        self.live = False
+        self.stream = None
+        self.failed_targets = set()
+
+
+class ChannelRegistry:
+    # Per-channel live state for every Twitch login the bot watches
+
+    def __init__(self, logins=()):
+        self._channels = {}
+        for login in logins:
+            self.add(login)
+
+    def __len__(self):
+        return len(self._channels)
+
+    def __iter__(self):
+        return iter(self._channels.values())
+
+    def __contains__(self, login):
+        return login.lower() in self._channels
+
+    def get(self, login):
+        return self._channels.get(login.lower())
+
+    def add(self, login):
+        login = login.strip().lower()
+        if not login:
+            return None
+        return self._channels.setdefault(login, ChannelState(login))
+
+    def remove(self, login):
+        return self._channels.pop(login.lower(), None)
+
+    def logins(self):
+        return list(self._channels)
+
+    def apply(self, live_streams, logins=None, now=None):
+        # Update the polled channels (all of them by default) from a {login: stream} result.
+        # Returns (went_live, went_offline) lists of ChannelState.
+        went_live = []
+        went_offline = []
+        polled = self._channels.values() if logins is None else filter(None, map(self.get, logins))
+        for channel in polled:
+            stream = live_streams.get(channel.login)
+            if stream and channel.is_new_stream(stream):
+                went_live.append(channel)
+            elif not stream and channel.live:
+                went_offline.append(channel)
+            if stream:
+                channel.mark_live(stream, now)
+            else:
+                channel.mark_offline()
+        return went_live, went_offline
+
+    def set_live(self, login, stream):
+        # Push-mode update for a single channel; returns the channel if it just went live
+        channel = self.get(login)
+        if not channel:
+            return None
+        new_stream = channel.is_new_stream(stream)
+        channel.mark_live(stream)
+        return channel if new_stream else None
+
+    def set_offline(self, login):
+        channel = self.get(login)
+        if not channel or not channel.live:
+            return None
+        channel.mark_offline()
+        return channel
@@ -0,0 +1,357 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+import aiohttp
+from aiohttp import web
+
+TWITCH_EVENTSUB_WS_URL = "wss://eventsub.wss.twitch.tv/ws"
+STREAM_EVENTS = ("stream.online", "stream.offline")
+# Twitch allows 300 enabled subscriptions per WebSocket session
+WS_MAX_SUBSCRIPTIONS = 300
+# Webhook messages older than this are rejected as replays
+WEBHOOK_MAX_AGE = 600
+# Status of a webhook subscription until its callback answers Twitch's challenge
+VERIFICATION_PENDING = "webhook_callback_verification_pending"
+
+
+def verify_signature(secret, message_id, timestamp, body, signature):
+    expected = "sha256=" + hmac.new(
+        secret.encode(), message_id.encode() + timestamp.encode() + body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+class _RecentIds:
+    # Twitch may redeliver a message; remember the last few ids to drop duplicates
+
+    def __init__(self, size=1000):
+        self._order = deque(maxlen=size)
+        self._ids = set()
+
+    def seen(self, message_id):
+        if message_id in self._ids:
+            return True
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(message_id)
+        self._ids.add(message_id)
+        return False
+
+
+class EventSubBase(ABC):
+    # Shared subscription bookkeeping. `covered` holds the logins that currently have
+    # both stream.online and stream.offline subscribed (and verified, for webhooks), so the
+    # poller can skip them.
+
+    def __init__(self, twitch, channels, on_event, on_status=None):
+        self.twitch = twitch
+        self.channels = channels
+        self.on_event = on_event
+        self.on_status = on_status
+        self.covered = set()
+        self.connected = False
+        self._recent = _RecentIds()
+        self._sub_logins = {}
+        # Webhook subscriptions whose challenge hasn't been answered yet: sub id -> login
+        self._unverified = {}
+        self._verified_early = set()
+        self._tasks = set()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _set_connected(self, connected, notify=True):
+        if not connected:
+            self.covered.clear()
+            self._sub_logins.clear()
+            self._unverified.clear()
+        if connected != self.connected:
+            self.connected = connected
+            print(f"EventSub {'connected' if connected else 'disconnected'}")
+            if notify and self.on_status:
+                self._spawn(self.on_status(connected))
+
+    async def _resolve_user_ids(self):
+        missing = [c.login for c in self.channels if not c.user_id]
+        if missing:
+            users = await self.twitch.get_users(missing)
+            for login, user_id in users.items():
+                self.channels.get(login).user_id = user_id
+
+    @abstractmethod
+    def _transport(self):
+        # The "transport" object for a subscription request
+        ...
+
+    def _token(self):
+        return None
+
+    def _limit(self):
+        return None
+
+    async def subscribe_all(self):
+        await self._resolve_user_ids()
+        pending = [c for c in self.channels if c.user_id and c.login not in self.covered]
+        limit = self._limit()
+        if limit is not None:
+            room = max(0, (limit - len(self._sub_logins)) // len(STREAM_EVENTS))
+            if len(pending) > room:
+                print(f"EventSub limit reached; {len(pending) - room} channel(s) stay on polling")
+                pending = pending[:room]
+
+        for channel in pending:
+            ok = True
+            unverified = []
+            for sub_type in STREAM_EVENTS:
+                body = {
+                    "type": sub_type,
+                    "version": "1",
+                    "condition": {"broadcaster_user_id": channel.user_id},
+                    "transport": self._transport()
+                }
+                try:
+                    data = await self.twitch.helix_request(
+                        "POST", "eventsub/subscriptions", json=body, token=self._token()
+                    )
+                    for sub in data.get("data", []):
+                        self._sub_logins[sub["id"]] = channel.login
+                        if sub["id"] in self._verified_early:
+                            self._verified_early.discard(sub["id"])
+                        elif sub.get("status") == VERIFICATION_PENDING:
+                            unverified.append(sub["id"])
+                except aiohttp.ClientResponseError as e:
+                    # 409 means the subscription already exists (webhooks survive restarts)
+                    if e.status != 409:
+                        print(f"Failed to subscribe {sub_type} for {channel.login}: {e.status} {e.message}")
+                        ok = False
+            if not ok:
+                continue
+            if unverified:
+                # Covered once Twitch has verified the callback; polled until then
+                self._unverified.update((sub_id, channel.login) for sub_id in unverified)
+            else:
+                self.covered.add(channel.login)
+
+    def _verified(self, subscription):
+        # The callback answered this subscription's challenge
+        sub_id = subscription.get("id")
+        login = self._unverified.pop(sub_id, None)
+        if login is None:
+            # The challenge can arrive before the POST that created the subscription returns
+            self._verified_early.add(sub_id)
+            return
+        if login not in self._unverified.values():
+            self.covered.add(login)
+            print(f"EventSub webhook verified for {login}")
+
+    def _revoke(self, subscription):
+        login = self._sub_logins.pop(subscription.get("id"), None)
+        if login is None:
+            user_id = subscription.get("condition", {}).get("broadcaster_user_id")
+            login = next((c.login for c in self.channels if c.user_id == user_id), None)
+        print(f"EventSub subscription revoked ({subscription.get('status')}) for {login}")
+        self.covered.discard(login)
+        if login:
+            self._spawn(self._resubscribe(login))
+
+    async def _resubscribe(self, login):
+        # Polling covers the login again as soon as it leaves `covered`; this tries to win it
+        # back (a revoked subscription can't be re-enabled, only created anew)
+        try:
+            await self.subscribe_all()
+        except Exception as e:
+            print(f"EventSub resubscribe error: {e}")
+        if login in self.covered:
+            print(f"EventSub resubscribed {login}")
+        else:
+            print(f"EventSub could not resubscribe {login}; it stays on polling")
+
+    async def _dispatch(self, message_id, subscription, event):
+        if self._recent.seen(message_id):
+            return
+        try:
+            await self.on_event(subscription["type"], event)
+        except Exception as e:
+            print(f"EventSub handler error for {subscription.get('type')}: {e}")
+
+
+class EventSubWebSocket(EventSubBase):
+    # WebSocket transport. Needs a user access token (Twitch rejects app tokens here).
+    # Reconnects with backoff; while disconnected nothing is covered and polling takes over.
+
+    def __init__(self, twitch, channels, on_event, user_token, *, url=TWITCH_EVENTSUB_WS_URL, on_status=None):
+        super().__init__(twitch, channels, on_event, on_status)
+        self.user_token = user_token
+        self.url = url
+        self.session_id = None
+        self._task = None
+
+    def _transport(self):
+        return {"method": "websocket", "session_id": self.session_id}
+
+    def _token(self):
+        return self.user_token
+
+    def _limit(self):
+        return WS_MAX_SUBSCRIPTIONS
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._set_connected(False, notify=False)
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                await self._session_loop()
+                backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"EventSub WebSocket error: {e!r}")
+            self._set_connected(False)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _welcome(self, ws):
+        # The first message on a fresh socket must be session_welcome
+        msg = await ws.receive(timeout=10)
+        data = json.loads(msg.data) if msg.type == aiohttp.WSMsgType.TEXT else {}
+        if data.get("metadata", {}).get("message_type") != "session_welcome":
+            raise ConnectionError("EventSub socket did not send session_welcome")
+        session = data["payload"]["session"]
+        self.session_id = session["id"]
+        return session.get("keepalive_timeout_seconds")
+
+    async def _session_loop(self):
+        # Returns when the socket closes; raises on keepalive timeout or protocol errors
+        await self.twitch.start()
+        ws = await self.twitch.session.ws_connect(self.url, heartbeat=None)
+        try:
+            keepalive = await self._welcome(ws) or 10
+            # Subscriptions must be created within 10s of the welcome
+            await self.subscribe_all()
+            self._set_connected(True)
+
+            while True:
+                msg = await ws.receive(timeout=keepalive + 5)
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    return
+
+                data = json.loads(msg.data)
+                metadata = data.get("metadata", {})
+                payload = data.get("payload", {})
+                message_type = metadata.get("message_type")
+
+                if message_type == "notification":
+                    await self._dispatch(metadata.get("message_id"), payload["subscription"], payload["event"])
+                elif message_type == "revocation":
+                    self._revoke(payload["subscription"])
+                elif message_type == "session_reconnect":
+                    # Subscriptions carry over; open the new socket before dropping the old one
+                    new_ws = await self.twitch.session.ws_connect(payload["session"]["reconnect_url"], heartbeat=None)
+                    try:
+                        keepalive = await self._welcome(new_ws) or keepalive
+                    except BaseException:
+                        await new_ws.close()
+                        raise
+                    await ws.close()
+                    ws = new_ws
+                    print("EventSub session moved to reconnect URL")
+        finally:
+            await ws.close()
+
+
+class EventSubWebhook(EventSubBase):
+    # Webhook transport: a small aiohttp server that Twitch POSTs to. Signatures are
+    # checked with the shared secret and stale timestamps are rejected.
+
+    def __init__(self, twitch, channels, on_event, secret, callback_url, *,
+                 host="0.0.0.0", port=8080, path="/eventsub", on_status=None):
+        super().__init__(twitch, channels, on_event, on_status)
+        self.secret = secret
+        self.callback_url = callback_url
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner = None
+        self._start_task = None
+
+    def _transport(self):
+        return {"method": "webhook", "callback": self.callback_url, "secret": self.secret}
+
+    def start(self):
+        if self._start_task is None or self._start_task.done():
+            self._start_task = asyncio.create_task(self._start())
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"EventSub webhook listening on {self.host}:{self.port}{self.path}")
+        backoff = 5
+        while True:
+            try:
+                await self.subscribe_all()
+                break
+            except Exception as e:
+                # Nothing is covered meanwhile, so every channel stays on polling
+                print(f"EventSub webhook subscribe error, retrying in {backoff}s: {e!r}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 300)
+        self._set_connected(True)
+
+    async def close(self):
+        if self._start_task:
+            self._start_task.cancel()
+            await asyncio.gather(self._start_task, return_exceptions=True)
+            self._start_task = None
+        if self._runner:
+            await self._runner.cleanup()
+        self._runner = None
+        self._set_connected(False, notify=False)
+
+    async def handle(self, request):
+        body = await request.read()
+        message_id = request.headers.get("Twitch-Eventsub-Message-Id", "")
+        timestamp = request.headers.get("Twitch-Eventsub-Message-Timestamp", "")
+        signature = request.headers.get("Twitch-Eventsub-Message-Signature", "")
+        if not verify_signature(self.secret, message_id, timestamp, body, signature):
+            return web.Response(status=403)
+
+        try:
+            sent_at = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return web.Response(status=400)
+        if (datetime.now(timezone.utc) - sent_at).total_seconds() > WEBHOOK_MAX_AGE:
+            return web.Response(status=403)
+
+        data = json.loads(body)
+        message_type = request.headers.get("Twitch-Eventsub-Message-Type")
+        if message_type == "webhook_callback_verification":
+            self._verified(data["subscription"])
+            return web.Response(text=data["challenge"], content_type="text/plain")
+        if message_type == "revocation":
+            self._revoke(data["subscription"])
+        elif message_type == "notification":
+            # Acknowledge quickly; Twitch retries if we take too long
+            self._spawn(self._dispatch(message_id, data["subscription"], data["event"]))
+        return web.Response(status=204)
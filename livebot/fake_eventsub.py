@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+import aiohttp
+from aiohttp import web
+
+# Local stand-in for the Twitch endpoints livebot talks to, so EventSub can be exercised offline:
+#   POST /oauth2/token                   app tokens
+#   GET  /helix/users, /helix/streams    login lookup and live streams
+#   *    /helix/eventsub/subscriptions   create / list / delete subscriptions
+#   GET  /ws                             EventSub WebSocket transport
+#   POST /control/online?login=..&title=..&game=..
+#   POST /control/offline?login=..
+#   POST /control/revoke?login=..&status=..  revoke that login's subscriptions
+#   POST /control/reconnect              send session_reconnect to every socket
+#   POST /control/drop                   close every socket without warning
+#
+# With ratelimit=N the Helix endpoints share an N-points-per-minute bucket and send the
+# Ratelimit-* headers (429 once it's empty), timed by `clock` so a simulated clock works too.
+#
+# Run it with `python fake_eventsub.py --port 8090` and point livebot at it:
+#   TWITCH_TOKEN_URL=http://127.0.0.1:8090/oauth2/token
+#   TWITCH_HELIX_URL=http://127.0.0.1:8090/helix
+#   TWITCH_EVENTSUB_WS_URL=ws://127.0.0.1:8090/ws
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _message(message_type, payload, subscription=None):
+    metadata = {
+        "message_id": str(uuid.uuid4()),
+        "message_type": message_type,
+        "message_timestamp": _now()
+    }
+    if subscription:
+        metadata["subscription_type"] = subscription["type"]
+        metadata["subscription_version"] = subscription["version"]
+    return {"metadata": metadata, "payload": payload}
+
+
+class FakeTwitch:
+
+    def __init__(self, host="127.0.0.1", port=8090, keepalive=10, ratelimit=None, clock=time.time):
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.ratelimit = ratelimit
+        self.clock = clock
+        self._bucket = ratelimit
+        self._bucket_reset = 0
+        self.users = {}
+        self.streams = {}
+        self.subscriptions = {}
+        self.sockets = {}
+        self.calls = {}
+        self._ids = itertools.count(1000)
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/oauth2/token", self.token)
+        self.app.router.add_get("/helix/users", self.get_users)
+        self.app.router.add_get("/helix/streams", self.get_streams)
+        self.app.router.add_post("/helix/eventsub/subscriptions", self.create_subscription)
+        self.app.router.add_get("/helix/eventsub/subscriptions", self.list_subscriptions)
+        self.app.router.add_delete("/helix/eventsub/subscriptions", self.delete_subscription)
+        self.app.router.add_get("/ws", self.websocket)
+        self.app.router.add_post("/control/online", self.control_online)
+        self.app.router.add_post("/control/offline", self.control_offline)
+        self.app.router.add_post("/control/revoke", self.control_revoke)
+        self.app.router.add_post("/control/reconnect", self.control_reconnect)
+        self.app.router.add_post("/control/drop", self.control_drop)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        for ws in list(self.sockets.values()):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _spend(self):
+        # (allowed, Ratelimit-* headers) for one Helix request
+        if not self.ratelimit:
+            return True, {}
+        now = self.clock()
+        if now >= self._bucket_reset:
+            self._bucket = self.ratelimit
+            self._bucket_reset = now + 60
+        allowed = self._bucket > 0
+        if allowed:
+            self._bucket -= 1
+        else:
+            self._count("ratelimited")
+        return allowed, {
+            "Ratelimit-Limit": str(self.ratelimit),
+            "Ratelimit-Remaining": str(self._bucket),
+            "Ratelimit-Reset": str(int(self._bucket_reset))
+        }
+
+    def user_id(self, login):
+        login = login.lower()
+        if login not in self.users:
+            self.users[login] = str(next(self._ids))
+        return self.users[login]
+
+    # ---- state changes, usable in-process or through /control ----
+
+    async def go_online(self, login, title="Fake stream", game="Just Chatting"):
+        login = login.lower()
+        user_id = self.user_id(login)
+        stream = {
+            "id": str(next(self._ids)),
+            "user_id": user_id,
+            "user_login": login,
+            "user_name": login,
+            "game_name": game,
+            "type": "live",
+            "title": title,
+            "viewer_count": 0,
+            "started_at": _now(),
+            "thumbnail_url": f"https://static-cdn.jtvnw.net/previews-ttv/live_user_{login}-{{width}}x{{height}}.jpg"
+        }
+        self.streams[login] = stream
+        await self._notify("stream.online", user_id, {
+            "id": stream["id"],
+            "broadcaster_user_id": user_id,
+            "broadcaster_user_login": login,
+            "broadcaster_user_name": login,
+            "type": "live",
+            "started_at": stream["started_at"]
+        })
+        return stream
+
+    async def go_offline(self, login):
+        login = login.lower()
+        user_id = self.user_id(login)
+        self.streams.pop(login, None)
+        await self._notify("stream.offline", user_id, {
+            "broadcaster_user_id": user_id,
+            "broadcaster_user_login": login,
+            "broadcaster_user_name": login
+        })
+
+    async def revoke(self, login, status="authorization_revoked"):
+        # Drops every subscription for the login and tells its transport, like Twitch does
+        user_id = self.user_id(login)
+        for sub_id, sub in list(self.subscriptions.items()):
+            if sub["condition"].get("broadcaster_user_id") != user_id:
+                continue
+            del self.subscriptions[sub_id]
+            sub = {**sub, "status": status}
+            transport = sub["transport"]
+            if transport["method"] == "websocket":
+                ws = self.sockets.get(transport["session_id"])
+                if ws is not None and not ws.closed:
+                    await ws.send_json(_message("revocation", {"subscription": sub}, sub))
+            else:
+                await self._post_webhook(sub, "revocation", {"subscription": sub})
+
+    async def _notify(self, sub_type, user_id, event):
+        for sub in list(self.subscriptions.values()):
+            if sub["type"] != sub_type or sub["condition"].get("broadcaster_user_id") != user_id:
+                continue
+            transport = sub["transport"]
+            if transport["method"] == "websocket":
+                ws = self.sockets.get(transport["session_id"])
+                if ws is not None and not ws.closed:
+                    await ws.send_json(_message("notification", {"subscription": sub, "event": event}, sub))
+            else:
+                await self._post_webhook(sub, "notification", {"subscription": sub, "event": event})
+
+    async def _post_webhook(self, sub, message_type, payload):
+        body = json.dumps(payload).encode()
+        message_id = str(uuid.uuid4())
+        timestamp = _now()
+        signature = "sha256=" + hmac.new(
+            sub["transport"]["secret"].encode(), message_id.encode() + timestamp.encode() + body, hashlib.sha256
+        ).hexdigest()
+        headers = {
+            "Content-Type": "application/json",
+            "Twitch-Eventsub-Message-Id": message_id,
+            "Twitch-Eventsub-Message-Timestamp": timestamp,
+            "Twitch-Eventsub-Message-Signature": signature,
+            "Twitch-Eventsub-Message-Type": message_type
+        }
+        async with aiohttp.ClientSession() as session:
+            async with session.post(sub["transport"]["callback"], data=body, headers=headers) as resp:
+                return resp.status, await resp.text()
+
+    # ---- Twitch API stand-ins ----
+
+    async def token(self, request):
+        self._count("token")
+        return web.json_response({"access_token": uuid.uuid4().hex, "expires_in": 5000000, "token_type": "bearer"})
+
+    async def get_users(self, request):
+        self._count("users")
+        allowed, headers = self._spend()
+        if not allowed:
+            return web.json_response({"error": "Too Many Requests"}, status=429, headers=headers)
+        logins = request.query.getall("login", [])
+        data = [{"id": self.user_id(l), "login": l.lower(), "display_name": l} for l in logins]
+        return web.json_response({"data": data}, headers=headers)
+
+    async def get_streams(self, request):
+        self._count("streams")
+        allowed, headers = self._spend()
+        if not allowed:
+            return web.json_response({"error": "Too Many Requests"}, status=429, headers=headers)
+        logins = [l.lower() for l in request.query.getall("user_login", [])]
+        data = [self.streams[l] for l in logins if l in self.streams]
+        return web.json_response({"data": data, "pagination": {}}, headers=headers)
+
+    async def create_subscription(self, request):
+        self._count("eventsub")
+        body = await request.json()
+        transport = body["transport"]
+        for sub in self.subscriptions.values():
+            if sub["type"] == body["type"] and sub["condition"] == body["condition"] \
+                    and sub["transport"].get("callback") == transport.get("callback") \
+                    and sub["transport"].get("session_id") == transport.get("session_id"):
+                return web.json_response({"error": "Conflict", "status": 409}, status=409)
+        if transport["method"] == "websocket" and transport.get("session_id") not in self.sockets:
+            return web.json_response({"error": "Bad Request", "status": 400}, status=400)
+
+        sub = {
+            "id": str(uuid.uuid4()),
+            "status": "enabled",
+            "type": body["type"],
+            "version": body["version"],
+            "condition": body["condition"],
+            "transport": transport,
+            "created_at": _now(),
+            "cost": 0
+        }
+        if transport["method"] == "webhook":
+            sub["status"] = "webhook_callback_verification_pending"
+            self.subscriptions[sub["id"]] = sub
+            asyncio.create_task(self._verify_webhook(sub))
+        else:
+            self.subscriptions[sub["id"]] = sub
+        return web.json_response({"data": [sub], "total": len(self.subscriptions)}, status=202)
+
+    async def _verify_webhook(self, sub):
+        challenge = uuid.uuid4().hex
+        try:
+            status, text = await self._post_webhook(sub, "webhook_callback_verification", {
+                "challenge": challenge, "subscription": sub
+            })
+        except aiohttp.ClientError:
+            status, text = 0, ""
+        if status == 200 and text == challenge:
+            sub["status"] = "enabled"
+        else:
+            sub["status"] = "webhook_callback_verification_failed"
+
+    async def list_subscriptions(self, request):
+        return web.json_response({"data": list(self.subscriptions.values()), "total": len(self.subscriptions)})
+
+    async def delete_subscription(self, request):
+        self.subscriptions.pop(request.query.get("id"), None)
+        return web.Response(status=204)
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        session_id = request.query.get("session") or str(uuid.uuid4())
+        resumed = session_id in self.sockets
+        self.sockets[session_id] = ws
+        await ws.send_json(_message("session_welcome", {"session": {
+            "id": session_id,
+            "status": "connected",
+            "keepalive_timeout_seconds": None if resumed else self.keepalive,
+            "reconnect_url": None,
+            "connected_at": _now()
+        }}))
+        try:
+            while not ws.closed:
+                try:
+                    msg = await ws.receive(timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    await ws.send_json(_message("session_keepalive", {}))
+                    continue
+                if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+        finally:
+            if self.sockets.get(session_id) is ws:
+                del self.sockets[session_id]
+                # Subscriptions die with their session unless it was handed over
+                for sub_id in [k for k, s in self.subscriptions.items()
+                               if s["transport"].get("session_id") == session_id]:
+                    del self.subscriptions[sub_id]
+        return ws
+
+    # ---- control endpoints ----
+
+    async def control_online(self, request):
+        stream = await self.go_online(
+            request.query["login"], request.query.get("title", "Fake stream"), request.query.get("game", "Just Chatting")
+        )
+        return web.json_response(stream)
+
+    async def control_offline(self, request):
+        await self.go_offline(request.query["login"])
+        return web.Response(status=204)
+
+    async def control_revoke(self, request):
+        await self.revoke(request.query["login"], request.query.get("status", "authorization_revoked"))
+        return web.Response(status=204)
+
+    async def control_reconnect(self, request):
+        for session_id, ws in list(self.sockets.items()):
+            await ws.send_json(_message("session_reconnect", {"session": {
+                "id": session_id,
+                "status": "reconnecting",
+                "reconnect_url": f"ws://{self.host}:{self.port}/ws?session={session_id}",
+                "connected_at": _now()
+            }}))
+        return web.Response(status=204)
+
+    async def control_drop(self, request):
+        for session_id in list(self.sockets):
+            ws = self.sockets.pop(session_id)
+            await ws.close()
+            for sub_id in [k for k, s in self.subscriptions.items()
+                           if s["transport"].get("session_id") == session_id]:
+                del self.subscriptions[sub_id]
+        return web.Response(status=204)
+
+
+async def _serve(host, port, keepalive):
+    fake = FakeTwitch(host, port, keepalive)
+    await fake.start()
+    print(f"Fake Twitch/EventSub server running on {fake.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for Twitch Helix and EventSub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--keepalive", type=int, default=10)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.keepalive))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+import discord
+
+
+@dataclass(frozen=True)
+class Target:
+    channel_id: int
+    mention: str = "@everyone"
+    role_id: int = None
+
+    def mention_text(self):
+        if self.role_id:
+            return f"<@&{self.role_id}>"
+        return self.mention or ""
+
+    @property
+    def key(self):
+        # Identifies this target's announcement; one channel can hold several (one per role)
+        return f"{self.channel_id}:{self.mention_text()}"
+
+
+def key_channel(key):
+    # The Discord channel id in a Target.key
+    return int(str(key).split(":", 1)[0])
+
+
+def load_subscriptions(path, default_logins=(), default_channel_id=0):
+    # {login: [Target, ...]} from a JSON file shaped like
+    #   {"somestreamer": [{"channel_id": 123}, {"channel_id": 456, "role_id": 789}]}
+    # Logins without an entry go to the default channel with an @everyone ping.
+    subscriptions = {}
+    path = Path(path) if path else None
+    if path and path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        for login, targets in data.items():
+            subscriptions[login.lower()] = [
+                Target(
+                    channel_id=int(t["channel_id"]),
+                    mention=t.get("mention", "@everyone"),
+                    role_id=int(t["role_id"]) if t.get("role_id") else None
+                )
+                for t in targets
+            ]
+    if default_channel_id:
+        for login in default_logins:
+            subscriptions.setdefault(login.lower(), [Target(default_channel_id)])
+    return subscriptions
+
+
+class _GlobalLimiter:
+    # Discord's global limit is 50 requests/s per bot; stay a little under it
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+
+@dataclass
+class FanoutResult:
+    sent: dict
+    failed: dict
+
+    def summary(self):
+        total = len(self.sent) + len(self.failed)
+        text = f"{len(self.sent)}/{total} target(s)"
+        if self.failed:
+            text += "; failed: " + ", ".join(
+                f"{key} ({type(err).__name__}: {err})" for key, err in self.failed.items()
+            )
+        return text
+
+
+class FanoutDispatcher:
+    # Sends one request per target. Message create/edit routes are bucketed per channel, so
+    # targets in distinct channels never wait on each other's bucket and run in parallel on a
+    # bounded worker pool, paced only by the global limit.
+
+    def __init__(self, client, *, workers=8, global_rate=45, max_retries=3):
+        self.client = client
+        self.workers = workers
+        self.max_retries = max_retries
+        self._limiter = _GlobalLimiter(global_rate)
+
+    def channel(self, channel_id):
+        return self.client.get_channel(channel_id) or self.client.get_partial_messageable(channel_id)
+
+    async def _run_job(self, channel_id, job):
+        for attempt in range(self.max_retries + 1):
+            await self._limiter.wait()
+            try:
+                return await job(self.channel(channel_id))
+            except (discord.Forbidden, discord.NotFound):
+                raise
+            except discord.HTTPException as e:
+                # discord.py already retries short 429s itself; this covers what it gave up on and 5xx
+                if attempt == self.max_retries or (e.status != 429 and e.status < 500):
+                    raise
+                retry_after = getattr(e, "retry_after", None) or 0
+                await asyncio.sleep(max(retry_after, 2 ** attempt) + random.uniform(0, 1))
+
+    async def dispatch(self, jobs):
+        # jobs: {key: (channel_id, async callable(channel) -> result)}; results come back per key
+        pending = asyncio.Queue()
+        for key, (channel_id, job) in jobs.items():
+            pending.put_nowait((key, channel_id, job))
+        result = FanoutResult({}, {})
+
+        async def worker():
+            while True:
+                try:
+                    key, channel_id, job = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result.sent[key] = await self._run_job(channel_id, job)
+                except Exception as e:
+                    result.failed[key] = e
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(jobs)))))
+        return result
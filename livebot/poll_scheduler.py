@@ -0,0 +1,85 @@
+import heapq
+import math
+import time
+from twitch_client import HELIX_MAX_LOGINS
+
+WEEK = 7 * 86400
+
+
+class PollScheduler:
+    # Decides which channels to poll on each tick.
+    #
+    # Every channel has its own next-due time: live channels and channels that usually
+    # go live around now are polled often, dormant ones rarely. Each tick only spends
+    # a share of the remaining Twitch rate-limit budget, spread over the time left until
+    # the bucket resets, so a burst of due channels can't drain it.
+
+    def __init__(self, *, tick=5, live_interval=60, hot_interval=30, idle_interval=120,
+                 hot_window=1800, reserve=80, clock=time.time):
+        self.tick = tick
+        self.live_interval = live_interval
+        self.hot_interval = hot_interval
+        self.idle_interval = idle_interval
+        self.hot_window = hot_window
+        self.reserve = reserve
+        self.clock = clock
+        self._heap = []
+        self._due = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def add(self, login, due=None):
+        due = self.clock() if due is None else due
+        self._due[login] = due
+        heapq.heappush(self._heap, (due, login))
+
+    def remove(self, login):
+        # The heap entry is dropped lazily when it surfaces
+        self._due.pop(login, None)
+
+    def is_hot(self, channel, now):
+        # Within hot_window of a time-of-week this channel has gone live before
+        now_in_week = now % WEEK
+        for started in channel.golive_history:
+            distance = abs(now_in_week - started % WEEK)
+            if min(distance, WEEK - distance) <= self.hot_window:
+                return True
+        return False
+
+    def interval_for(self, channel, now):
+        if channel.live:
+            return self.live_interval
+        if self.is_hot(channel, now):
+            return self.hot_interval
+        return self.idle_interval
+
+    def reschedule(self, channel, now=None):
+        now = self.clock() if now is None else now
+        self.add(channel.login, now + self.interval_for(channel, now))
+
+    def batch_budget(self, remaining, reset, now=None):
+        # Helix requests this tick may spend; None means the budget is unknown
+        if remaining is None or reset is None:
+            return None
+        now = self.clock() if now is None else now
+        spendable = remaining - self.reserve
+        if spendable <= 0:
+            return 0
+        ticks_left = max(1.0, (reset - now) / self.tick)
+        return max(1, math.floor(spendable / ticks_left))
+
+    def pop_due(self, max_requests=None, now=None):
+        # Earliest-due logins first, up to max_requests Helix batches worth
+        now = self.clock() if now is None else now
+        limit = None if max_requests is None else max_requests * HELIX_MAX_LOGINS
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            when, login = heapq.heappop(self._heap)
+            if self._due.get(login) != when:
+                continue
+            del self._due[login]
+            due.append(login)
+        return due
@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+from fanout import Target
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    login TEXT PRIMARY KEY,
+    user_id TEXT,
+    live INTEGER NOT NULL DEFAULT 0,
+    stream_id TEXT,
+    started_at TEXT,
+    messages TEXT NOT NULL DEFAULT '{}',
+    failed_targets TEXT NOT NULL DEFAULT '[]',
+    golive_history TEXT NOT NULL DEFAULT '[]',
+    rendered TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS announced (
+    stream_id TEXT PRIMARY KEY,
+    login TEXT NOT NULL,
+    announced_at REAL NOT NULL
+);
+"""
+
+# Announcement dedup rows older than this are pruned at startup
+ANNOUNCED_RETENTION = 30 * 86400
+
+
+class LiveStateStore:
+    # Durable per-channel live state, so a restart mid-stream neither re-announces
+    # nor misses the end of a stream. Writes only happen on state transitions.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self._db.execute(
+            "DELETE FROM announced WHERE announced_at < ?", (time.time() - ANNOUNCED_RETENTION,)
+        )
+
+    def _migrate(self):
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(channels)")}
+        if "rendered" not in columns:
+            self._db.execute("ALTER TABLE channels ADD COLUMN rendered TEXT")
+        if "messages" not in columns:
+            # Single-channel message ids can't be mapped to a target; those streams end with a new message
+            self._db.execute("ALTER TABLE channels ADD COLUMN messages TEXT NOT NULL DEFAULT '{}'")
+        if "failed_targets" not in columns:
+            self._db.execute("ALTER TABLE channels ADD COLUMN failed_targets TEXT NOT NULL DEFAULT '[]'")
+
+    def close(self):
+        self._db.close()
+
+    def load_into(self, channels):
+        # Restore state for channels that are still configured; returns how many were restored
+        restored = 0
+        rows = self._db.execute(
+            "SELECT login, user_id, live, stream_id, started_at, messages, failed_targets, golive_history, rendered "
+            "FROM channels"
+        )
+        for login, user_id, live, stream_id, started_at, messages, failed, history, rendered in rows:
+            channel = channels.get(login)
+            if not channel:
+                continue
+            channel.user_id = user_id
+            channel.live = bool(live)
+            channel.stream_id = stream_id
+            channel.started_at = started_at
+            channel.messages = {
+                # Saved before targets had keys: a bare channel id is that channel's default target
+                (k if ":" in k else Target(int(k)).key): v for k, v in json.loads(messages).items()
+            }
+            channel.failed_targets = set(json.loads(failed))
+            channel.golive_history.extend(json.loads(history))
+            channel.rendered = json.loads(rendered) if rendered else None
+            restored += 1
+        return restored
+
+    def save_channels(self, channels):
+        now = time.time()
+        rows = [
+            (c.login, c.user_id, int(c.live), c.stream_id, c.started_at, json.dumps(c.messages),
+             json.dumps(sorted(c.failed_targets)), json.dumps(list(c.golive_history)),
+             json.dumps(c.rendered) if c.rendered else None, now)
+            for c in channels
+        ]
+        if not rows:
+            return
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO channels (login, user_id, live, stream_id, started_at, messages, failed_targets, "
+                "golive_history, rendered, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(login) DO UPDATE SET user_id=excluded.user_id, live=excluded.live, "
+                "stream_id=excluded.stream_id, started_at=excluded.started_at, messages=excluded.messages, "
+                "failed_targets=excluded.failed_targets, "
+                "golive_history=excluded.golive_history, rendered=excluded.rendered, updated_at=excluded.updated_at",
+                rows
+            )
+
+    def was_announced(self, stream_id):
+        row = self._db.execute("SELECT 1 FROM announced WHERE stream_id = ?", (stream_id,)).fetchone()
+        return row is not None
+
+    def mark_announced(self, stream_id, login):
+        self._db.execute(
+            "INSERT OR REPLACE INTO announced (stream_id, login, announced_at) VALUES (?, ?, ?)",
+            (stream_id, login, time.time())
+        )
@@ -0,0 +1,331 @@
+import array
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    stream_id TEXT PRIMARY KEY,
+    login TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    ended INTEGER NOT NULL DEFAULT 0,
+    peak_viewers INTEGER NOT NULL DEFAULT 0,
+    peak_at REAL,
+    viewer_sum INTEGER NOT NULL DEFAULT 0,
+    samples INTEGER NOT NULL DEFAULT 0,
+    game TEXT,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_login ON sessions (login, started_at);
+CREATE TABLE IF NOT EXISTS segments (
+    stream_id TEXT NOT NULL,
+    login TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    resolution INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_stream ON segments (stream_id, start_ts);
+CREATE INDEX IF NOT EXISTS segments_age ON segments (resolution, end_ts);
+CREATE TABLE IF NOT EXISTS changes (
+    stream_id TEXT NOT NULL,
+    login TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    game TEXT,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_login ON changes (login, ts);
+"""
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def _deltas(values, base=0):
+    out = []
+    previous = base
+    for value in values:
+        out.append(value - previous)
+        previous = value
+    return out
+
+
+def _undelta(deltas, base=0):
+    out = []
+    value = base
+    for delta in deltas:
+        value += delta
+        out.append(value)
+    return out
+
+
+def encode_segment(start_ts, times, viewers):
+    # Both columns delta-encoded as int32 and zlib-compressed: poll gaps repeat and viewer counts
+    # move slowly, so a day of one-minute samples packs into a few hundred bytes
+    values = array.array("i", _deltas(times, start_ts) + _deltas(viewers))
+    return zlib.compress(values.tobytes(), 6)
+
+
+def decode_segment(start_ts, count, data):
+    values = array.array("i")
+    values.frombytes(zlib.decompress(data))
+    return _undelta(values[:count], start_ts), _undelta(values[count:])
+
+
+def downsample(times, viewers, resolution):
+    # Mean viewers per `resolution`-second bucket, stamped with the bucket start
+    buckets = {}
+    for ts, count in zip(times, viewers):
+        total, n = buckets.get(ts - ts % resolution, (0, 0))
+        buckets[ts - ts % resolution] = (total + count, n + 1)
+    bucket_ts = sorted(buckets)
+    return bucket_ts, [round(buckets[ts][0] / buckets[ts][1]) for ts in bucket_ts]
+
+
+def parse_started_at(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class OpenStream:
+    # A stream being recorded: running totals plus the samples not yet written as a segment
+    stream_id: str
+    login: str
+    started_at: float
+    last_seen: float
+    peak: int = 0
+    peak_at: float = None
+    viewer_sum: int = 0
+    samples: int = 0
+    game: str = None
+    title: str = None
+    times: array.array = field(default_factory=lambda: array.array("q"), repr=False)
+    viewers: array.array = field(default_factory=lambda: array.array("q"), repr=False)
+
+
+class StreamHistory:
+    # Viewer count, game and title of every live stream, sampled on each poll. Per-stream
+    # totals (peak, average, duration) are kept in one row per stream, so stats over months
+    # only read those rows. The samples themselves go into compressed segments; segments
+    # older than raw_days are re-encoded at `resolution` seconds, and dropped after
+    # retention_days. Game/title are only stored when they change.
+    #
+    # Totals are written on every poll; samples are written once segment_samples have
+    # accumulated or the stream ends, so a crash loses at most one segment of the chart.
+    # Recording and queries run on the event loop (they touch a handful of rows); compact()
+    # is the one heavy call and goes to a worker thread.
+
+    def __init__(self, path, *, segment_samples=240, raw_days=14, resolution=300, retention_days=400):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.segment_samples = segment_samples
+        self.raw_days = raw_days
+        self.resolution = resolution
+        self.retention_days = retention_days
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+        self._open = {}
+
+    def _migrate(self):
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "peak_at" not in columns:
+            # Streams recorded before this have no peak time; stats() falls back to their start
+            self._db.execute("ALTER TABLE sessions ADD COLUMN peak_at REAL")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def record(self, live_streams, now=None):
+        # live_streams: {login: Helix stream}; one transaction per poll
+        now = int(time.time() if now is None else now)
+        sessions = []
+        segments = []
+        changes = []
+        for login, stream in live_streams.items():
+            if stream.get("viewer_count") is None:
+                continue
+            current = self._stream_for(login, stream, now, segments)
+            viewers = int(stream["viewer_count"])
+            current.last_seen = now
+            if viewers > current.peak or not current.samples:
+                current.peak, current.peak_at = viewers, now
+            current.viewer_sum += viewers
+            current.samples += 1
+            current.times.append(now)
+            current.viewers.append(viewers)
+            game, title = stream.get("game_name"), stream.get("title")
+            if (game, title) != (current.game, current.title):
+                current.game, current.title = game, title
+                changes.append((current.stream_id, login, now, game, title))
+            if len(current.times) >= self.segment_samples:
+                segments.append(self._take_segment(current))
+            sessions.append(current)
+        self._write(sessions, segments, changes)
+
+    def end(self, login):
+        current = self._open.pop(login, None)
+        if current is None:
+            return
+        segments = [self._take_segment(current)] if current.times else []
+        self._write([current], segments, [], ended=[current.stream_id])
+
+    def flush(self):
+        # Writes every open stream's buffered samples (shutdown); the streams stay open
+        segments = [self._take_segment(s) for s in self._open.values() if s.times]
+        self._write(list(self._open.values()), segments, [])
+
+    def _stream_for(self, login, stream, now, segments):
+        stream_id = stream.get("id") or f"{login}-{stream.get('started_at') or now}"
+        current = self._open.get(login)
+        if current and current.stream_id == stream_id:
+            return current
+        if current:
+            # A new stream id without an offline poll in between: the old one is over
+            if current.times:
+                segments.append(self._take_segment(current))
+            self._write([current], [], [], ended=[current.stream_id])
+        with self._lock:
+            row = self._db.execute(
+                "SELECT started_at, last_seen, peak_viewers, peak_at, viewer_sum, samples, game, title "
+                "FROM sessions WHERE stream_id = ?", (stream_id,)
+            ).fetchone()
+        if row:
+            # Restarted mid-stream: carry on with the stored totals
+            current = OpenStream(stream_id, login, *row)
+        else:
+            started = parse_started_at(stream.get("started_at")) or now
+            current = OpenStream(stream_id, login, started, now)
+        self._open[login] = current
+        return current
+
+    def _take_segment(self, current):
+        times, viewers = current.times.tolist(), current.viewers.tolist()
+        del current.times[:]
+        del current.viewers[:]
+        return (current.stream_id, current.login, times[0], times[-1], 0, len(times),
+                encode_segment(times[0], times, viewers))
+
+    def _write(self, sessions, segments, changes, ended=()):
+        if not (sessions or segments or changes or ended):
+            return
+        rows = [
+            (s.stream_id, s.login, s.started_at, s.last_seen, s.peak, s.peak_at, s.viewer_sum, s.samples,
+             s.game, s.title)
+            for s in sessions
+        ]
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO sessions (stream_id, login, started_at, last_seen, peak_viewers, peak_at, viewer_sum, "
+                "samples, game, title) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(stream_id) DO UPDATE SET last_seen=excluded.last_seen, "
+                "peak_viewers=excluded.peak_viewers, peak_at=excluded.peak_at, viewer_sum=excluded.viewer_sum, samples=excluded.samples, "
+                "game=excluded.game, title=excluded.title, ended=0",
+                rows
+            )
+            self._db.executemany(
+                "INSERT INTO segments (stream_id, login, start_ts, end_ts, resolution, count, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", segments
+            )
+            self._db.executemany("INSERT INTO changes (stream_id, login, ts, game, title) VALUES (?, ?, ?, ?, ?)", changes)
+            self._db.executemany("UPDATE sessions SET ended = 1 WHERE stream_id = ?", [(s,) for s in ended])
+
+    def compact(self, now=None):
+        # Downsamples raw segments older than raw_days and drops samples past retention_days.
+        # Returns (downsampled, dropped) segment counts. Safe to run from a worker thread.
+        now = time.time() if now is None else now
+        with self._lock:
+            old = self._db.execute(
+                "SELECT rowid, stream_id, login, start_ts, count, data FROM segments "
+                "WHERE resolution = 0 AND end_ts < ?", (now - self.raw_days * 86400,)
+            ).fetchall()
+        rewritten = []
+        for rowid, stream_id, login, start_ts, count, data in old:
+            times, viewers = downsample(*decode_segment(start_ts, count, data), self.resolution)
+            rewritten.append((rowid, (stream_id, login, times[0], times[-1], self.resolution, len(times),
+                                      encode_segment(times[0], times, viewers))))
+        cutoff = now - self.retention_days * 86400
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM segments WHERE rowid = ?", [(rowid,) for rowid, _ in rewritten])
+            self._db.executemany(
+                "INSERT INTO segments (stream_id, login, start_ts, end_ts, resolution, count, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", [segment for _, segment in rewritten]
+            )
+            dropped = self._db.execute("DELETE FROM segments WHERE end_ts < ?", (cutoff,)).rowcount
+            self._db.execute("DELETE FROM changes WHERE ts < ?", (cutoff,))
+        return len(rewritten), dropped
+
+    def series(self, stream_id):
+        # [(ts, viewers)] for one stream, including samples not written yet
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start_ts, count, data FROM segments WHERE stream_id = ? ORDER BY start_ts", (stream_id,)
+            ).fetchall()
+        points = []
+        for start_ts, count, data in rows:
+            points += zip(*decode_segment(start_ts, count, data))
+        for current in self._open.values():
+            if current.stream_id == stream_id:
+                points += zip(current.times.tolist(), current.viewers.tolist())
+        return points
+
+    def stats(self, login, since, tz):
+        # Aggregates for /streamstats over streams that started after `since`; None without any.
+        # Go-live times are bucketed in `tz` (a tzinfo).
+        login = login.lower()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stream_id, started_at, last_seen, peak_viewers, viewer_sum, samples, peak_at FROM sessions "
+                "WHERE login = ? AND started_at >= ? ORDER BY started_at", (login, since)
+            ).fetchall()
+            changes = self._db.execute(
+                "SELECT stream_id, ts, game FROM changes WHERE login = ? AND ts >= ? ORDER BY ts", (login, since)
+            ).fetchall()
+        if not rows:
+            return None
+
+        durations = [max(0.0, last_seen - started) for _, started, last_seen, *_ in rows]
+        peak_row = max(rows, key=lambda r: r[3])
+        samples = sum(r[5] for r in rows)
+        starts = [datetime.fromtimestamp(r[1], tz) for r in rows]
+        slots = Counter((d.weekday(), d.hour) for d in starts)
+
+        # Airtime per game: each game runs from its change until the next change or the stream's end
+        last_seen = {r[0]: r[2] for r in rows}
+        games = Counter()
+        for i, (stream_id, ts, game) in enumerate(changes):
+            following = changes[i + 1] if i + 1 < len(changes) else None
+            end = following[1] if following and following[0] == stream_id else last_seen.get(stream_id, ts)
+            games[game or "Unknown"] += max(0, end - ts)
+
+        latest = rows[-1]
+        return {
+            "streams": len(rows),
+            "hours": sum(durations) / 3600,
+            "avg_duration": sum(durations) / len(durations),
+            "longest": max(durations),
+            "peak": peak_row[3],
+            "peak_at": peak_row[6] or peak_row[1],
+            "avg_viewers": sum(r[4] for r in rows) / samples if samples else 0,
+            "by_weekday": Counter(d.weekday() for d in starts),
+            "by_hour": Counter(d.hour for d in starts),
+            "usual_slots": slots.most_common(3),
+            "games": games.most_common(3),
+            "latest": latest[0],
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import time
+import aiohttp
+import metrics
+
+TWITCH_TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+TWITCH_HELIX_URL = "https://api.twitch.tv/helix"
+HELIX_MAX_LOGINS = 100
+# Longest we are willing to sleep on a 429 before giving up on the request
+MAX_RATELIMIT_WAIT = 60
+# Tries per Helix call, across token refreshes and rate-limit waits
+HELIX_ATTEMPTS = 3
+
+HELIX_SECONDS = metrics.histogram("twitch_helix_request_seconds", "Twitch Helix calls", ["endpoint", "status"])
+RATELIMIT_REMAINING = metrics.gauge("twitch_ratelimit_remaining", "Helix rate-limit points left in the bucket")
+RATELIMIT_LIMIT = metrics.gauge("twitch_ratelimit_limit", "Helix rate-limit bucket size")
+
+
+class TwitchClient:
+    # One shared keep-alive session for every Helix call. The app access token is
+    # cached with its expiry and refreshed ahead of time instead of waiting for a 401.
+
+    def __init__(self, client_id, client_secret, *, timeout=10, pool_size=10, batch_concurrency=4,
+                 refresh_margin=300, helix_url=TWITCH_HELIX_URL, token_url=TWITCH_TOKEN_URL, clock=time.time):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+        self.batch_concurrency = batch_concurrency
+        self.refresh_margin = refresh_margin
+        self.helix_url = helix_url.rstrip("/")
+        self.token_url = token_url
+        # Wall clock for Ratelimit-Reset, which is a unix timestamp
+        self.clock = clock
+
+        self._session = None
+        self._owns_session = False
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+
+        # Last Ratelimit-* headers seen on an app-token request (None until the first call)
+        self.ratelimit_limit = None
+        self.ratelimit_remaining = None
+        self.ratelimit_reset = None
+
+    async def start(self, session=None):
+        # A session passed in (shared with the Discord client in host/app.py) is used as is and
+        # left for its owner to close
+        if session is not None and not session.closed:
+            self._session = session
+            self._owns_session = False
+            return
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._owns_session = True
+
+    async def close(self):
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _fetch_token(self):
+        params = {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "grant_type": "client_credentials"
+        }
+        async with self._session.post(self.token_url, params=params, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+
+        self._token = data["access_token"]
+        # Twitch returns expires_in in seconds; never trust a value shorter than the margin
+        expires_in = max(int(data.get("expires_in", 0)), self.refresh_margin)
+        self._token_expires_at = time.monotonic() + expires_in
+        print(f"Fetched Twitch app token (expires in {expires_in}s)")
+
+    async def get_token(self, stale_token=None):
+        async with self._token_lock:
+            # If another task already replaced the token that got rejected, reuse the new one
+            if stale_token is not None and self._token != stale_token:
+                return self._token
+            expiring = time.monotonic() >= self._token_expires_at - self.refresh_margin
+            if not self._token or expiring or stale_token is not None:
+                await self._fetch_token()
+            return self._token
+
+    @property
+    def session(self):
+        return self._session
+
+    async def helix_request(self, method, path, params=None, json=None, token=None):
+        # Pass token= to call with a user access token instead of the cached app token
+        if self._session is None:
+            await self.start()
+
+        url = f"{self.helix_url}/{path.lstrip('/')}"
+        user_token = token is not None
+        if not user_token:
+            token = await self.get_token()
+        refreshed = False
+        for attempt in range(HELIX_ATTEMPTS):
+            # The last attempt never retries, so the loop always returns or raises
+            retry_left = attempt < HELIX_ATTEMPTS - 1
+            headers = {
+                "Client-ID": self.client_id,
+                "Authorization": f"Bearer {token}"
+            }
+            started = time.perf_counter()
+            async with self._session.request(
+                method, url, params=params, json=json, headers=headers, timeout=self.timeout
+            ) as resp:
+                HELIX_SECONDS.observe(time.perf_counter() - started, endpoint=path.strip("/"), status=resp.status)
+                if not user_token:
+                    self._record_ratelimit(resp.headers)
+                if resp.status == 401 and not refreshed and not user_token and retry_left:
+                    # Token revoked or expired early
+                    refreshed = True
+                    token = await self.get_token(stale_token=token)
+                    continue
+                if resp.status == 429 and retry_left:
+                    wait = self._ratelimit_wait(resp.headers)
+                    if wait is not None:
+                        print(f"Twitch rate limit hit, retrying in {wait:.1f}s")
+                        await asyncio.sleep(wait)
+                        continue
+                resp.raise_for_status()
+                if resp.status == 204:
+                    return {}
+                return await resp.json()
+
+    def _record_ratelimit(self, headers):
+        try:
+            if "Ratelimit-Remaining" in headers:
+                self.ratelimit_limit = int(headers.get("Ratelimit-Limit", 0)) or self.ratelimit_limit
+                self.ratelimit_remaining = int(headers["Ratelimit-Remaining"])
+                self.ratelimit_reset = float(headers.get("Ratelimit-Reset", 0))
+                RATELIMIT_REMAINING.set(self.ratelimit_remaining)
+                if self.ratelimit_limit:
+                    RATELIMIT_LIMIT.set(self.ratelimit_limit)
+        except ValueError:
+            pass
+
+    def _ratelimit_wait(self, headers):
+        try:
+            reset = float(headers.get("Ratelimit-Reset", 0))
+        except ValueError:
+            return None
+        wait = max(0.5, reset - self.clock())
+        return wait if wait <= MAX_RATELIMIT_WAIT else None
+
+    async def helix_get(self, path, params=None):
+        return await self.helix_request("GET", path, params=params)
+
+    async def get_stream(self, login):
+        data = await self.helix_get("streams", params={"user_login": login})
+        streams = data.get("data", [])
+        return streams[0] if streams else None
+
+    async def get_users(self, logins):
+        # Returns {login: user_id}, resolving up to 100 logins per request
+        logins = list(dict.fromkeys(login.lower() for login in logins))
+        users = {}
+        for i in range(0, len(logins), HELIX_MAX_LOGINS):
+            params = [("login", login) for login in logins[i:i + HELIX_MAX_LOGINS]]
+            data = await self.helix_get("users", params=params)
+            for user in data.get("data", []):
+                users[user["login"].lower()] = user["id"]
+        return users
+
+    async def _get_streams_batch(self, logins, semaphore):
+        streams = []
+        cursor = None
+        async with semaphore:
+            while True:
+                params = [("user_login", login) for login in logins]
+                params.append(("first", str(HELIX_MAX_LOGINS)))
+                if cursor:
+                    params.append(("after", cursor))
+                data = await self.helix_get("streams", params=params)
+                streams.extend(data.get("data", []))
+                cursor = data.get("pagination", {}).get("cursor")
+                if not cursor or not data.get("data"):
+                    return streams
+
+    async def get_streams(self, logins):
+        # Returns {login: stream} for every login that is currently live.
+        # Logins are sent 100 per request, with a bounded number of requests in flight.
+        logins = list(dict.fromkeys(login.lower() for login in logins))
+        batches = [logins[i:i + HELIX_MAX_LOGINS] for i in range(0, len(logins), HELIX_MAX_LOGINS)]
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        results = await asyncio.gather(*(self._get_streams_batch(b, semaphore) for b in batches))
+
+        live = {}
+        for streams in results:
+            for stream in streams:
+                if stream.get("type", "live") == "live":
+                    live[stream["user_login"].lower()] = stream
+        return live
@@ -1,5 +1,7 @@
 import os
-import json
+import sys
+import asyncio
+import io
 import time
 import re
 from datetime import datetime
@@ -9,10 +11,35 @@ from discord.ext import tasks
 from dotenv import load_dotenv
 from pathlib import Path
 
+# metrics.py, hosting.py and command_sync.py are shared with livebot; the Docker image copies them next to this file
+sys.path.append(str(Path(__file__).resolve().parent.parent / "shared"))
+
+import hosting
+import metrics
+from scheduler import CATCHUP_POLICIES, ReminderScheduler, collect_due, mark_handled
+from storage import open_store
+from persistence import WriteBehindPersister
+from bulk_roles import BulkRoleAssigner, resolve_members
+from jobs import JobRunner, JobStore
+from delivery import DeliveryQueue, DeliveryStore
+from leader import LeaderElector, LeaseStore
+from guilds import GuildSettings, ReminderIndex
+from pages import ReminderPageCache, paginate, send_pages
+from member_cache import RoleMemberCache, cache_report, client_options, rss_mb
+from command_sync import sync_commands
+from schedules import compile_schedule, get_zone, legacy_schedule, schedule_since_for
+from triggers import TriggerMatcher, load_triggers, save_triggers, MATCH_TYPES
+from transfer import FORMATS, ImportPlan, batched, detect_format, export_rows, read_rows, write_export
+
 load_dotenv()
 
+STARTED_AT = time.monotonic()
+STARTED_RSS = rss_mb()
+
 DISCORD_TOKEN = os.environ.get("DISCORD_TOKEN")
+# Fallback target for reminders created before multi-guild support (and guilds without a default)
 REMINDER_CHANNEL_ID = int(os.environ.get("REMINDER_CHANNEL_ID", "0"))
+# Bot-wide admins; each guild can add its own with /reminderadmins
 REMINDER_ADMIN_IDS = [
     int(x.strip()) for x in os.environ.get("REMINDER_ADMIN_IDS", "").split(",") if x.strip().isdigit()
 ]
@@ -28,6 +55,15 @@ ROLE_ALIASES = {
 }
 REKT_ROLE_ID = 1414914863498788875
 
+# "full" caches and chunks every member at startup; "lean" caches none and looks up holders
+# of the roles above on demand (recommended for very large guilds)
+MEMBER_CACHE = os.environ.get("MEMBER_CACHE", "full").lower()
+# Seconds a looked-up role holder list is reused before it is fetched again (lean mode)
+ROLE_CACHE_TTL = int(os.environ.get("ROLE_CACHE_TTL", "600"))
+
+# Concurrent add_roles calls for /addrole
+ADDROLE_WORKERS = int(os.environ.get("ADDROLE_WORKERS", "4"))
+
 KICKREKT_ALLOWED_IDS = [
     404287153213014038, # Shann
     433607960493555722  # James
@@ -35,6 +71,74 @@ KICKREKT_ALLOWED_IDS = [
 # --------------------------
 
 STATE_FILE = Path("reminder_state.json")
+# "sqlite" (default) or "json"; the SQLite store imports STATE_FILE the first time it starts
+REMINDER_STORE = os.environ.get("REMINDER_STORE", "sqlite").lower()
+REMINDER_DB = Path(os.environ.get("REMINDER_DB", "data/reminder_state.db"))
+# Changes made within this many seconds are coalesced into a single write
+STATE_FLUSH_INTERVAL = float(os.environ.get("STATE_FLUSH_INTERVAL", "2"))
+# Bulk moderation jobs (/kickrekt) and their checkpoints, so a restart resumes them
+JOBS_DB = Path(os.environ.get("JOBS_DB", "data/jobs.db"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+TRIGGERS_FILE = Path(os.environ.get("TRIGGERS_FILE", "data/triggers.json"))
+GUILD_SETTINGS_FILE = Path(os.environ.get("GUILD_SETTINGS_FILE", "data/guilds.json"))
+# Set to 1 to use AutoShardedClient once the bot is in more guilds than one shard allows
+SHARDED = os.environ.get("SHARDED", "0") == "1"
+# IANA timezone for reminders that don't name their own (falls back to the container's TZ)
+REMINDER_TIMEZONE = os.environ.get("REMINDER_TIMEZONE") or os.environ.get("TZ") or "UTC"
+get_zone(REMINDER_TIMEZONE)
+
+# --- DELIVERY ---
+# Reminder posts go through a persisted queue with retries (DELIVERY_DB)
+DELIVERY_DB = Path(os.environ.get("DELIVERY_DB", "data/deliveries.db"))
+DELIVERY_WORKERS = int(os.environ.get("DELIVERY_WORKERS", "3"))
+# Fire times missed by more than CATCHUP_GRACE seconds: "once", "skip" or "all" (up to CATCHUP_MAX)
+CATCHUP_POLICY = os.environ.get("CATCHUP_POLICY", "once").lower()
+CATCHUP_GRACE = int(os.environ.get("CATCHUP_GRACE", "300"))
+CATCHUP_MAX = int(os.environ.get("CATCHUP_MAX", "24"))
+if CATCHUP_POLICY not in CATCHUP_POLICIES:
+    raise SystemExit(f"CATCHUP_POLICY must be one of {', '.join(CATCHUP_POLICIES)}")
+# Seconds before a reminder check that failed (e.g. the delivery database was locked) is retried
+CHECK_RETRY_DELAY = int(os.environ.get("CHECK_RETRY_DELAY", "10"))
+# ----------------
+
+# --- HIGH AVAILABILITY ---
+# Set to true to run several replicas on one shared data directory: they elect a leader via a
+# lease row in DELIVERY_DB, and only the leader runs the reminder checker, sends, answers
+# commands and replies to triggers. A standby takes over within HA_LEASE_TTL + HA_HEARTBEAT
+# seconds of the leader dying, or HA_HEARTBEAT seconds after a clean shutdown.
+HA_MODE = os.environ.get("HA_MODE", "false").lower() == "true"
+HA_LEASE_TTL = float(os.environ.get("HA_LEASE_TTL", "15"))
+HA_HEARTBEAT = float(os.environ.get("HA_HEARTBEAT", "5"))
+# Name this replica shows up as in the lease (defaults to hostname-pid)
+HA_REPLICA_ID = os.environ.get("HA_REPLICA_ID") or None
+# -------------------------
+
+# --- IMPORT/EXPORT ---
+# Largest file /importreminders accepts, and the most rows in one import
+IMPORT_MAX_BYTES = int(os.environ.get("IMPORT_MAX_BYTES", "2000000"))
+IMPORT_MAX_ROWS = int(os.environ.get("IMPORT_MAX_ROWS", "5000"))
+# Rows validated before letting other events run
+IMPORT_BATCH = 200
+# ---------------------
+
+# --- COMMAND SYNC ---
+# "auto" uploads slash commands only when they changed since the last sync, "force" always
+# uploads, "off" never does
+COMMAND_SYNC = os.environ.get("COMMAND_SYNC", "auto").lower()
+COMMAND_SYNC_FILE = Path(os.environ.get("COMMAND_SYNC_FILE", "data/command_sync.json"))
+# Also sync to this guild (instant, unlike global commands) for testing changes
+DEV_GUILD_ID = int(os.environ.get("DEV_GUILD_ID", "0"))
+# --------------------
+
+# --- METRICS ---
+# Prometheus endpoint at http://METRICS_HOST:METRICS_PORT/metrics; 0 turns it off
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+# One JSON line per tick/command/stall on stdout
+METRICS_JSON_LOGS = os.environ.get("METRICS_JSON_LOGS", "false").lower() == "true"
+# Event loop stalls longer than this (seconds) are logged with the blocking line
+LOOP_LAG_THRESHOLD = float(os.environ.get("LOOP_LAG_THRESHOLD", "0.25"))
+# ---------------
 
 DEFAULT_STATE = {
     "reminders": {
@@ -45,6 +149,9 @@ DEFAULT_STATE = {
             "last_sent_date": "",
             "target_time": None,
             "target_day": None,
+            "schedule": "every 3 days",
+            "timezone": None,
+            "schedule_since": 0,
             "message": (
                 "@everyone\n"
                 "📝 Verification Form (Required):\n"
@@ -57,137 +164,194 @@ DEFAULT_STATE = {
     "next_id": 2
 }
 
+store = open_store(REMINDER_STORE, REMINDER_DB, STATE_FILE)
+
 def load_state():
-    if STATE_FILE.exists():
-        try:
-            with STATE_FILE.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-                if "reminders" in data:
-                    for rem_id, rem_data in data["reminders"].items():
-                        if "target_day" not in rem_data:
-                            rem_data["target_day"] = None
-                    return data
-                return DEFAULT_STATE.copy()
-        except Exception:
-            return DEFAULT_STATE.copy()
+    return store.load(DEFAULT_STATE)
+
+def save_state(state, rem_ids=None, deleted=()):
+    # Queues the change; the persister writes it off the event loop within STATE_FLUSH_INTERVAL.
+    # rem_ids: reminders that changed (None = all); deleted: reminders that were removed
+    persister.mark(rem_ids, deleted)
+    if rem_ids is None or deleted:
+        reminder_pages.invalidate()
     else:
-        save_state(DEFAULT_STATE)
-        return DEFAULT_STATE.copy()
+        for rem_id in rem_ids:
+            invalidate_pages(rem_id)
 
-def save_state(state):
-    try:
-        with STATE_FILE.open("w", encoding="utf-8") as f:
-            json.dump(state, f)
-    except Exception as e:
-        print(f"Failed to save state: {e}")
+def invalidate_pages(rem_id):
+    # The cached /listreminders pages of the reminder's guild show its next fire time
+    reminder_pages.invalidate(reminder_index.guild_of(rem_id))
 
 state = load_state()
+persister = WriteBehindPersister(store, state, window=STATE_FLUSH_INTERVAL)
+
+# Set by setup(): the bot reminderBot runs on, standalone or inside host/app.py
+client = None
+role_cache = RoleMemberCache([*ROLE_ALIASES.values(), REKT_ROLE_ID], ttl=ROLE_CACHE_TTL)
+
+guild_settings = GuildSettings(GUILD_SETTINGS_FILE)
+reminder_index = ReminderIndex()
+reminder_index.rebuild(state.get("reminders", {}))
+
+def guild_reminders(guild_id):
+    # {rem_id: rem_data} view of one guild, via the index; the dicts are the live state entries
+    return reminder_index.view(state.get("reminders", {}), guild_id)
+
+def legacy_guild_id():
+    # The guild REMINDER_CHANNEL_ID is in, once the bot can see it
+    channel = client.get_channel(REMINDER_CHANNEL_ID) if client and REMINDER_CHANNEL_ID else None
+    return getattr(getattr(channel, "guild", None), "id", None)
+
+def reminder_channel_id(rem_data):
+    guild_id = rem_data.get("guild_id")
+    channel_id = rem_data.get("channel_id") or guild_settings.reminder_channel(guild_id)
+    if channel_id:
+        return channel_id
+    # The bot-wide channel only serves its own guild (and reminders from before guilds);
+    # anywhere else a reminder without a channel waits until the guild sets one
+    if guild_id is None or guild_id == legacy_guild_id():
+        return REMINDER_CHANNEL_ID
+    return None
+
+async def save_guild_settings():
+    try:
+        await asyncio.to_thread(guild_settings.save, guild_settings.snapshot())
+    except Exception as e:
+        print(f"Failed to save guild settings: {e}")
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True 
-client = discord.Client(intents=intents)
-
-# The Command Tree for Slash Commands
-tree = app_commands.CommandTree(client)
+job_store = JobStore(JOBS_DB)
+delivery_store = DeliveryStore(DELIVERY_DB)
+# In the delivery database, so a send can be fenced on the lease in the same statement
+lease_store = LeaseStore(DELIVERY_DB) if HA_MODE else None
+# Created in setup(), once there is a bot to send through
+delivery_queue = None
+job_runner = None
 
-REMINDER_CHANNEL = None
+scheduler = ReminderScheduler(default_tz=REMINDER_TIMEZONE, on_defer=invalidate_pages)
+scheduler.rebuild(state.get("reminders", {}))
 
-@tasks.loop(minutes=1)
+@tasks.loop()
 async def reminder_checker():
-    if not REMINDER_CHANNEL: return
-        
-    now_dt = datetime.now()
-    now_ts = int(now_dt.timestamp())
-    current_hm = now_dt.strftime("%H:%M")
-    current_date_str = now_dt.strftime("%Y-%m-%d")
-    current_weekday = now_dt.strftime("%A").lower()
-    
-    state_changed = False
-    reminders = state.get("reminders", {})
-    
-    for rem_id, rem_data in reminders.items():
-        if not rem_data.get("enabled", True): continue
-            
-        interval_days = int(rem_data.get("interval_days", 3))
-        target_time = rem_data.get("target_time")
-        target_day = rem_data.get("target_day")
-        last_sent = rem_data.get("last_sent", 0)
-        last_sent_date = rem_data.get("last_sent_date", "")
-        
-        should_send = False
-
-        if target_day:
-            time_to_check = target_time if target_time else "00:00"
-            if current_weekday == target_day and current_hm >= time_to_check:
-                if last_sent_date != current_date_str:
-                    should_send = True
-        elif target_time:
-            if last_sent_date != current_date_str and current_hm >= target_time:
-                if last_sent == 0:
-                    should_send = True
-                else:
-                    last_dt = datetime.fromtimestamp(last_sent)
-                    days_passed = (now_dt.date() - last_dt.date()).days
-                    if days_passed >= interval_days:
-                        should_send = True
-        else:
-            interval_seconds = interval_days * 86400
-            if now_ts - last_sent >= interval_seconds:
-                should_send = True
-
-        if should_send:
-            try:
-                await REMINDER_CHANNEL.send(rem_data["message"])
-                rem_data["last_sent"] = now_ts
-                rem_data["last_sent_date"] = current_date_str
-                state_changed = True
-                print(f"Sent reminder #{rem_id} at {current_hm} on {current_weekday}")
-            except Exception as e:
-                print(f"Reminder checker error for ID {rem_id}: {e}")
-                
-    if state_changed:
-        save_state(state)
+    await scheduler.wait_until_due()
+    with metrics.tick("reminder_checker"):
+        now = scheduler.clock()
+        reminders = state.get("reminders", {})
+        due = scheduler.pop_due(now)
+        try:
+            deliveries, handled = collect_due(
+                scheduler, reminders, now, reminder_channel_id, CATCHUP_POLICY, CATCHUP_GRACE, CATCHUP_MAX, due=due
+            )
+            if not deliveries:
+                return
+            # Persist the deliveries before advancing the reminders; if we crash in between, the same
+            # fire times come due again and map to the same keys, which the queue ignores
+            added = await delivery_queue.enqueue(deliveries)
+            mark_handled(scheduler, reminders, handled, now)
+            save_state(state, handled)
+        except Exception as e:
+            # e.g. "database is locked" on a shared DELIVERY_DB: put the due reminders back as they
+            # were and try again shortly, instead of letting the loop die
+            print(f"Reminder check failed, retrying in {CHECK_RETRY_DELAY}s: {e!r}")
+            scheduler.restore(due)
+            await asyncio.sleep(CHECK_RETRY_DELAY)
+            return
+    print(f"Queued {added} delivery(ies) for reminder(s) {', '.join('#' + r for r in handled)}")
+
+first_command_served = False
+
+async def on_interaction(interaction):
+    global first_command_served
+    if not first_command_served and interaction.type == discord.InteractionType.application_command:
+        first_command_served = True
+        print(f"First command served {time.monotonic() - STARTED_AT:.1f}s after start")
 
-@client.event
 async def on_ready():
-    global REMINDER_CHANNEL
-    print(f"Logged in as {client.user}")
-    
-    # Sync slash commands to Discord when the bot starts
-    try:
-        await tree.sync()
-        print("✅ Slash commands synced successfully!")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
+    print(f"Logged in as {client.user} ({MEMBER_CACHE} member cache): {cache_report(client, STARTED_AT, STARTED_RSS)}")
+    if elector:
+        # Reminders start if and when this replica wins the lease
+        elector.start()
+        return
+    await start_reminders()
 
-    try:
-        REMINDER_CHANNEL = client.get_channel(REMINDER_CHANNEL_ID) if REMINDER_CHANNEL_ID else None
-    except Exception:
-        REMINDER_CHANNEL = None
-        
+async def start_reminders():
+    adopt_legacy_reminders()
+    persister.start()
+    delivery_queue.start()
     if not reminder_checker.is_running():
         reminder_checker.start()
-    print("Reminder checker started (running every 1 minute)")
+    print(f"Reminder checker started ({len(scheduler)} reminder(s) scheduled)")
+
+    resumed = job_runner.resume_all()
+    if resumed:
+        print(f"Resumed {resumed} unfinished job(s)")
+
+async def stop_reminders():
+    # Stop everything that sends or writes reminder state, and write out what is still pending
+    await hosting.stop_loop(reminder_checker)
+    if delivery_queue:
+        await delivery_queue.close()
+    if job_runner:
+        await job_runner.close()
+    await persister.flush()
+
+async def on_elected(token):
+    # Whatever the previous leader changed is in the shared stores, not in this replica's memory
+    await reload_state()
+    await start_reminders()
+
+elector = LeaderElector(
+    lease_store, "reminders", HA_REPLICA_ID, ttl=HA_LEASE_TTL, heartbeat=HA_HEARTBEAT,
+    on_elected=on_elected, on_demoted=stop_reminders
+) if HA_MODE else None
+metrics.gauge(
+    "reminder_leader", "1 while this replica runs the reminder checker",
+    function=lambda: int(elector is None or elector.is_leader)
+)
+
+
+async def on_raw_member_remove(payload):
+    role_cache.member_removed(payload.guild_id, payload.user.id)
 
 
 # ==========================================
 # 🚀 SLASH COMMANDS
 # ==========================================
 
-def is_unauthorized(user_id):
-    return user_id not in REMINDER_ADMIN_IDS
-
-@tree.command(name="bottime", description="Check the bot's current timezone and time")
+def adopt_legacy_reminders():
+    # Reminders from the single-channel days belong to REMINDER_CHANNEL_ID's guild
+    legacy = reminder_index.ids(None)
+    channel = client.get_channel(REMINDER_CHANNEL_ID) if REMINDER_CHANNEL_ID else None
+    if not legacy or not getattr(channel, "guild", None):
+        return
+    for rem_id in legacy:
+        rem_data = state["reminders"][rem_id]
+        rem_data["guild_id"] = channel.guild.id
+        rem_data["channel_id"] = REMINDER_CHANNEL_ID
+        reminder_index.add(rem_id, channel.guild.id)
+    save_state(state, legacy)
+    print(f"Assigned {len(legacy)} existing reminder(s) to guild {channel.guild.id}")
+
+def is_unauthorized(user_id, guild_id=None):
+    # Bot-wide admins everywhere; guild admins only inside their own guild
+    if user_id in REMINDER_ADMIN_IDS:
+        return False
+    return not (guild_id and guild_settings.is_admin(guild_id, user_id))
+
+@app_commands.command(name="bottime", description="Check the bot's current timezone and time")
 async def slash_bottime(interaction: discord.Interaction):
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     current_day = datetime.now().strftime("%A")
-    await interaction.response.send_message(f"🕒 **Bot's Local Time:** `{current_day}, {current_time}`", ephemeral=True)
+    zone_time = datetime.now(get_zone(REMINDER_TIMEZONE)).strftime("%A, %Y-%m-%d %H:%M:%S")
+    await interaction.response.send_message(
+        f"🕒 **Bot's Local Time:** `{current_day}, {current_time}`\n"
+        f"🌐 **Reminder Timezone:** `{REMINDER_TIMEZONE}` (`{zone_time}`)", ephemeral=True
+    )
 
-@tree.command(name="addrole", description="Assign multiple roles to multiple users")
+@app_commands.command(name="addrole", description="Assign multiple roles to multiple users")
 @app_commands.describe(roles="Comma-separated roles (e.g. whale,mexc) or @Role", users="@User1 @User2 or UserIDs")
 async def slash_addrole(interaction: discord.Interaction, roles: str, users: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
         
     await interaction.response.defer(ephemeral=True) # Defer because adding roles takes time
@@ -214,27 +378,44 @@ async def slash_addrole(interaction: discord.Interaction, roles: str, users: str
     if not user_ids:
         return await interaction.followup.send("❌ No valid user IDs or mentions found.", ephemeral=True)
 
-    success_count = 0
-    fail_count = 0
-    
-    for uid in user_ids:
-        member = interaction.guild.get_member(uid)
-        if not member:
-            try: member = await interaction.guild.fetch_member(uid)
-            except: pass
-        if member:
-            try:
-                await member.add_roles(*roles_to_add)
-                success_count += 1
-            except: fail_count += 1
-        else: fail_count += 1
+    # Roles at or above the bot's top role would fail for every user, so refuse them up front
+    too_high = [r for r in roles_to_add if r >= interaction.guild.me.top_role]
+    if too_high:
+        names = ", ".join(r.name for r in too_high)
+        return await interaction.followup.send(f"❌ I can't assign **{names}**: it's above my highest role.", ephemeral=True)
 
     role_names = ", ".join([r.name for r in roles_to_add])
-    await interaction.followup.send(f"✅ Added **{role_names}** to {success_count} user(s).\n❌ Failed for {fail_count} user(s).", ephemeral=True)
+    await interaction.edit_original_response(content=f"⏳ Looking up {len(user_ids)} user(s)...")
+    found = await resolve_members(interaction.guild, user_ids, cache=MEMBER_CACHE != "lean")
+    members = {uid: found.get(uid) for uid in dict.fromkeys(user_ids)}
+
+    async def show_progress(result, total):
+        await interaction.edit_original_response(content=f"⏳ Adding **{role_names}**: {result.done}/{total} done...")
+
+    assigner = BulkRoleAssigner(workers=ADDROLE_WORKERS, reason=f"/addrole by {interaction.user}")
+    result = await assigner.run(members, roles_to_add, on_progress=show_progress)
+    for uid in result.added:
+        for role in roles_to_add:
+            role_cache.role_added(interaction.guild.id, role.id, uid)
+
+    summary = (
+        f"✅ Added **{role_names}** to {len(result.added)} user(s).\n"
+        f"➖ {len(result.skipped)} user(s) already had them.\n"
+        f"❌ Failed for {len(result.failed)} user(s)."
+    )
+    await interaction.edit_original_response(content=summary)
+    if result.failed:
+        report = result.report()
+        if len(report) <= 1900:
+            await interaction.followup.send(f"**Failures:**\n```\n{report}\n```", ephemeral=True)
+        else:
+            report_file = discord.File(io.BytesIO(report.encode("utf-8")), filename="addrole_failures.txt")
+            await interaction.followup.send("**Failures:**", file=report_file, ephemeral=True)
 
 
-@tree.command(name="kickrekt", description="Kick everyone holding the Rekt Citizen role")
-async def slash_kickrekt(interaction: discord.Interaction):
+@app_commands.command(name="kickrekt", description="Kick everyone holding the Rekt Citizen role")
+@app_commands.describe(dry_run="Only show who would be kicked")
+async def slash_kickrekt(interaction: discord.Interaction, dry_run: bool = False):
     if interaction.user.id not in KICKREKT_ALLOWED_IDS:
         return await interaction.response.send_message("❌ You are not authorized to use this command.", ephemeral=True)
 
@@ -242,80 +423,203 @@ async def slash_kickrekt(interaction: discord.Interaction):
     if not rekt_role:
         return await interaction.response.send_message("❌ The 'Rekt Citizen' role could not be found.", ephemeral=True)
         
-    members_to_kick = rekt_role.members
-    if not members_to_kick:
-        return await interaction.response.send_message("✅ No users found with the 'Rekt Citizen' role. Server is clean!", ephemeral=True)
-        
     await interaction.response.defer(ephemeral=True)
-    
-    success_count = 0
-    fail_count = 0
-    for member in members_to_kick:
-        try:
-            await member.kick(reason="Automated kick for holding the Rekt Citizen role via Slash Command.")
-            success_count += 1
-        except Exception:
-            fail_count += 1
-            
-    await interaction.followup.send(f"✅ Done! Kicked **{success_count}** users.\n❌ Failed to kick **{fail_count}** users.", ephemeral=True)
+    members_to_kick = await role_cache.member_ids(interaction.guild, REKT_ROLE_ID)
+    if not members_to_kick:
+        return await interaction.followup.send("✅ No users found with the 'Rekt Citizen' role. Server is clean!", ephemeral=True)
+
+    if dry_run:
+        preview = "\n".join(f"• {interaction.guild.get_member(mid) or mid} ({mid})" for mid in members_to_kick[:30])
+        more = f"\n...and {len(members_to_kick) - 30} more" if len(members_to_kick) > 30 else ""
+        return await interaction.followup.send(
+            f"🔍 **Dry run:** {len(members_to_kick)} user(s) would be kicked:\n{preview}{more}"[:2000], ephemeral=True
+        )
+
+    job_id = await job_runner.submit(
+        "kick", interaction.guild, interaction.channel, interaction.user.id,
+        members_to_kick,
+        {"reason": "Automated kick for holding the Rekt Citizen role via Slash Command."}
+    )
+    await interaction.followup.send(
+        f"🚀 Started **Job #{job_id}**: kicking {len(members_to_kick)} user(s). Progress is posted in this channel.", ephemeral=True
+    )
+
+
+@app_commands.command(name="jobs", description="View recent bulk moderation jobs")
+async def slash_jobs(interaction: discord.Interaction):
+    if interaction.user.id not in KICKREKT_ALLOWED_IDS:
+        return await interaction.response.send_message("❌ You are not authorized to use this command.", ephemeral=True)
+
+    jobs = await asyncio.to_thread(job_store.recent)
+    if not jobs:
+        return await interaction.response.send_message("No jobs have been run yet.", ephemeral=True)
+
+    lines = ["**🛠️ Recent Jobs:**\n"]
+    for job in jobs:
+        counts = await asyncio.to_thread(job_store.counts, job["id"])
+        processed = sum(n for status, n in counts.items() if status != "pending")
+        started = datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M")
+        lines.append(f"**#{job['id']}** {job['kind']} | {job['status']} | {processed}/{sum(counts.values())} | {started}")
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
 
+@app_commands.command(name="canceljob", description="Stop a running bulk moderation job")
+@app_commands.describe(job_id="The job number from /jobs")
+async def slash_canceljob(interaction: discord.Interaction, job_id: int):
+    if interaction.user.id not in KICKREKT_ALLOWED_IDS:
+        return await interaction.response.send_message("❌ You are not authorized to use this command.", ephemeral=True)
+
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if not job or job["status"] != "running":
+        return await interaction.response.send_message(f"❌ Job {job_id} is not running.", ephemeral=True)
+
+    await job_runner.cancel(job_id)
+    await interaction.response.send_message(f"🛑 Cancelled **Job #{job_id}**.", ephemeral=True)
+
+
+def describe_schedule(rem_data):
+    tz_name = rem_data.get("timezone") or REMINDER_TIMEZONE
+    try:
+        text = compile_schedule(rem_data.get("schedule") or legacy_schedule(rem_data), tz_name).describe()
+    except ValueError as e:
+        text = f"⚠️ invalid schedule ({e})"
+    return f"{text.capitalize()} ({tz_name})"
+
+def set_schedule(rem_data, schedule, timezone=None):
+    # Validates first (raises ValueError), so a bad schedule never reaches the state
+    compile_schedule(schedule, timezone or REMINDER_TIMEZONE)
+    rem_data["schedule"] = schedule
+    rem_data["timezone"] = timezone
+    rem_data["schedule_since"] = schedule_since_for(schedule, rem_data.get("last_sent", 0), time.time())
+
+
+def render_reminders(guild_id):
+    # Entries for the page cache and the text its search index is built from
+    entries = {}
+    search_texts = {}
+    for r_id, r_data in guild_reminders(guild_id).items():
+        status = "🟢 Enabled" if r_data.get("enabled", True) else "🔴 Disabled"
+        schedule_str = describe_schedule(r_data)
+        fire_ts = scheduler.fire_ts(r_id)
+        next_str = f"Next: <t:{int(fire_ts)}:F> (<t:{int(fire_ts)}:R>)" if fire_ts else "Next: —"
+
+        preview = r_data.get("message", "").replace("\n", " ")[:60] + "..."
+        entries[r_id] = f"**ID: {r_id}** | {schedule_str} | {status}\n{next_str}\n*Preview:* `{preview}`\n\n"
+        search_texts[r_id] = f"{r_data.get('message', '')} {r_data.get('schedule') or ''} {schedule_str}"
+    return entries, search_texts
 
-@tree.command(name="listreminders", description="View all active reminders")
+reminder_pages = ReminderPageCache(render_reminders, header="**📋 Active Reminders:**\n\n")
+
+
+@app_commands.command(name="listreminders", description="View all active reminders")
+@app_commands.guild_only()
 async def slash_listreminders(interaction: discord.Interaction):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
         
-    reminders = state.get("reminders", {})
-    if not reminders:
+    if not reminder_pages.count(interaction.guild_id):
         return await interaction.response.send_message("There are currently no reminders set.", ephemeral=True)
-        
-    reply_text = "**📋 Active Reminders:**\n\n"
-    for r_id, r_data in reminders.items():
-        status = "🟢 Enabled" if r_data.get("enabled", True) else "🔴 Disabled"
-        days = r_data.get("interval_days", 3)
-        t_time = r_data.get("target_time")
-        t_day = r_data.get("target_day")
-        
-        if t_day and t_time: schedule_str = f"Every {t_day.capitalize()} at {t_time}"
-        elif t_day: schedule_str = f"Every {t_day.capitalize()}"
-        elif t_time: schedule_str = f"Every {days} day(s) at {t_time}"
-        else: schedule_str = f"Every {days} day(s)"
 
-        preview = r_data.get("message", "").replace("\n", " ")[:60] + "..."
-        reply_text += f"**ID: {r_id}** | {schedule_str} | {status}\n*Preview:* `{preview}`\n\n"
-        
-    await interaction.response.send_message(reply_text, ephemeral=True)
+    await send_pages(interaction, reminder_pages.pages(interaction.guild_id))
 
 
-@tree.command(name="addreminder", description="Create a new reminder")
-@app_commands.describe(days="Number of days interval", message="The reminder text")
-async def slash_addreminder(interaction: discord.Interaction, days: int, message: str):
-    if is_unauthorized(interaction.user.id):
+@app_commands.command(name="searchreminders", description="Find reminders by message text or schedule")
+@app_commands.describe(query="Words to look for (e.g. 'verification' or 'monday 14:30')")
+@app_commands.guild_only()
+async def slash_searchreminders(interaction: discord.Interaction, query: str):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+    rem_ids, pages = reminder_pages.search(interaction.guild_id, query, header=f"**🔎 Reminders matching** `{query[:50]}`:\n\n")
+    if not rem_ids:
+        return await interaction.response.send_message(f"No reminders match `{query[:50]}`.", ephemeral=True)
+    await send_pages(interaction, pages)
+
+
+@app_commands.command(name="addreminder", description="Create a new reminder")
+@app_commands.describe(
+    days="Number of days interval",
+    message="The reminder text",
+    schedule="Optional: cron (e.g. '30 9 * * mon-fri') or 'every 2 days at 14:30'; overrides days",
+    timezone="Optional: IANA timezone (e.g. Asia/Manila); defaults to the bot's",
+    channel="Optional: where to post; defaults to this server's reminder channel"
+)
+@app_commands.guild_only()
+async def slash_addreminder(interaction: discord.Interaction, days: int, message: str,
+                            schedule: str = None, timezone: str = None, channel: discord.TextChannel = None):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
         
     if days < 1:
         return await interaction.response.send_message("❌ Days must be 1 or higher.", ephemeral=True)
-        
-    rem_id = str(state.get("next_id", 1))
-    state["reminders"][rem_id] = {
+
+    rem_data = {
         "enabled": True,
         "interval_days": days,
         "last_sent": 0,
         "last_sent_date": "",
         "target_time": None,
         "target_day": None,
-        "message": message
+        "message": message,
+        "guild_id": interaction.guild_id,
+        "channel_id": channel.id if channel else None
     }
+    try:
+        set_schedule(rem_data, schedule or f"every {days} days", timezone)
+    except ValueError as e:
+        return await interaction.response.send_message(f"❌ Invalid schedule: {e}", ephemeral=True)
+
+    rem_id = str(state.get("next_id", 1))
+    state["reminders"][rem_id] = rem_data
     state["next_id"] += 1
-    save_state(state)
-    await interaction.response.send_message(f"✅ Created **Reminder #{rem_id}** (every {days} days)!", ephemeral=True)
+    reminder_index.add(rem_id, interaction.guild_id)
+    scheduler.reschedule(rem_id, rem_data)
+    save_state(state, [rem_id])
+    await interaction.response.send_message(f"✅ Created **Reminder #{rem_id}** ({describe_schedule(rem_data)})!", ephemeral=True)
+
+
+@app_commands.command(name="editschedule", description="Set a cron or 'every N days at HH:MM' schedule for reminders")
+@app_commands.describe(
+    ids="Comma-separated IDs (e.g. 1,2)",
+    schedule="Cron (e.g. '0 9 * * 1') or 'every 3 days at 14:30'",
+    timezone="Optional: IANA timezone (e.g. Asia/Manila); defaults to the bot's"
+)
+@app_commands.guild_only()
+async def slash_editschedule(interaction: discord.Interaction, ids: str, schedule: str, timezone: str = None):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
+
+    try:
+        compile_schedule(schedule, timezone or REMINDER_TIMEZONE)
+    except ValueError as e:
+        return await interaction.response.send_message(f"❌ Invalid schedule: {e}", ephemeral=True)
+
+    rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
+    results = []
+    changed = []
+    for rem_id in rem_ids:
+        if rem_id not in reminders:
+            results.append(f"❌ ID {rem_id} not found.")
+            continue
+        rem_data = reminders[rem_id]
+        set_schedule(rem_data, schedule, timezone)
+        fire_ts = scheduler.reschedule(rem_id, rem_data)
+        changed.append(rem_id)
+        next_str = f", next <t:{int(fire_ts)}:F>" if fire_ts else ""
+        results.append(f"✅ #{rem_id}: {describe_schedule(rem_data)}{next_str}.")
+
+    save_state(state, changed)
+    await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="editday", description="Set a specific day of the week for a reminder")
+@app_commands.command(name="editday", description="Set a specific day of the week for a reminder")
 @app_commands.describe(ids="Comma-separated IDs (e.g. 1,2)", day="monday, tuesday, etc. (or 'clear')")
+@app_commands.guild_only()
 async def slash_editday(interaction: discord.Interaction, ids: str, day: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     target_d = day.lower()
     valid_days = ["none", "clear", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
@@ -324,217 +628,569 @@ async def slash_editday(interaction: discord.Interaction, ids: str, day: str):
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     
     for rem_id in rem_ids:
-        if rem_id not in state.get("reminders", {}):
+        if rem_id not in reminders:
             results.append(f"❌ ID {rem_id} not found.")
             continue
         if target_d in ["none", "clear"]:
-            state["reminders"][rem_id]["target_day"] = None
+            reminders[rem_id]["target_day"] = None
             results.append(f"✅ Day restriction removed for #{rem_id}.")
         else:
-            state["reminders"][rem_id]["target_day"] = target_d
+            reminders[rem_id]["target_day"] = target_d
             results.append(f"✅ #{rem_id} scheduled for every {target_d.capitalize()}.")
+        rem_data = reminders[rem_id]
+        set_schedule(rem_data, legacy_schedule(rem_data), rem_data.get("timezone"))
+        scheduler.reschedule(rem_id, rem_data)
+        changed.append(rem_id)
 
-    save_state(state)
+    save_state(state, changed)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="edittime", description="Set a specific time of day for a reminder")
+@app_commands.command(name="edittime", description="Set a specific time of day for a reminder")
 @app_commands.describe(ids="Comma-separated IDs (e.g. 1,2)", time="24-hour format (e.g. 14:30) or 'clear'")
+@app_commands.guild_only()
 async def slash_edittime(interaction: discord.Interaction, ids: str, time: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     target_t = time.lower()
     if target_t not in ["none", "clear"]:
         try:
-            datetime.strptime(target_t, "%H:%M")
+            target_t = datetime.strptime(target_t, "%H:%M").strftime("%H:%M")
         except ValueError:
             return await interaction.response.send_message("❌ Invalid time format! Use HH:MM (e.g. `14:30`).", ephemeral=True)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     
     for rem_id in rem_ids:
-        if rem_id not in state.get("reminders", {}):
+        if rem_id not in reminders:
             results.append(f"❌ ID {rem_id} not found.")
             continue
         if target_t in ["none", "clear"]:
-            state["reminders"][rem_id]["target_time"] = None
+            reminders[rem_id]["target_time"] = None
             results.append(f"✅ Time restriction removed for #{rem_id}.")
         else:
-            state["reminders"][rem_id]["target_time"] = target_t
+            reminders[rem_id]["target_time"] = target_t
             results.append(f"✅ #{rem_id} scheduled for **{target_t}**.")
+        rem_data = reminders[rem_id]
+        set_schedule(rem_data, legacy_schedule(rem_data), rem_data.get("timezone"))
+        scheduler.reschedule(rem_id, rem_data)
+        changed.append(rem_id)
 
-    save_state(state)
+    save_state(state, changed)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="viewmessage", description="Read the full text of a specific reminder")
+@app_commands.command(name="viewmessage", description="Read the full text of a specific reminder")
 @app_commands.describe(ids="Comma-separated IDs (e.g. 1,2)")
+@app_commands.guild_only()
 async def slash_viewmessage(interaction: discord.Interaction, ids: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
-            msg = state["reminders"][rem_id]["message"]
-            results.append(f"**Message for #{rem_id}:**\n{msg}\n---")
+        if rem_id in reminders:
+            msg = reminders[rem_id]["message"]
+            results.append(f"**Message for #{rem_id}:**\n{msg}\n---\n")
         else:
-            results.append(f"❌ ID {rem_id} not found.")
+            results.append(f"❌ ID {rem_id} not found.\n")
             
-    await interaction.response.send_message("\n".join(results), ephemeral=True)
+    await send_pages(interaction, paginate(results))
 
 
-@tree.command(name="editmessage", description="Replace the text of a reminder")
+@app_commands.command(name="editmessage", description="Replace the text of a reminder")
 @app_commands.describe(ids="Comma-separated IDs", new_message="The new reminder text")
+@app_commands.guild_only()
 async def slash_editmessage(interaction: discord.Interaction, ids: str, new_message: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
-            state["reminders"][rem_id]["message"] = new_message
+        if rem_id in reminders:
+            reminders[rem_id]["message"] = new_message
+            changed.append(rem_id)
             results.append(f"✅ Updated message for #{rem_id}.")
         else:
             results.append(f"❌ ID {rem_id} not found.")
             
-    save_state(state)
+    save_state(state, changed)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="editinterval", description="Change how many days between reminders")
+@app_commands.command(name="editinterval", description="Change how many days between reminders")
 @app_commands.describe(ids="Comma-separated IDs", days="Number of days")
+@app_commands.guild_only()
 async def slash_editinterval(interaction: discord.Interaction, ids: str, days: int):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     if days < 1: return await interaction.response.send_message("❌ Days must be 1 or higher.", ephemeral=True)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
-            state["reminders"][rem_id]["interval_days"] = days
-            state["reminders"][rem_id]["target_day"] = None # Remove day lock if interval changes
+        if rem_id in reminders:
+            reminders[rem_id]["interval_days"] = days
+            reminders[rem_id]["target_day"] = None # Remove day lock if interval changes
+            rem_data = reminders[rem_id]
+            set_schedule(rem_data, legacy_schedule(rem_data), rem_data.get("timezone"))
+            scheduler.reschedule(rem_id, rem_data)
+            changed.append(rem_id)
             results.append(f"✅ Changed #{rem_id} to trigger every {days} day(s).")
         else:
             results.append(f"❌ ID {rem_id} not found.")
             
-    save_state(state)
+    save_state(state, changed)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="toggle_reminder", description="Pause or unpause a reminder")
+@app_commands.command(name="toggle_reminder", description="Pause or unpause a reminder")
 @app_commands.describe(ids="Comma-separated IDs")
+@app_commands.guild_only()
 async def slash_toggle(interaction: discord.Interaction, ids: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
-            current = state["reminders"][rem_id].get("enabled", True)
-            state["reminders"][rem_id]["enabled"] = not current
+        if rem_id in reminders:
+            current = reminders[rem_id].get("enabled", True)
+            reminders[rem_id]["enabled"] = not current
+            scheduler.reschedule(rem_id, reminders[rem_id])
+            changed.append(rem_id)
             status_str = "Enabled" if not current else "Disabled"
             results.append(f"#{rem_id} is now **{status_str}**.")
         else:
             results.append(f"❌ ID {rem_id} not found.")
             
-    save_state(state)
+    save_state(state, changed)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="delreminder", description="Permanently delete a reminder")
+@app_commands.command(name="delreminder", description="Permanently delete a reminder")
 @app_commands.describe(ids="Comma-separated IDs")
+@app_commands.guild_only()
 async def slash_delreminder(interaction: discord.Interaction, ids: str):
-    if is_unauthorized(interaction.user.id):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    deleted = []
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
+        if rem_id in reminders:
             del state["reminders"][rem_id]
+            reminder_index.remove(rem_id)
+            scheduler.remove(rem_id)
+            deleted.append(rem_id)
             results.append(f"🗑️ Deleted #{rem_id}.")
         else:
             results.append(f"❌ ID {rem_id} not found.")
             
-    save_state(state)
+    save_state(state, [], deleted=deleted)
     await interaction.response.send_message("\n".join(results), ephemeral=True)
 
 
-@tree.command(name="notify", description="Force the bot to send a reminder immediately")
-@app_commands.describe(ids="Comma-separated IDs")
-async def slash_notify(interaction: discord.Interaction, ids: str):
+@app_commands.command(name="editchannel", description="Change where reminders are posted")
+@app_commands.describe(ids="Comma-separated IDs", channel="Target channel (leave empty for the server default)")
+@app_commands.guild_only()
+async def slash_editchannel(interaction: discord.Interaction, ids: str, channel: discord.TextChannel = None):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
+
+    rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
+    results = []
+    changed = []
+    for rem_id in rem_ids:
+        if rem_id in reminders:
+            reminders[rem_id]["channel_id"] = channel.id if channel else None
+            changed.append(rem_id)
+            target = channel.mention if channel else "the server default channel"
+            results.append(f"✅ #{rem_id} now posts in {target}.")
+        else:
+            results.append(f"❌ ID {rem_id} not found.")
+
+    save_state(state, changed)
+    await interaction.response.send_message("\n".join(results), ephemeral=True)
+
+
+@app_commands.command(name="setreminderchannel", description="Set this server's default reminder channel")
+@app_commands.describe(channel="Channel reminders without their own channel are posted in")
+@app_commands.guild_only()
+async def slash_setreminderchannel(interaction: discord.Interaction, channel: discord.TextChannel):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+    guild_settings.set_reminder_channel(interaction.guild_id, channel.id)
+    await save_guild_settings()
+    await interaction.response.send_message(f"✅ Reminders for this server now default to {channel.mention}.", ephemeral=True)
+
+
+@app_commands.command(name="reminderadmins", description="Manage who can edit this server's reminders")
+@app_commands.describe(action="add, remove or list", user="The user to add or remove")
+@app_commands.choices(action=[app_commands.Choice(name=a, value=a) for a in ("add", "remove", "list")])
+@app_commands.guild_only()
+async def slash_reminderadmins(interaction: discord.Interaction, action: app_commands.Choice[str], user: discord.User = None):
+    # Server managers (and bot-wide admins) decide who the server's reminder admins are
+    can_manage = interaction.user.guild_permissions.manage_guild or not is_unauthorized(interaction.user.id)
+    if not can_manage:
+        return await interaction.response.send_message("❌ You need the Manage Server permission.", ephemeral=True)
+
+    guild_id = interaction.guild_id
+    if action.value == "list":
+        admins = guild_settings.admins(guild_id)
+        text = ", ".join(f"<@{uid}>" for uid in admins) if admins else "No server reminder admins yet."
+        return await interaction.response.send_message(f"**🛡️ Reminder admins:** {text}", ephemeral=True)
+
+    if not user:
+        return await interaction.response.send_message("❌ Pick a user to add or remove.", ephemeral=True)
+    if action.value == "add":
+        changed = guild_settings.add_admin(guild_id, user.id)
+        text = f"✅ {user.mention} can now manage reminders here." if changed else f"{user.mention} is already an admin."
+    else:
+        changed = guild_settings.remove_admin(guild_id, user.id)
+        text = f"🗑️ {user.mention} is no longer a reminder admin." if changed else f"{user.mention} wasn't an admin."
+    if changed:
+        await save_guild_settings()
+    await interaction.response.send_message(text, ephemeral=True)
+
+
+@app_commands.command(name="deliveries", description="View the reminder delivery queue")
+async def slash_deliveries(interaction: discord.Interaction):
+    # The queue spans every guild, so this stays with the bot-wide admins
     if is_unauthorized(interaction.user.id):
         return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
 
-    if not REMINDER_CHANNEL:
-        return await interaction.response.send_message("❌ Reminder channel not available.", ephemeral=True)
+    counts = await asyncio.to_thread(delivery_store.counts)
+    failures = await asyncio.to_thread(delivery_store.recent_failures)
+    lines = [
+        f"**📬 Deliveries:** {counts.get('pending', 0)} pending | {counts.get('sent', 0)} sent | {counts.get('failed', 0)} failed"
+    ]
+    for key, rem_id, attempts, error in failures:
+        lines.append(f"❌ #{rem_id} `{key}` after {attempts} attempt(s): {error}")
+    await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+
+@app_commands.command(name="notify", description="Force the bot to send a reminder immediately")
+@app_commands.describe(ids="Comma-separated IDs")
+@app_commands.guild_only()
+async def slash_notify(interaction: discord.Interaction, ids: str):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
 
     await interaction.response.defer(ephemeral=True)
     rem_ids = [r.strip("<> ") for r in ids.split(",") if r.strip("<> ")]
     results = []
+    changed = []
     
     for rem_id in rem_ids:
-        if rem_id in state.get("reminders", {}):
-            rem_data = state["reminders"][rem_id]
+        if rem_id in reminders:
+            rem_data = reminders[rem_id]
+            channel_id = reminder_channel_id(rem_data)
+            if not channel_id:
+                results.append(f"❌ #{rem_id} has no channel to post in (set one with /setreminderchannel).")
+                continue
             try:
-                await REMINDER_CHANNEL.send(rem_data["message"])
+                await delivery_queue.channel(channel_id).send(rem_data["message"])
                 now_dt = datetime.now()
                 rem_data["last_sent"] = int(now_dt.timestamp())
                 rem_data["last_sent_date"] = now_dt.strftime("%Y-%m-%d")
+                scheduler.reschedule(rem_id, rem_data)
+                changed.append(rem_id)
                 results.append(f"📢 Sent #{rem_id} successfully.")
             except Exception as e:
                 results.append(f"❌ Failed to send #{rem_id}: {e}")
         else:
             results.append(f"❌ ID {rem_id} not found.")
             
-    save_state(state)
+    save_state(state, changed)
     await interaction.followup.send("\n".join(results), ephemeral=True)
 
 
+@app_commands.command(name="exportreminders", description="Download this server's reminders as a file")
+@app_commands.describe(format="jsonl (default) or csv; both can be edited and fed back to /importreminders")
+@app_commands.choices(format=[app_commands.Choice(name=f, value=f) for f in FORMATS])
+@app_commands.guild_only()
+async def slash_exportreminders(interaction: discord.Interaction, format: app_commands.Choice[str] = None):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    reminders = guild_reminders(interaction.guild_id)
+    if not reminders:
+        return await interaction.response.send_message("There are currently no reminders set.", ephemeral=True)
+
+    fmt = format.value if format else "jsonl"
+    # Rows are copied here; encoding them happens off the event loop
+    rows = list(export_rows(reminders))
+    data = await asyncio.to_thread(write_export, rows, fmt)
+    export_file = discord.File(io.BytesIO(data), filename=f"reminders-{interaction.guild_id or 'global'}.{fmt}")
+    await interaction.response.send_message(f"📦 Exported {len(rows)} reminder(s).", file=export_file, ephemeral=True)
+
+
+@app_commands.command(name="importreminders", description="Create or update reminders from a JSONL or CSV file")
+@app_commands.describe(
+    file="Same columns as /exportreminders; rows with an id update it, rows without one are created",
+    dry_run="Only show what would change"
+)
+@app_commands.guild_only()
+async def slash_importreminders(interaction: discord.Interaction, file: discord.Attachment, dry_run: bool = False):
+    if is_unauthorized(interaction.user.id, interaction.guild_id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+    if file.size > IMPORT_MAX_BYTES:
+        return await interaction.response.send_message(
+            f"❌ The file is too large ({file.size:,} bytes, max {IMPORT_MAX_BYTES:,}).", ephemeral=True
+        )
+
+    await interaction.response.defer(ephemeral=True)
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return await interaction.followup.send("❌ The file isn't UTF-8 text.", ephemeral=True)
+    except discord.HTTPException as e:
+        return await interaction.followup.send(f"❌ Couldn't download the file: {e}", ephemeral=True)
+
+    fmt = detect_format(file.filename, text)
+    guild = interaction.guild
+    plan = ImportPlan(
+        guild_reminders(interaction.guild_id), REMINDER_TIMEZONE,
+        lambda channel_id: guild is not None and guild.get_channel(channel_id) is not None,
+        max_rows=IMPORT_MAX_ROWS
+    )
+    for batch in batched(read_rows(text, fmt), IMPORT_BATCH):
+        plan.add_batch(batch)
+        await asyncio.sleep(0)
+    plan.recheck(guild_reminders(interaction.guild_id))
+
+    if plan.errors:
+        verdict = "❌ Nothing was imported. Fix the rows marked `!` and try again."
+    elif dry_run:
+        verdict = "🔍 Dry run, nothing was changed."
+    elif not (plan.creates or plan.updates):
+        verdict = "Nothing to change."
+    else:
+        # One state update, one scheduler rebuild and one write for the whole file
+        created, updated = plan.apply(state, interaction.guild_id)
+        for rem_id in created:
+            reminder_index.add(rem_id, interaction.guild_id)
+        scheduler.rebuild(state.get("reminders", {}))
+        save_state(state, created + updated)
+        new_ids = f" (#{created[0]}–#{created[-1]})" if created else ""
+        verdict = f"✅ Created {len(created)} reminder(s){new_ids} and updated {len(updated)}."
+
+    describe = lambda schedule, tz: describe_schedule({"schedule": schedule, "timezone": tz})
+    diff = "\n".join(plan.diff_lines(describe))
+    header = f"**📥 Import of `{file.filename}`** ({fmt}): {plan.summary()}\n{verdict}"
+    if not diff:
+        await interaction.followup.send(header, ephemeral=True)
+    elif len(header) + len(diff) <= 1900:
+        await interaction.followup.send(f"{header}\n```\n{diff}\n```", ephemeral=True)
+    else:
+        diff_file = discord.File(io.BytesIO(diff.encode("utf-8")), filename="import_diff.txt")
+        await interaction.followup.send(header, file=diff_file, ephemeral=True)
+
+
 # ==========================================
 # TEXT TRIGGERS (Auto-Replies)
 # ==========================================
 
-@client.event
+triggers, next_trigger_id = load_triggers(TRIGGERS_FILE)
+trigger_matcher = TriggerMatcher(triggers)
+
+async def persist_triggers():
+    trigger_matcher.rebuild(triggers)
+    try:
+        await asyncio.to_thread(save_triggers, TRIGGERS_FILE, [dict(t) for t in triggers], next_trigger_id)
+    except Exception as e:
+        print(f"Failed to save triggers: {e}")
+
+@app_commands.command(name="addtrigger", description="Add an auto-reply trigger")
+@app_commands.describe(
+    pattern="Text to look for (case-insensitive)",
+    reply="What the bot replies with",
+    match="exact = whole message, substring = anywhere, word = whole word anywhere",
+    cooldown="Seconds before this trigger can fire again in the same channel"
+)
+@app_commands.choices(match=[app_commands.Choice(name=m, value=m) for m in MATCH_TYPES])
+async def slash_addtrigger(interaction: discord.Interaction, pattern: str, reply: str,
+                           match: app_commands.Choice[str], cooldown: int = 0):
+    global next_trigger_id
+    if is_unauthorized(interaction.user.id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+    pattern = pattern.lower().strip()
+    if not pattern:
+        return await interaction.response.send_message("❌ Pattern can't be empty.", ephemeral=True)
+    if cooldown < 0:
+        return await interaction.response.send_message("❌ Cooldown must be 0 or higher.", ephemeral=True)
+
+    trigger_id = next_trigger_id
+    triggers.append({"id": trigger_id, "pattern": pattern, "match": match.value, "reply": reply, "cooldown": cooldown})
+    next_trigger_id += 1
+    await persist_triggers()
+    await interaction.response.send_message(f"✅ Created **Trigger #{trigger_id}** ({match.value}: `{pattern}`)", ephemeral=True)
+
+
+@app_commands.command(name="listtriggers", description="View all auto-reply triggers")
+async def slash_listtriggers(interaction: discord.Interaction):
+    if is_unauthorized(interaction.user.id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+    if not triggers:
+        return await interaction.response.send_message("There are currently no triggers set.", ephemeral=True)
+
+    lines = ["**💬 Auto-Reply Triggers** (first match wins):\n"]
+    for t in triggers:
+        cooldown = f" | {t['cooldown']}s cooldown" if t.get("cooldown") else ""
+        lines.append(f"**#{t['id']}** {t['match']}: `{t['pattern']}` → {t['reply'][:60]}{cooldown}")
+    await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+
+@app_commands.command(name="deltrigger", description="Delete auto-reply triggers")
+@app_commands.describe(ids="Comma-separated trigger IDs")
+async def slash_deltrigger(interaction: discord.Interaction, ids: str):
+    if is_unauthorized(interaction.user.id):
+        return await interaction.response.send_message("❌ Unauthorized.", ephemeral=True)
+
+    trigger_ids = [r.strip("<># ") for r in ids.split(",") if r.strip("<># ")]
+    results = []
+    for trigger_id in trigger_ids:
+        found = next((t for t in triggers if str(t["id"]) == trigger_id), None)
+        if found:
+            triggers.remove(found)
+            results.append(f"🗑️ Deleted trigger #{trigger_id}.")
+        else:
+            results.append(f"❌ Trigger {trigger_id} not found.")
+
+    await persist_triggers()
+    await interaction.response.send_message("\n".join(results), ephemeral=True)
+
+
+async def reload_state():
+    global guild_settings, triggers, next_trigger_id
+    fresh = await asyncio.to_thread(load_state)
+    # Updated in place: the persister holds on to this dict
+    state.clear()
+    state.update(fresh)
+    reminder_index.rebuild(state.get("reminders", {}))
+    scheduler.rebuild(state.get("reminders", {}))
+    reminder_pages.invalidate()
+    guild_settings = await asyncio.to_thread(GuildSettings, GUILD_SETTINGS_FILE)
+    triggers, next_trigger_id = await asyncio.to_thread(load_triggers, TRIGGERS_FILE)
+    trigger_matcher.rebuild(triggers)
+    print(f"Reloaded state: {len(state.get('reminders', {}))} reminder(s), {len(triggers)} trigger(s)")
+
+
 async def on_message(message):
     if message.author == client.user:
         return
+    if elector and not elector.is_leader:
+        return
 
     content = message.content.lower().strip()
-
-    if "bleu" in content:
-        await message.reply("ang pogi mo <@433607960493555722>", mention_author=True)
-    elif "shann" in content or "shnncrypt" in content or "404287153213014038" in content:
-        await message.reply("Bading na bading si shann", mention_author=True)
-    elif content in ["tanginamo", "tangina mo", "inamo", "taena mo"]:
-        await message.reply("tangina mo rin", mention_author=True)
-    elif content in ["putanginamo", "putangina mo"]:
-        await message.reply("putangina mo rin", mention_author=True)
-    elif content in ["<@749211272008171601>"] in content:
-        await message.reply("Ang ganda ni ren", mention_author=True)
-    elif "princess" in content or "1081556256394842112" in content:
-        await message.reply("GA Hunter, una pa sa first", mention_author=True)
-    elif content in ["ulol", "ulol ka"]:
-        await message.reply("ulol ka rin", mention_author=True)
-    elif content == "gago":
-        await message.reply("gago ka rin", mention_author=True)
-    elif content in ["panget", "panget ka"]:
-        await message.reply("panget ka rin", mention_author=True)
-    elif content in ["bading", "gay", "g4y"]:
-        await message.reply("puro ka kabadingan!!!>", mention_author=True)
-
-
-if not DISCORD_TOKEN:
-    print("DISCORD_TOKEN not set. Exiting.")
-else:
-    client.run(DISCORD_TOKEN)
\ No newline at end of file
+    trigger = trigger_matcher.match(content)
+    if trigger and trigger_matcher.allow(trigger, message.channel.id):
+        await message.reply(trigger["reply"], mention_author=True)
+
+
+LISTENERS = [on_ready, on_interaction, on_raw_member_remove, on_message]
+
+# The tree's interaction_check before setup() wrapped it (HA mode)
+tree_check = None
+
+def install_standby_check(tree):
+    global tree_check
+    tree_check = tree.interaction_check
+
+    async def interaction_check(interaction):
+        # Every replica's gateway sees the interaction; standbys leave this bot's commands to the leader
+        if not elector.is_leader and getattr(interaction.command, "module", None) == __name__:
+            return False
+        return await tree_check(interaction)
+
+    tree.interaction_check = interaction_check
+
+async def setup(bot):
+    # Extension entry point: registers the slash commands and event listeners on `bot`
+    global client, delivery_queue, job_runner
+    client = bot
+    delivery_queue = DeliveryQueue(bot, delivery_store, workers=DELIVERY_WORKERS, lease=elector)
+    job_runner = JobRunner(bot, job_store, workers=JOB_WORKERS)
+    for command in globals().values():
+        if isinstance(command, app_commands.Command):
+            bot.tree.add_command(command)
+    if elector:
+        install_standby_check(bot.tree)
+    for listener in LISTENERS:
+        bot.add_listener(listener)
+    if bot.is_ready():
+        # Loaded or reloaded after connecting, so on_ready won't come round again
+        await on_ready()
+
+async def teardown(bot):
+    # Also runs before a reload: stop sending, flush pending state and close every store
+    for listener in LISTENERS:
+        bot.remove_listener(listener)
+    for command in globals().values():
+        if isinstance(command, app_commands.Command):
+            bot.tree.remove_command(command.name)
+    if tree_check:
+        bot.tree.interaction_check = tree_check
+    if elector:
+        # Steps down and releases the lease, so a standby takes over without waiting out the TTL
+        await elector.close()
+    await stop_reminders()
+    delivery_store.close()
+    job_store.close()
+    await persister.close()
+    store.close()
+    if lease_store:
+        lease_store.close()
+
+async def main():
+    discord.utils.setup_logging()
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    bot = hosting.build_bot(intents, sharded=SHARDED, **client_options(MEMBER_CACHE))
+    instrumentation = hosting.Instrumentation(
+        bot, host=METRICS_HOST, port=METRICS_PORT, json_logs=METRICS_JSON_LOGS,
+        lag_threshold=LOOP_LAG_THRESHOLD, root=Path(__file__).resolve().parent
+    )
+
+    async def setup_hook():
+        await instrumentation.start()
+        await setup(bot)
+        await sync_commands(bot.tree, COMMAND_SYNC_FILE, COMMAND_SYNC, DEV_GUILD_ID)
+
+    bot.setup_hook = setup_hook
+    try:
+        await hosting.serve(bot, DISCORD_TOKEN)
+    finally:
+        await teardown(bot)
+        await instrumentation.close()
+
+if __name__ == "__main__":
+    if not DISCORD_TOKEN:
+        print("DISCORD_TOKEN not set. Exiting.")
+    else:
+        asyncio.run(main())
@@ -0,0 +1,124 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+import discord
+
+# Gateway member queries accept at most 100 user ids per request
+QUERY_BATCH = 100
+
+
+async def resolve_members(guild, user_ids, batch_size=QUERY_BATCH, cache=True):
+    # {user_id: Member} for everyone in the guild; ids that aren't members are left out.
+    # Cached members are used as-is, the rest are requested over the gateway in batches
+    # instead of one REST fetch_member call per id.
+    members = {}
+    missing = []
+    for uid in dict.fromkeys(user_ids):
+        member = guild.get_member(uid)
+        if member:
+            members[uid] = member
+        else:
+            missing.append(uid)
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        try:
+            found = await guild.query_members(user_ids=batch, limit=len(batch), cache=cache)
+        except asyncio.TimeoutError:
+            print(f"Member query timed out for {len(batch)} id(s)")
+            continue
+        for member in found:
+            members[member.id] = member
+    return members
+
+
+@dataclass
+class BulkRoleResult:
+    added: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)  # user_id -> reason
+
+    @property
+    def done(self):
+        return len(self.added) + len(self.skipped) + len(self.failed)
+
+    def report(self):
+        lines = [f"{uid}: {reason}" for uid, reason in self.failed.items()]
+        return "\n".join(lines)
+
+
+def _reason(error):
+    if isinstance(error, discord.Forbidden):
+        return "missing permissions (role above the bot's top role?)"
+    if isinstance(error, discord.NotFound):
+        return "left the server"
+    if isinstance(error, discord.HTTPException):
+        return f"HTTP {error.status}: {error.text or error}"
+    return f"{type(error).__name__}: {error}"
+
+
+class BulkRoleAssigner:
+    # Adds roles to many members on a bounded worker pool. Member edits share one rate-limit
+    # bucket per guild, so a handful of workers is enough to keep it full; 429s and 5xx that
+    # discord.py gave up on are retried with backoff and jitter.
+
+    def __init__(self, *, workers=4, max_retries=3, reason=None):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.reason = reason
+
+    async def _add(self, member, roles):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await member.add_roles(*roles, reason=self.reason)
+            except (discord.Forbidden, discord.NotFound):
+                raise
+            except discord.HTTPException as e:
+                if attempt == self.max_retries or (e.status != 429 and e.status < 500):
+                    raise
+                retry_after = getattr(e, "retry_after", None) or 0
+                await asyncio.sleep(max(retry_after, 2 ** attempt) + random.uniform(0, 1))
+
+    async def run(self, members, roles, on_progress=None, progress_interval=3.0):
+        # members: {user_id: Member or None}; None is reported as "not in the server".
+        # on_progress(result, total) is awaited at most every progress_interval seconds.
+        result = BulkRoleResult()
+        total = len(members)
+        pending = asyncio.Queue()
+        for uid, member in members.items():
+            if member is None:
+                result.failed[uid] = "not in the server"
+            elif all(role in member.roles for role in roles):
+                result.skipped.append(uid)
+            else:
+                pending.put_nowait((uid, member))
+
+        async def worker():
+            while True:
+                try:
+                    uid, member = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                # Only add what's missing, so partial holders don't re-send roles they have
+                missing = [role for role in roles if role not in member.roles]
+                try:
+                    await self._add(member, missing)
+                    result.added.append(uid)
+                except Exception as e:
+                    result.failed[uid] = _reason(e)
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(progress_interval)
+                try:
+                    await on_progress(result, total)
+                except Exception as e:
+                    print(f"Progress update failed: {e}")
+
+        progress = asyncio.create_task(reporter()) if on_progress else None
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, pending.qsize()))))
+        finally:
+            if progress:
+                progress.cancel()
+        return result
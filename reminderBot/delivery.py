@@ -0,0 +1,256 @@
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import discord
+import metrics
+from leader import FENCE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    key TEXT PRIMARY KEY,
+    rem_id TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    message_id INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    fence_token INTEGER
+);
+CREATE INDEX IF NOT EXISTS deliveries_pending ON deliveries (status, next_attempt);
+"""
+
+PENDING, SENT, FAILED = "pending", "sent", "failed"
+
+# Finished deliveries are kept this long (for /deliveries and dedup), then pruned
+DELIVERY_RETENTION = 14 * 86400
+
+DELIVERIES = metrics.counter("reminder_deliveries_total", "Reminder delivery attempts by outcome", ["result"])
+
+# Pending deliveries handed to the workers per dispatcher pass
+DISPATCH_BATCH = 100
+
+
+def delivery_key(rem_id, fire_ts):
+    # Same reminder + same scheduled time = same key, however often it gets enqueued. Also used
+    # as the Discord message nonce (max 25 chars), which Discord enforces as unique for a while.
+    return f"r{rem_id}-{int(fire_ts)}"
+
+
+class DeliveryStore:
+    # Outbound reminder posts, written before the reminder is marked as handled. Enqueueing
+    # the same key twice is a no-op, so a crash between enqueue and saving the reminder state
+    # can't produce a second post.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(deliveries)")}
+        if "fence_token" not in columns:
+            self._db.execute("ALTER TABLE deliveries ADD COLUMN fence_token INTEGER")
+        self._db.execute(
+            "DELETE FROM deliveries WHERE status != 'pending' AND created_at < ?", (time.time() - DELIVERY_RETENTION,)
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def enqueue(self, deliveries, now=None):
+        # deliveries: [(key, rem_id, channel_id, content, due_at)]; returns how many were new
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO deliveries (key, rem_id, channel_id, content, due_at, next_attempt, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(key, rem_id, channel_id, content, due_at, now, now) for key, rem_id, channel_id, content, due_at in deliveries]
+            )
+            return self._db.total_changes - before
+
+    def due(self, now, limit=100):
+        with self._lock:
+            return self._db.execute(
+                "SELECT key, rem_id, channel_id, content, attempts FROM deliveries "
+                "WHERE status = 'pending' AND next_attempt <= ? ORDER BY next_attempt LIMIT ?", (now, limit)
+            ).fetchall()
+
+    def next_attempt_ts(self):
+        with self._lock:
+            row = self._db.execute("SELECT MIN(next_attempt) FROM deliveries WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def claim(self, key, lease_name, token, now):
+        # HA mode: records `token` on the delivery, but only while it still holds the lease
+        # (the lease table lives in this same database). False means don't send.
+        with self._lock:
+            cur = self._db.execute(
+                f"UPDATE deliveries SET fence_token = ? WHERE key = ? AND status = 'pending' AND {FENCE}",
+                (token, key, lease_name, token, now)
+            )
+            return cur.rowcount == 1
+
+    def mark_sent(self, key, message_id):
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET status = ?, message_id = ?, attempts = attempts + 1, error = NULL WHERE key = ?",
+                (SENT, message_id, key)
+            )
+
+    def mark_retry(self, key, next_attempt, error):
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET attempts = attempts + 1, next_attempt = ?, error = ? WHERE key = ?",
+                (next_attempt, error, key)
+            )
+
+    def mark_failed(self, key, error):
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET status = ?, attempts = attempts + 1, error = ? WHERE key = ?", (FAILED, error, key)
+            )
+
+    def counts(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM deliveries GROUP BY status").fetchall())
+
+    def recent_failures(self, limit=10):
+        with self._lock:
+            return self._db.execute(
+                "SELECT key, rem_id, attempts, error FROM deliveries WHERE status = 'failed' "
+                "ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+
+class DeliveryQueue:
+    # Sends pending deliveries on a small worker pool, so one slow or rate-limited channel
+    # doesn't hold up the others. Errors are retried with exponential backoff and jitter
+    # (honouring Discord's retry_after on 429s) until max_attempts, then marked failed.
+    # With a `lease` (a LeaderElector) every send is first claimed under its fencing token.
+
+    def __init__(self, client, store, *, workers=3, max_attempts=8, base_delay=5, max_delay=900, clock=time.time,
+                 lease=None):
+        self.client = client
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.lease = lease
+        self._queue = asyncio.Queue()
+        self._in_flight = set()
+        self._channels = {}
+        self._wake = asyncio.Event()
+        self._tasks = []
+
+    def channel(self, channel_id):
+        # Resolved on first use and kept; a partial messageable needs no API call or cache
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self.client.get_channel(channel_id) or self.client.get_partial_messageable(channel_id)
+            self._channels[channel_id] = channel
+        return channel
+
+    async def enqueue(self, deliveries):
+        added = await asyncio.to_thread(self.store.enqueue, deliveries, self.clock())
+        self._wake.set()
+        return added
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def backoff(self, attempts, retry_after=None):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempts)
+        return max(delay, retry_after or 0) + random.uniform(0, delay / 2)
+
+    async def _dispatch(self):
+        # Feeds due deliveries to the workers, then sleeps until the next retry is due or
+        # something new is enqueued
+        while True:
+            self._wake.clear()
+            rows = await asyncio.to_thread(self.store.due, self.clock(), DISPATCH_BATCH)
+            for row in rows:
+                if row[0] not in self._in_flight:
+                    self._in_flight.add(row[0])
+                    self._queue.put_nowait(row)
+            if len(rows) == DISPATCH_BATCH:
+                # More are already due: fetch them once the workers catch up instead of
+                # sleeping, so a large burst isn't drained 100 per second
+                await self._queue.join()
+                continue
+            next_ts = await asyncio.to_thread(self.store.next_attempt_ts)
+            delay = 300 if next_ts is None else max(1.0, next_ts - self.clock())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(delay, 300))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            key, rem_id, channel_id, content, attempts = await self._queue.get()
+            try:
+                await self._deliver(key, rem_id, channel_id, content, attempts)
+            except Exception as e:
+                print(f"Delivery {key} crashed: {e}")
+            finally:
+                self._in_flight.discard(key)
+                self._queue.task_done()
+
+    async def _deliver(self, key, rem_id, channel_id, content, attempts):
+        if self.lease is not None:
+            token = self.lease.token
+            claimed = token is not None and await asyncio.to_thread(
+                self.store.claim, key, self.lease.name, token, self.lease.clock()
+            )
+            if not claimed:
+                # Left pending for whoever leads now; the nonce covers a send already in the air
+                DELIVERIES.inc(result="fenced")
+                print(f"Delivery {key} not sent: this replica no longer holds the lease")
+                return
+        channel = self.channel(channel_id)
+        try:
+            message = await channel.send(content, nonce=key)
+        except (discord.Forbidden, discord.NotFound) as e:
+            # Retrying won't fix missing access or a deleted channel
+            await asyncio.to_thread(self.store.mark_failed, key, f"{type(e).__name__}: {e}")
+            DELIVERIES.inc(result="failed")
+            print(f"Reminder #{rem_id} delivery {key} failed for good: {e}")
+            return
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempts + 1 >= self.max_attempts:
+                await asyncio.to_thread(self.store.mark_failed, key, error)
+                DELIVERIES.inc(result="failed")
+                print(f"Reminder #{rem_id} delivery {key} gave up after {attempts + 1} attempt(s): {error}")
+                return
+            delay = self.backoff(attempts, getattr(e, "retry_after", None))
+            await asyncio.to_thread(self.store.mark_retry, key, self.clock() + delay, error)
+            DELIVERIES.inc(result="retry")
+            print(f"Reminder #{rem_id} delivery {key} failed ({error}), retrying in {delay:.0f}s")
+            self._wake.set()
+            return
+        await asyncio.to_thread(self.store.mark_sent, key, message.id)
+        DELIVERIES.inc(result="sent")
+        print(f"Sent reminder #{rem_id} ({key})")
@@ -0,0 +1,112 @@
+import json
+from collections import defaultdict
+from collections.abc import Mapping
+from pathlib import Path
+from storage import write_json_atomic
+
+
+class GuildSettings:
+    # Per-guild reminder admins and default reminder channel, in one small JSON file:
+    #   {"<guild_id>": {"admins": [user_id, ...], "reminder_channel_id": 123}}
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._guilds = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                self._guilds = {int(k): v for k, v in json.load(f).items()}
+
+    def _guild(self, guild_id):
+        return self._guilds.setdefault(guild_id, {"admins": [], "reminder_channel_id": None})
+
+    def admins(self, guild_id):
+        return self._guilds.get(guild_id, {}).get("admins", [])
+
+    def is_admin(self, guild_id, user_id):
+        return user_id in self.admins(guild_id)
+
+    def add_admin(self, guild_id, user_id):
+        admins = self._guild(guild_id)["admins"]
+        if user_id in admins:
+            return False
+        admins.append(user_id)
+        return True
+
+    def remove_admin(self, guild_id, user_id):
+        admins = self._guild(guild_id)["admins"]
+        if user_id not in admins:
+            return False
+        admins.remove(user_id)
+        return True
+
+    def reminder_channel(self, guild_id):
+        return self._guilds.get(guild_id, {}).get("reminder_channel_id")
+
+    def set_reminder_channel(self, guild_id, channel_id):
+        self._guild(guild_id)["reminder_channel_id"] = channel_id
+
+    def snapshot(self):
+        return {str(k): json.loads(json.dumps(v)) for k, v in self._guilds.items()}
+
+    def save(self, snapshot=None):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(self.path, snapshot if snapshot is not None else self.snapshot())
+
+
+class GuildReminders(Mapping):
+    # Read view of one guild's reminders: lookups are O(1) and never see other guilds' entries
+
+    def __init__(self, reminders, index, guild_id):
+        self._reminders = reminders
+        self._index = index
+        self._guild_id = guild_id
+
+    def __getitem__(self, rem_id):
+        if rem_id not in self._reminders or self._index.guild_of(rem_id) != self._guild_id:
+            raise KeyError(rem_id)
+        return self._reminders[rem_id]
+
+    def __iter__(self):
+        return iter(self._index.ids(self._guild_id))
+
+    def __len__(self):
+        return self._index.count(self._guild_id)
+
+
+class ReminderIndex:
+    # guild_id -> reminder ids, so per-guild commands only look at that guild's reminders
+
+    def __init__(self):
+        self._by_guild = defaultdict(set)
+        self._guild_of = {}
+
+    def rebuild(self, reminders):
+        self._by_guild.clear()
+        self._guild_of.clear()
+        for rem_id, rem_data in reminders.items():
+            self.add(rem_id, rem_data.get("guild_id"))
+
+    def add(self, rem_id, guild_id):
+        self.remove(rem_id)
+        self._by_guild[guild_id].add(rem_id)
+        self._guild_of[rem_id] = guild_id
+
+    def remove(self, rem_id):
+        if rem_id in self._guild_of:
+            guild_id = self._guild_of.pop(rem_id)
+            self._by_guild[guild_id].discard(rem_id)
+            if not self._by_guild[guild_id]:
+                del self._by_guild[guild_id]
+
+    def ids(self, guild_id):
+        # In creation order, like the old global listing
+        return sorted(self._by_guild.get(guild_id, ()), key=lambda r: int(r) if r.isdigit() else 0)
+
+    def count(self, guild_id):
+        return len(self._by_guild.get(guild_id, ()))
+
+    def view(self, reminders, guild_id):
+        return GuildReminders(reminders, self, guild_id)
+
+    def guild_of(self, rem_id):
+        return self._guild_of.get(rem_id)
@@ -0,0 +1,290 @@
+import asyncio
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+import discord
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER,
+    requested_by INTEGER NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id INTEGER NOT NULL,
+    member_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    reason TEXT,
+    PRIMARY KEY (job_id, member_id)
+);
+"""
+
+# Job states; "running" jobs are picked up again after a restart
+RUNNING, DONE, CANCELLED = "running", "done", "cancelled"
+
+
+class JobStore:
+    # Job records plus one row per target member. A member's row only leaves 'pending' once
+    # the action for it has finished, so that's the checkpoint a resumed job starts from.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Checkpoints are written from worker threads; the lock keeps them one at a time
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def create(self, kind, guild_id, channel_id, requested_by, member_ids, params=None):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            cursor = self._db.execute(
+                "INSERT INTO jobs (kind, guild_id, channel_id, requested_by, params, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, guild_id, channel_id, requested_by, json.dumps(params or {}), RUNNING, now, now)
+            )
+            job_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT OR IGNORE INTO job_items (job_id, member_id) VALUES (?, ?)",
+                [(job_id, member_id) for member_id in member_ids]
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, guild_id, channel_id, message_id, requested_by, params, status, created_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        keys = ("id", "kind", "guild_id", "channel_id", "message_id", "requested_by", "params", "status", "created_at")
+        job = dict(zip(keys, row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def ids_with_status(self, status):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id", (status,))]
+
+    def recent(self, limit=10):
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self.get(row[0]) for row in rows]
+
+    def pending_members(self, job_id):
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT member_id FROM job_items WHERE job_id = ? AND status = 'pending'", (job_id,)
+            )]
+
+    def counts(self, job_id):
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+
+    def failures(self, job_id):
+        with self._lock:
+            return self._db.execute(
+                "SELECT member_id, reason FROM job_items WHERE job_id = ? AND status = 'failed'", (job_id,)
+            ).fetchall()
+
+    def checkpoint(self, job_id, results):
+        # results: [(member_id, status, reason)]
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "UPDATE job_items SET status = ?, reason = ? WHERE job_id = ? AND member_id = ?",
+                [(status, reason, job_id, member_id) for member_id, status, reason in results]
+            )
+            self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def set_message(self, job_id, message_id):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET message_id = ? WHERE id = ?", (message_id, job_id))
+
+    def set_status(self, job_id, status):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (status, time.time(), job_id))
+
+
+async def kick_member(guild, member_id, params):
+    await guild.kick(discord.Object(id=member_id), reason=params.get("reason"))
+
+
+# kind -> async action(guild, member_id, params); raising discord.NotFound counts as already done
+ACTIONS = {
+    "kick": kick_member,
+}
+
+
+class JobRunner:
+    # Runs bulk moderation jobs in the background, independent of the interaction that started
+    # them (whose token expires after 15 minutes). Progress lives in a normal channel message
+    # that gets edited, and every few seconds the finished members are checkpointed, so a
+    # restarted bot resumes from where it stopped instead of starting over.
+
+    def __init__(self, client, store, *, workers=2, max_retries=3, progress_interval=5.0):
+        self.client = client
+        self.store = store
+        # Kicks and role edits share one rate-limit bucket per guild, so more workers only queue
+        self.workers = workers
+        self.max_retries = max_retries
+        self.progress_interval = progress_interval
+        self._tasks = {}
+
+    def is_running(self, job_id):
+        task = self._tasks.get(job_id)
+        return task is not None and not task.done()
+
+    async def submit(self, kind, guild, channel, requested_by, member_ids, params=None):
+        job_id = await asyncio.to_thread(
+            self.store.create, kind, guild.id, channel.id, requested_by, member_ids, params
+        )
+        self.start(job_id)
+        return job_id
+
+    def start(self, job_id):
+        if not self.is_running(job_id):
+            self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    def resume_all(self):
+        job_ids = self.store.ids_with_status(RUNNING)
+        for job_id in job_ids:
+            self.start(job_id)
+        return len(job_ids)
+
+    async def cancel(self, job_id):
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self.store.set_status, job_id, CANCELLED)
+
+    async def close(self):
+        # Stops workers without marking jobs finished, so they resume on the next start
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _act(self, action, guild, member_id, params):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await action(guild, member_id, params)
+                return "done", None
+            except discord.NotFound:
+                return "skipped", "not in the server"
+            except discord.Forbidden as e:
+                return "failed", f"missing permissions: {e.text or e}"
+            except discord.HTTPException as e:
+                if attempt == self.max_retries or (e.status != 429 and e.status < 500):
+                    return "failed", f"HTTP {e.status}: {e.text or e}"
+                retry_after = getattr(e, "retry_after", None) or 0
+                await asyncio.sleep(max(retry_after, 2 ** attempt) + random.uniform(0, 1))
+
+    def _progress_text(self, job, counts, finished=False):
+        done = counts.get("done", 0)
+        skipped = counts.get("skipped", 0)
+        failed = counts.get("failed", 0)
+        total = sum(counts.values())
+        verb = {"kick": "Kicked"}.get(job["kind"], "Processed")
+        header = f"✅ **Job #{job['id']}** ({job['kind']}) finished" if finished else f"⏳ **Job #{job['id']}** ({job['kind']}) running"
+        return (
+            f"{header}: {done + skipped + failed}/{total}\n"
+            f"{verb} **{done}** | ➖ {skipped} already gone | ❌ {failed} failed"
+        )
+
+    async def _update_message(self, job, text):
+        channel = self.client.get_channel(job["channel_id"]) or self.client.get_partial_messageable(job["channel_id"])
+        try:
+            if job["message_id"]:
+                try:
+                    await channel.get_partial_message(job["message_id"]).edit(content=text)
+                    return
+                except discord.NotFound:
+                    pass
+            message = await channel.send(text)
+            job["message_id"] = message.id
+            await asyncio.to_thread(self.store.set_message, job["id"], message.id)
+        except discord.HTTPException as e:
+            print(f"Job #{job['id']} progress update failed: {e}")
+
+    async def _run(self, job_id):
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if not job or job["status"] != RUNNING:
+            return
+        action = ACTIONS.get(job["kind"])
+        guild = self.client.get_guild(job["guild_id"])
+        if not action or not guild:
+            print(f"Job #{job_id}: cannot run ({'unknown kind' if not action else 'guild unavailable'}), leaving it for later")
+            return
+
+        pending = asyncio.Queue()
+        for member_id in await asyncio.to_thread(self.store.pending_members, job_id):
+            pending.put_nowait(member_id)
+        finished = []
+
+        async def flush():
+            if finished:
+                batch = finished[:]
+                del finished[:]
+                await asyncio.to_thread(self.store.checkpoint, job_id, batch)
+            counts = await asyncio.to_thread(self.store.counts, job_id)
+            return counts
+
+        async def worker():
+            while True:
+                try:
+                    member_id = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                status, reason = await self._act(action, guild, member_id, job["params"])
+                finished.append((member_id, status, reason))
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(self.progress_interval)
+                counts = await flush()
+                await self._update_message(job, self._progress_text(job, counts))
+
+        print(f"Job #{job_id} ({job['kind']}): {pending.qsize()} member(s) to go")
+        await self._update_message(job, self._progress_text(job, await flush()))
+        progress = asyncio.create_task(reporter())
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, pending.qsize()))))
+        finally:
+            progress.cancel()
+            # Checkpoint what finished even when cancelled (shutdown), so it isn't redone
+            await asyncio.shield(flush())
+
+        await asyncio.to_thread(self.store.set_status, job_id, DONE)
+        text = self._progress_text(job, await flush(), finished=True)
+        failures = await asyncio.to_thread(self.store.failures, job_id)
+        if failures:
+            listed = "\n".join(f"{member_id}: {reason}" for member_id, reason in failures[:20])
+            more = f"\n...and {len(failures) - 20} more" if len(failures) > 20 else ""
+            text += f"\n```\n{listed}{more}\n```"
+        await self._update_message(job, text[:2000])
+        print(f"Job #{job_id} finished")
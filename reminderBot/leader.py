@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Leader election for running several reminderBot replicas against the same data directory:
+# they compete for a lease row in SQLite, only the holder runs the scheduler and sends, and a
+# standby takes over once the holder stops renewing it.
+#
+# Every change of hands bumps the lease's token. Writes that must only come from the leader
+# (claiming a delivery before posting it) check the token in the same statement, so a replica
+# that was paused past its lease (GC, SIGSTOP, a hung disk) and wakes up still believing it
+# leads can't post late: its token is no longer the current one.
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    token INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# SQL condition that is true only while `token` holds an unexpired lease `name`;
+# parameters: (name, token, now)
+FENCE = "EXISTS (SELECT 1 FROM leases WHERE name = ? AND token = ? AND expires_at > ?)"
+
+
+def default_holder():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseStore:
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=10)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(LEASE_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def acquire(self, name, holder, ttl, now=None):
+        # Takes the lease if it is free or expired, or renews it if `holder` already has it.
+        # Returns the token, or None while another replica holds it.
+        now = time.time() if now is None else now
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two replicas can't both see it expired
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT holder, token, expires_at FROM leases WHERE name = ?", (name,)
+                ).fetchone()
+                if row is None:
+                    token = 1
+                    self._db.execute(
+                        "INSERT INTO leases (name, holder, token, expires_at) VALUES (?, ?, ?, ?)",
+                        (name, holder, token, now + ttl)
+                    )
+                elif row[0] == holder and row[2] > now:
+                    token = row[1]
+                    self._db.execute("UPDATE leases SET expires_at = ? WHERE name = ?", (now + ttl, name))
+                elif row[2] <= now:
+                    # Expired, even if it was ours: whatever ran under the old token is fenced off
+                    token = row[1] + 1
+                    self._db.execute(
+                        "UPDATE leases SET holder = ?, token = ?, expires_at = ? WHERE name = ?",
+                        (holder, token, now + ttl, name)
+                    )
+                else:
+                    token = None
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return token
+
+    def release(self, name, holder):
+        # Expires the lease right away (keeping its token) so a standby doesn't wait out the TTL
+        with self._lock:
+            self._db.execute("UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ?", (name, holder))
+
+    def current(self, name):
+        # (holder, token, expires_at) or None
+        with self._lock:
+            return self._db.execute(
+                "SELECT holder, token, expires_at FROM leases WHERE name = ?", (name,)
+            ).fetchone()
+
+
+class LeaderElector:
+    # Tries to take the lease every `heartbeat` seconds and renews it while leading. A leader
+    # that can't renew steps down `ttl` seconds after its last successful renewal, which is no
+    # later than the lease expiring for everyone else. A standby takes over at most
+    # ttl + heartbeat seconds after the leader dies (heartbeat seconds if it shut down cleanly).
+
+    def __init__(self, store, name, holder=None, *, ttl=15.0, heartbeat=None, on_elected=None, on_demoted=None,
+                 clock=time.time):
+        self.store = store
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+        self.heartbeat = heartbeat or ttl / 3
+        if self.heartbeat >= ttl:
+            raise ValueError("heartbeat must be shorter than the lease ttl")
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.clock = clock
+        self.token = None
+        self._valid_until = 0.0
+        self._task = None
+
+    @property
+    def is_leader(self):
+        return self.token is not None and time.monotonic() < self._valid_until
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.token is not None:
+            await self._demote("shutting down")
+            try:
+                await asyncio.to_thread(self.store.release, self.name, self.holder)
+            except Exception as e:
+                print(f"Failed to release the {self.name} lease: {e}")
+
+    async def _run(self):
+        while True:
+            # Measured before the call, so a slow write can only shorten how long we think we lead
+            started = time.monotonic()
+            try:
+                token = await asyncio.to_thread(self.store.acquire, self.name, self.holder, self.ttl, self.clock())
+            except Exception as e:
+                print(f"Lease {self.name}: renewal failed ({e})")
+                if self.token is not None and time.monotonic() >= self._valid_until:
+                    await self._demote("could not renew the lease in time")
+            else:
+                if token is None:
+                    if self.token is not None:
+                        await self._demote("another replica holds the lease")
+                elif token != self.token:
+                    if self.token is not None:
+                        await self._demote("the lease changed hands")
+                    self._valid_until = started + self.ttl
+                    self.token = token
+                    print(f"👑 {self.holder} is now the leader for {self.name} (token {token})")
+                    if self.on_elected:
+                        await self.on_elected(token)
+                else:
+                    self._valid_until = started + self.ttl
+            delay = self.heartbeat
+            if self.token is not None:
+                delay = max(0.0, min(delay, self._valid_until - time.monotonic()))
+            await asyncio.sleep(delay)
+
+    async def _demote(self, reason):
+        self.token = None
+        print(f"⬇️ {self.holder} stepped down as leader for {self.name}: {reason}")
+        if self.on_demoted:
+            await self.on_demoted()
+
+
+# Local failover check, no Discord needed. Start a few replicas on the same file:
+#     python leader.py --db /tmp/ha.db & python leader.py --db /tmp/ha.db & python leader.py --db /tmp/ha.db
+# One leads and writes a fenced row every second; kill it (or SIGSTOP it, or pass --stall) and
+# another takes over. A stalled ex-leader's writes are rejected when it wakes up, and the
+# final table shows every row came from the token that held the lease at the time.
+
+DEMO_SCHEMA = "CREATE TABLE IF NOT EXISTS lease_demo (seq INTEGER PRIMARY KEY, holder TEXT, token INTEGER, at REAL)"
+
+
+def demo_write(db, name, holder, token):
+    cur = db.execute(
+        f"INSERT INTO lease_demo (holder, token, at) SELECT ?, ?, ? WHERE {FENCE}",
+        (holder, token, time.time(), name, token, time.time())
+    )
+    return cur.rowcount == 1
+
+
+async def demo(args):
+    store = LeaseStore(args.db)
+    db = sqlite3.connect(args.db, isolation_level=None, timeout=10)
+    db.execute(DEMO_SCHEMA)
+    elector = LeaderElector(store, "demo", ttl=args.ttl)
+    elector.start()
+    stalled = False
+    try:
+        for _ in range(int(args.seconds)):
+            await asyncio.sleep(1)
+            token = elector.token
+            if token is None:
+                continue
+            if args.stall and not stalled:
+                # Blocks the whole process, heartbeat included, like a long GC pause would
+                stalled = True
+                print(f"{elector.holder} stalling for {args.stall:g}s with token {token}")
+                time.sleep(args.stall)
+            if demo_write(db, "demo", elector.holder, token):
+                print(f"{elector.holder} wrote with token {token}")
+            else:
+                print(f"🚫 {elector.holder} write with token {token} fenced off")
+    finally:
+        await elector.close()
+        rows = db.execute("SELECT token, holder, COUNT(*) FROM lease_demo GROUP BY token, holder ORDER BY token").fetchall()
+        print("token  holder                      rows")
+        for token, holder, count in rows:
+            print(f"{token:<6} {holder:<27} {count}")
+        db.close()
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one replica of the lease failover demo")
+    parser.add_argument("--db", default="data/lease_demo.db")
+    parser.add_argument("--ttl", type=float, default=6)
+    parser.add_argument("--seconds", type=float, default=60, help="how long this replica runs")
+    parser.add_argument("--stall", type=float, default=0, help="block the process this long once it leads")
+    asyncio.run(demo(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import resource
+import sys
+import time
+from collections import OrderedDict
+import discord
+
+log = logging.getLogger(__name__)
+
+def client_options(policy):
+    # Client kwargs for a member cache policy:
+    #   full - cache every member and chunk all guilds at startup (discord.py's default)
+    #   lean - cache nobody but the bot itself and never chunk at startup; role holders are
+    #          looked up on demand
+    if policy == "lean":
+        return {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+    return {}
+
+
+def rss_mb():
+    # Current resident set size; falls back to the peak where /proc isn't available
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def cache_report(client, started_at, started_rss):
+    # Time and memory from process start to now, with how much of the member list is cached
+    cached = sum(len(g.members) for g in client.guilds)
+    total = sum(g.member_count or 0 for g in client.guilds)
+    return (
+        f"ready in {time.monotonic() - started_at:.1f}s, RSS {started_rss:.0f} -> {rss_mb():.0f} MB, "
+        f"{cached}/{total} member(s) cached across {len(client.guilds)} guild(s)"
+    )
+
+
+class RoleMemberCache:
+    # Member ids per tracked role, for when the member cache is off. One gateway chunk request
+    # for the guild (a single request answered in 1,000-member chunks, rather than a REST page
+    # per 1,000 members) fills every tracked role at once. The Member objects are dropped right
+    # after, so only the ids of tracked role holders stay, in a bounded LRU refetched after `ttl`.
+
+    def __init__(self, role_ids, *, ttl=600, max_entries=64, clock=time.monotonic):
+        self.role_ids = set(role_ids)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()  # (guild_id, role_id) -> (fetched_at, set of member ids)
+        self._fills = {}  # guild_id -> the in-flight _fill task, shared by everyone waiting on it
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or self.clock() - entry[0] > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key, member_ids, fetched_at):
+        self._entries[key] = (fetched_at, member_ids)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _fill(self, guild):
+        fetched_at = self.clock()
+        started, rss_before = time.monotonic(), rss_mb()
+        holders = {role_id: set() for role_id in self.role_ids}
+        # cache=False: the members come back to us without going into the client's cache
+        members = await guild.chunk(cache=False)
+        scanned = len(members)
+        for member in members:
+            for role_id, member_ids in holders.items():
+                if member.get_role(role_id):
+                    member_ids.add(member.id)
+        del members
+        for role_id, member_ids in holders.items():
+            self._put((guild.id, role_id), member_ids, fetched_at)
+        log.info(
+            "Looked up role holders in %s: %d member(s) in %.1fs, %d kept, RSS %.0f -> %.0f MB",
+            guild.name, scanned, time.monotonic() - started, sum(map(len, holders.values())), rss_before, rss_mb()
+        )
+
+    async def _fill_once(self, guild):
+        # Concurrent misses for one guild wait on a single chunk request instead of each sending one
+        task = self._fills.get(guild.id)
+        if task is None:
+            task = asyncio.create_task(self._fill(guild))
+            self._fills[guild.id] = task
+            task.add_done_callback(lambda _: self._fills.pop(guild.id, None))
+        # Shielded so one caller giving up doesn't cancel the fill for the others
+        await asyncio.shield(task)
+
+    async def member_ids(self, guild, role_id):
+        # Cached members are authoritative when the full cache is on
+        if guild.chunked:
+            role = guild.get_role(role_id)
+            return [m.id for m in role.members] if role else []
+        if role_id not in self.role_ids:
+            raise ValueError(f"role {role_id} is not tracked")
+        member_ids = self._get((guild.id, role_id))
+        if member_ids is None:
+            await self._fill_once(guild)
+            member_ids = self._get((guild.id, role_id))
+        return list(member_ids)
+
+    # Keep entries current with changes the bot makes or sees, so the TTL only has to cover
+    # edits made by other bots and users
+    def role_added(self, guild_id, role_id, member_id):
+        member_ids = self._get((guild_id, role_id))
+        if member_ids is not None:
+            member_ids.add(member_id)
+
+    def member_removed(self, guild_id, member_id):
+        for (entry_guild, _), (_, member_ids) in self._entries.items():
+            if entry_guild == guild_id:
+                member_ids.discard(member_id)
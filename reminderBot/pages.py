@@ -0,0 +1,140 @@
+import bisect
+import re
+import discord
+
+# Discord rejects messages over 2000 characters; leave room for the page footer
+PAGE_LIMIT = 1900
+
+TOKEN_RE = re.compile(r"[\w:@*/,-]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def paginate(entries, header="", limit=PAGE_LIMIT):
+    # Packs entries into as few pages as fit under `limit`; an entry too long for one page
+    # is split across several
+    room = limit - len(header)
+    pages = []
+    current = header
+    for entry in entries:
+        chunks = [entry[i:i + room] for i in range(0, len(entry), room)] or [""]
+        for chunk in chunks:
+            if len(current) + len(chunk) > limit and current != header:
+                pages.append(current)
+                current = header
+            current += chunk
+    pages.append(current)
+    return pages
+
+
+class _GuildPages:
+    def __init__(self, entries, search_texts, header):
+        # entries: {rem_id: rendered text}, in display order
+        self.entries = entries
+        self.pages = paginate(entries.values(), header)
+        postings = {}
+        for rem_id, text in search_texts.items():
+            for token in set(tokenize(text)):
+                postings.setdefault(token, set()).add(rem_id)
+        self.tokens = sorted(postings)
+        self.postings = postings
+
+    def search(self, query):
+        # Reminder ids matching every query word; a word matches any token starting with it
+        matches = None
+        for word in tokenize(query):
+            found = set()
+            start = bisect.bisect_left(self.tokens, word)
+            for token in self.tokens[start:]:
+                if not token.startswith(word):
+                    break
+                found |= self.postings[token]
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return [rem_id for rem_id in self.entries if rem_id in (matches or ())]
+
+
+class ReminderPageCache:
+    # Pre-rendered /listreminders pages and a search index per guild. Both are rebuilt only
+    # after that guild's reminders change, so paging and searching don't re-render anything.
+
+    def __init__(self, render, header=""):
+        # render(guild_id) -> ({rem_id: entry text}, {rem_id: searchable text})
+        self.render = render
+        self.header = header
+        self._guilds = {}
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def _get(self, guild_id):
+        cached = self._guilds.get(guild_id)
+        if cached is None:
+            entries, search_texts = self.render(guild_id)
+            cached = self._guilds[guild_id] = _GuildPages(entries, search_texts, self.header)
+        return cached
+
+    def count(self, guild_id):
+        return len(self._get(guild_id).entries)
+
+    def pages(self, guild_id):
+        return self._get(guild_id).pages
+
+    def search(self, guild_id, query, header=""):
+        cached = self._get(guild_id)
+        rem_ids = cached.search(query)
+        return rem_ids, paginate([cached.entries[r] for r in rem_ids], header)
+
+
+class PageView(discord.ui.View):
+    # ◀ / ▶ buttons over a list of pages; only the user who ran the command can flip them
+
+    def __init__(self, pages, owner_id, timeout=300):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.owner_id = owner_id
+        self.index = 0
+        self._sync_buttons()
+
+    def content(self):
+        page = self.pages[self.index]
+        if len(self.pages) > 1:
+            page += f"\n-# Page {self.index + 1}/{len(self.pages)}"
+        return page
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.index == 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ These buttons belong to someone else.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction, index):
+        self.index = max(0, min(index, len(self.pages) - 1))
+        self._sync_buttons()
+        await interaction.response.edit_message(content=self.content(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self._show(interaction, self.index + 1)
+
+
+async def send_pages(interaction, pages, **kwargs):
+    # One page goes out as a plain message; more get the buttons
+    if len(pages) == 1:
+        return await interaction.response.send_message(pages[0], ephemeral=True, **kwargs)
+    view = PageView(pages, interaction.user.id)
+    await interaction.response.send_message(view.content(), view=view, ephemeral=True, **kwargs)
@@ -0,0 +1,82 @@
+import asyncio
+
+
+class WriteBehindPersister:
+    # Commands only mark reminders dirty. A background task waits `window` seconds after the
+    # first change, then writes everything that changed in that window in one go, on a worker
+    # thread, so slash commands never wait on the disk.
+
+    def __init__(self, store, state, window=2.0):
+        self.store = store
+        self.state = state
+        self.window = window
+        self._dirty = set()
+        self._deleted = set()
+        self._all = False
+        self._changed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def pending(self):
+        return self._all or bool(self._dirty or self._deleted)
+
+    def mark(self, rem_ids=None, deleted=()):
+        # rem_ids=None means everything changed
+        if rem_ids is None:
+            self._all = True
+        else:
+            self._dirty.update(rem_ids)
+        self._dirty.difference_update(deleted)
+        self._deleted.update(deleted)
+        self._changed.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._changed.wait()
+            await asyncio.sleep(self.window)
+            # Shielded so close() can't cancel a write halfway; it waits on the lock instead
+            await asyncio.shield(self.flush())
+
+    def _snapshot(self):
+        # Copy what needs writing while still on the event loop, so the worker thread never
+        # sees a half-applied command
+        reminders = self.state.get("reminders", {})
+        if self._all or not getattr(self.store, "partial_writes", False):
+            ids = None
+            copied = {rem_id: dict(rem_data) for rem_id, rem_data in reminders.items()}
+        else:
+            ids = [rem_id for rem_id in self._dirty if rem_id in reminders]
+            copied = {rem_id: dict(reminders[rem_id]) for rem_id in ids}
+        snapshot = {"reminders": copied, "next_id": self.state.get("next_id", 1)}
+        return snapshot, ids, sorted(self._deleted)
+
+    async def flush(self):
+        async with self._lock:
+            self._changed.clear()
+            if not self.pending:
+                return
+            snapshot, ids, deleted = self._snapshot()
+            self._dirty.clear()
+            self._deleted.clear()
+            self._all = False
+            try:
+                await asyncio.to_thread(self.store.save, snapshot, ids, deleted)
+            except Exception as e:
+                print(f"Failed to save state: {e}")
+                # Keep it dirty so the next window retries
+                self.mark(ids, deleted)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
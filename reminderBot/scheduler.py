@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from datetime import datetime
+from delivery import delivery_key
+from schedules import compile_schedule, legacy_schedule
+
+# Upper bound on a single sleep, so clock jumps (suspend, manual changes) are noticed
+MAX_SLEEP = 300
+
+
+# What to do with fire times missed by more than the grace period (e.g. the bot was down):
+#   once - send one catch-up post; skip - send nothing, wait for the next fire; all - send every one
+CATCHUP_POLICIES = ("once", "skip", "all")
+
+
+def _compiled(rem_data, default_tz):
+    return compile_schedule(rem_data.get("schedule") or legacy_schedule(rem_data),
+                            rem_data.get("timezone") or default_tz)
+
+
+def next_fire(rem_data, now, default_tz="UTC"):
+    # Next timestamp this reminder should go out, or None if it never will.
+    # A result in the past means it is due right now.
+    if not rem_data.get("enabled", True):
+        return None
+    schedule = _compiled(rem_data, default_tz)
+    return schedule.next_fire(rem_data.get("last_sent", 0), rem_data.get("schedule_since", 0), now)
+
+
+def fires_between(rem_data, first_ts, now, default_tz="UTC", keep=24, max_steps=100_000):
+    # The last `keep` fire times from first_ts up to now, plus the first fire time after now
+    schedule = _compiled(rem_data, default_tz)
+    fires = deque([first_ts], maxlen=keep)
+    ts = first_ts
+    for _ in range(max_steps):
+        ts = schedule.next_fire(ts, 0, ts)
+        if ts is None or ts > now:
+            break
+        fires.append(ts)
+    return list(fires), ts
+
+
+def collect_due(scheduler, reminders, now, channel_for, policy="once", grace=300, limit=24, due=None):
+    # One reminder_checker pass over everything due by now (or the given pop_due() result).
+    # Returns the deliveries to enqueue, [(key, rem_id, channel_id, content, due_at)], and the
+    # reminder ids they cover.
+    deliveries = []
+    handled = []
+    for rem_id, fire_ts in scheduler.pop_due(now) if due is None else due:
+        rem_data = reminders.get(rem_id)
+        if not rem_data:
+            continue
+        channel_id = channel_for(rem_data)
+        if not channel_id:
+            print(f"Reminder #{rem_id} has no channel to post in (guild {rem_data.get('guild_id')}); checking again later")
+            scheduler.defer(rem_id, 300)
+            continue
+        fires = scheduler.catch_up(rem_id, rem_data, fire_ts, now, policy, grace, limit)
+        if not fires:
+            print(f"Skipped missed reminder #{rem_id} (catch-up policy: {policy})")
+            continue
+        for ts in fires:
+            deliveries.append((delivery_key(rem_id, ts), rem_id, channel_id, rem_data["message"], ts))
+        handled.append(rem_id)
+    return deliveries, handled
+
+
+def mark_handled(scheduler, reminders, handled, now):
+    # Record the send and queue each reminder's next run
+    sent_date = datetime.fromtimestamp(now).strftime("%Y-%m-%d")
+    for rem_id in handled:
+        rem_data = reminders[rem_id]
+        rem_data["last_sent"] = int(now)
+        rem_data["last_sent_date"] = sent_date
+        scheduler.reschedule(rem_id, rem_data)
+
+
+class ReminderScheduler:
+    # Min-heap of (fire timestamp, version, reminder id). Each reminder's next fire time is
+    # computed once; edits give it a new version so stale heap entries are skipped lazily.
+
+    def __init__(self, clock=time.time, default_tz="UTC", on_defer=None):
+        self.clock = clock
+        self.default_tz = default_tz
+        # Called with the reminder id whenever defer() moves its fire time
+        self.on_defer = on_defer
+        self._heap = []
+        self._versions = {}
+        self._fire_ts = {}
+        self._counter = itertools.count(1)
+        self._wake = asyncio.Event()
+
+    def __len__(self):
+        return len(self._versions)
+
+    def rebuild(self, reminders):
+        self._heap = []
+        self._versions = {}
+        self._fire_ts = {}
+        for rem_id, rem_data in reminders.items():
+            self.reschedule(rem_id, rem_data)
+
+    def reschedule(self, rem_id, rem_data):
+        version = next(self._counter)
+        try:
+            fire_ts = next_fire(rem_data, self.clock(), self.default_tz)
+        except (ValueError, TypeError) as e:
+            print(f"Cannot schedule reminder #{rem_id}: {e}")
+            fire_ts = None
+
+        if fire_ts is None:
+            self.remove(rem_id)
+            return None
+        self._versions[rem_id] = version
+        self._fire_ts[rem_id] = fire_ts
+        heapq.heappush(self._heap, (fire_ts, version, rem_id))
+        self._wake.set()
+        return fire_ts
+
+    def defer(self, rem_id, delay):
+        # Try again after `delay` seconds without recomputing the schedule (failed sends)
+        version = next(self._counter)
+        self._versions[rem_id] = version
+        self._fire_ts[rem_id] = self.clock() + delay
+        heapq.heappush(self._heap, (self._fire_ts[rem_id], version, rem_id))
+        self._wake.set()
+        if self.on_defer:
+            self.on_defer(rem_id)
+
+    def restore(self, due):
+        # Puts pop_due() entries back with their original fire times, for a pass that failed
+        # before its deliveries were safely queued
+        for rem_id, fire_ts in due:
+            version = next(self._counter)
+            self._versions[rem_id] = version
+            self._fire_ts[rem_id] = fire_ts
+            heapq.heappush(self._heap, (fire_ts, version, rem_id))
+        self._wake.set()
+
+    def remove(self, rem_id):
+        # Any queued entry no longer matches a live version and is dropped when it surfaces
+        self._fire_ts.pop(rem_id, None)
+        if self._versions.pop(rem_id, None) is not None:
+            self._wake.set()
+
+    def _prune(self):
+        while self._heap and self._versions.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def fire_ts(self, rem_id):
+        # When this reminder is scheduled to go out, or None
+        return self._fire_ts.get(rem_id)
+
+    def next_fire_ts(self):
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        # [(rem_id, scheduled fire timestamp)] for everything due by now
+        now = self.clock() if now is None else now
+        due = []
+        self._prune()
+        while self._heap and self._heap[0][0] <= now:
+            fire_ts, _, rem_id = heapq.heappop(self._heap)
+            del self._versions[rem_id]
+            self._fire_ts.pop(rem_id, None)
+            due.append((rem_id, fire_ts))
+            self._prune()
+        return due
+
+    def catch_up(self, rem_id, rem_data, fire_ts, now, policy="once", grace=300, limit=24):
+        # Fire times to deliver for a reminder that came due at fire_ts. Within `grace` seconds
+        # it's just on time; beyond that the catch-up policy decides. With "skip" (or nothing
+        # left to send) the reminder is parked until its next fire time after now. A reminder
+        # that was never sent has nothing to catch up on: it is simply due once.
+        if now - fire_ts <= grace or policy == "once" or not rem_data.get("last_sent"):
+            return [fire_ts]
+        fires, upcoming = fires_between(rem_data, fire_ts, now, self.default_tz, keep=limit)
+        if policy == "all":
+            return fires
+        if upcoming is not None:
+            self.defer(rem_id, upcoming - now)
+        return []
+
+    async def wait_until_due(self):
+        # Sleep until the earliest reminder is due, or until the schedule changes
+        while True:
+            self._wake.clear()
+            fire_ts = self.next_fire_ts()
+            delay = MAX_SLEEP if fire_ts is None else min(MAX_SLEEP, fire_ts - self.clock())
+            if delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
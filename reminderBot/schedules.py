@@ -0,0 +1,227 @@
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+DOW_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+CRON_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+INTERVAL_RE = re.compile(r"^every\s+(?:(\d+)\s+)?days?(?:\s+at\s+(\d{1,2}):(\d{2}))?$")
+
+# A cron expression that never matches (e.g. "0 0 30 2 *") gives up after this many steps
+MAX_CRON_STEPS = 2000
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"unknown timezone {name!r}")
+
+
+def _next_bit(mask, start):
+    # Lowest set bit >= start, or None
+    rest = mask >> start
+    if not rest:
+        return None
+    return start + (rest & -rest).bit_length() - 1
+
+
+def _parse_field(text, low, high, names=None):
+    mask = 0
+    for part in text.split(","):
+        value, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"bad step in {part!r}")
+        if value == "*":
+            start, end = low, high
+        else:
+            first, _, last = value.partition("-")
+            start = _parse_value(first, names)
+            end = _parse_value(last, names) if last else (high if step > 1 else start)
+        if not (low <= start <= end <= high):
+            raise ValueError(f"{part!r} is outside {low}-{high}")
+        for v in range(start, end + 1, step):
+            mask |= 1 << v
+    return mask
+
+
+def _parse_value(text, names):
+    if names and text.lower() in names:
+        return names[text.lower()]
+    if not text.isdigit():
+        raise ValueError(f"bad value {text!r}")
+    return int(text)
+
+
+class CronSchedule:
+    # Standard 5-field cron (minute hour day-of-month month day-of-week), evaluated in the
+    # reminder's timezone. Each field is a bitset, so finding the next match is a handful of
+    # lowest-set-bit lookups per field instead of a minute-by-minute scan.
+
+    def __init__(self, expr, tz):
+        self.expr = expr
+        self.tz = tz
+        fields = CRON_ALIASES.get(expr.strip().lower(), expr).split()
+        if len(fields) != 5:
+            raise ValueError("cron needs 5 fields: minute hour day month weekday")
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES)
+        dow = _parse_field(fields[4], 0, 7, DOW_NAMES)
+        self.dow = (dow | (dow >> 7)) & 0x7F  # 7 is another way to write Sunday
+        # Like cron: if both day fields are restricted a day matching either one counts
+        self.dom_star = fields[2].startswith("*")
+        self.dow_star = fields[4].startswith("*")
+        # For a month starting on weekday w (0=Sunday), the days of that month matching dow
+        self._dow_by_first = []
+        for first in range(7):
+            mask = 0
+            for day in range(1, 32):
+                if self.dow >> ((first + day - 1) % 7) & 1:
+                    mask |= 1 << day
+            self._dow_by_first.append(mask)
+
+    def _day_mask(self, year, month):
+        if self.dow_star:
+            mask = self.days
+        else:
+            dow_mask = self._dow_by_first[(date(year, month, 1).weekday() + 1) % 7]
+            mask = dow_mask if self.dom_star else self.days | dow_mask
+        days_in_month = ((date(year + month // 12, month % 12 + 1, 1)) - date(year, month, 1)).days
+        return mask & ((1 << (days_in_month + 1)) - 1)
+
+    def _next_wall(self, wall):
+        # Earliest matching wall-clock minute strictly after `wall` (naive local time)
+        t = wall.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        year, month, day, hour, minute = t.year, t.month, t.day, t.hour, t.minute
+        for _ in range(MAX_CRON_STEPS):
+            m = _next_bit(self.months, month)
+            if m is None:
+                year, month, day, hour, minute = year + 1, 1, 1, 0, 0
+                continue
+            if m != month:
+                month, day, hour, minute = m, 1, 0, 0
+            d = _next_bit(self._day_mask(year, month), day)
+            if d is None:
+                year, month, day, hour, minute = (year + 1, 1, 1, 0, 0) if month == 12 else (year, month + 1, 1, 0, 0)
+                continue
+            if d != day:
+                day, hour, minute = d, 0, 0
+            h = _next_bit(self.hours, hour)
+            if h is None:
+                nxt = date(year, month, day) + timedelta(days=1)
+                year, month, day, hour, minute = nxt.year, nxt.month, nxt.day, 0, 0
+                continue
+            if h != hour:
+                hour, minute = h, 0
+            mi = _next_bit(self.minutes, minute)
+            if mi is None:
+                hour, minute = hour + 1, 0
+                if hour == 24:
+                    nxt = date(year, month, day) + timedelta(days=1)
+                    year, month, day, hour = nxt.year, nxt.month, nxt.day, 0
+                continue
+            return datetime(year, month, day, hour, mi)
+        return None
+
+    def next_after(self, ts):
+        # Next fire timestamp after ts. A time skipped by a DST jump fires right after the
+        # jump; a time that happens twice (clocks going back) fires only the first time.
+        wall = datetime.fromtimestamp(ts, self.tz).replace(tzinfo=None)
+        for _ in range(MAX_CRON_STEPS):
+            wall = self._next_wall(wall)
+            if wall is None:
+                return None
+            fire_ts = wall.replace(tzinfo=self.tz).timestamp()
+            if fire_ts > ts:
+                return fire_ts
+        return None
+
+    def next_fire(self, last_sent, since, now):
+        # Next run after the last send (or after the schedule was set), so a run missed while
+        # the bot was down still goes out once
+        return self.next_after(max(last_sent, since) or now)
+
+    def describe(self):
+        return f"cron `{self.expr}`"
+
+
+class IntervalSchedule:
+    # "every N days [at HH:MM]": with a time, it fires at that local time once N calendar days
+    # have passed since the last send; without one, N*24h after the last send or the schedule
+    # change, whichever is later. Never sent, it is due as soon as the schedule is set.
+
+    def __init__(self, days, at, tz):
+        if days < 1:
+            raise ValueError("days must be 1 or higher")
+        self.days = days
+        self.at = at
+        self.tz = tz
+
+    def next_fire(self, last_sent, since, now):
+        if self.at is None:
+            if not last_sent:
+                return since or now
+            return max(last_sent, since) + self.days * 86400
+        day = datetime.fromtimestamp(now, self.tz).date()
+        if last_sent:
+            day = max(day, datetime.fromtimestamp(last_sent, self.tz).date() + timedelta(days=self.days))
+        return datetime.combine(day, self.at, tzinfo=self.tz).timestamp()
+
+    def describe(self):
+        text = "every day" if self.days == 1 else f"every {self.days} days"
+        return f"{text} at {self.at.strftime('%H:%M')}" if self.at else text
+
+
+@lru_cache(maxsize=1024)
+def compile_schedule(text, tz_name):
+    # Parsed once per (schedule, timezone) and shared by every reminder that uses it
+    tz = get_zone(tz_name)
+    text = " ".join(text.lower().split())
+    match = INTERVAL_RE.match(text)
+    if match:
+        days, hours, minutes = match.groups()
+        at = None
+        if hours is not None:
+            if int(hours) > 23 or int(minutes) > 59:
+                raise ValueError(f"bad time {hours}:{minutes}")
+            at = datetime.strptime(f"{hours}:{minutes}", "%H:%M").time()
+        return IntervalSchedule(int(days or 1), at, tz)
+    return CronSchedule(text, tz)
+
+
+def schedule_since_for(schedule, last_sent, now):
+    # schedule_since for a schedule set at `now`: cron schedules don't fire for times before it,
+    # while an interval that has gone out before keeps counting from that send (0)
+    if last_sent and INTERVAL_RE.match(" ".join(schedule.lower().split())):
+        return 0
+    return int(now)
+
+
+def legacy_schedule(rem_data):
+    # The schedule string equivalent to the old interval_days/target_time/target_day fields
+    interval_days = int(rem_data.get("interval_days") or 3)
+    target_time = rem_data.get("target_time")
+    target_day = rem_data.get("target_day")
+    if target_day:
+        hours, minutes = (target_time or "00:00").split(":")
+        return f"{int(minutes)} {int(hours)} * * {(WEEKDAYS.index(target_day) + 1) % 7}"
+    if target_time:
+        return f"every {interval_days} days at {target_time}"
+    return f"every {interval_days} days"
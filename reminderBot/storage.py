@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from schedules import legacy_schedule, schedule_since_for
+
+# Every reminder field with the value used when an older state file doesn't have it
+REMINDER_DEFAULTS = {
+    "enabled": True,
+    "interval_days": 3,
+    "last_sent": 0,
+    "last_sent_date": "",
+    "target_time": None,
+    "target_day": None,
+    "message": "",
+    # Cron expression or "every N days [at HH:MM]"; replaces the three fields above
+    "schedule": None,
+    # IANA name; None means the bot's REMINDER_TIMEZONE
+    "timezone": None,
+    # When the schedule was last changed; cron schedules don't fire for times before this
+    "schedule_since": 0,
+    # Owning guild and target channel; None means the bot's REMINDER_CHANNEL_ID (pre multi-guild)
+    "guild_id": None,
+    "channel_id": None
+}
+
+
+def normalize_reminder(rem_data):
+    rem_data = {key: rem_data.get(key, default) for key, default in REMINDER_DEFAULTS.items()}
+    if not rem_data["schedule"]:
+        # Reminders from before schedules existed: translate the old fields, and don't let a
+        # weekday reminder that hasn't gone out in a while fire the moment the bot upgrades
+        rem_data["schedule"] = legacy_schedule(rem_data)
+        rem_data["schedule_since"] = schedule_since_for(rem_data["schedule"], rem_data["last_sent"], time.time())
+    return rem_data
+
+
+def write_json_atomic(path, data):
+    # Temp file in the same directory + fsync + rename, so a crash leaves either the old or the new file
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_json_state(path):
+    with Path(path).open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get("reminders"), dict):
+        raise ValueError(f"{path} has no 'reminders' mapping")
+    reminders = {str(k): normalize_reminder(v) for k, v in data["reminders"].items()}
+    next_id = int(data.get("next_id", 1))
+    next_id = max([next_id] + [int(k) + 1 for k in reminders if k.isdigit()])
+    return {"reminders": reminders, "next_id": next_id}
+
+
+class JsonStateStore:
+    # The original whole-file format, kept as a fallback backend. Every save rewrites the
+    # file, but atomically, and a corrupt file is moved aside instead of being overwritten.
+
+    partial_writes = False
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def load(self, default_state):
+        if not self.path.exists():
+            state = json.loads(json.dumps(default_state))
+            self.save(state)
+            return state
+        try:
+            return read_json_state(self.path)
+        except (ValueError, OSError) as e:
+            backup = self.path.with_name(f"{self.path.name}.corrupt-{int(time.time())}")
+            self.path.rename(backup)
+            print(f"⚠️ State file unreadable ({e}); moved it to {backup} and starting from defaults")
+            state = json.loads(json.dumps(default_state))
+            self.save(state)
+            return state
+
+    def save(self, state, rem_ids=None, deleted=()):
+        write_json_atomic(self.path, state)
+
+    def close(self):
+        pass
+
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    """
+    CREATE TABLE reminders (
+        id TEXT PRIMARY KEY,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        interval_days INTEGER NOT NULL DEFAULT 3,
+        last_sent INTEGER NOT NULL DEFAULT 0,
+        last_sent_date TEXT NOT NULL DEFAULT '',
+        target_time TEXT,
+        target_day TEXT,
+        message TEXT NOT NULL DEFAULT ''
+    );
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """,
+    """
+    ALTER TABLE reminders ADD COLUMN schedule TEXT;
+    ALTER TABLE reminders ADD COLUMN timezone TEXT;
+    ALTER TABLE reminders ADD COLUMN schedule_since INTEGER NOT NULL DEFAULT 0;
+    """,
+    """
+    ALTER TABLE reminders ADD COLUMN guild_id INTEGER;
+    ALTER TABLE reminders ADD COLUMN channel_id INTEGER;
+    CREATE INDEX reminders_guild ON reminders (guild_id);
+    """,
+]
+
+REMINDER_COLUMNS = list(REMINDER_DEFAULTS)
+
+
+class SqliteStateStore:
+    # One row per reminder in a WAL-mode database. Saves only touch the rows that changed,
+    # inside a single transaction, so write cost doesn't grow with the number of reminders.
+
+    partial_writes = True
+
+    def __init__(self, path, import_from=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.import_from = Path(import_from) if import_from else None
+        # Saves run on a worker thread (one at a time), so allow use outside the creating thread
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self.migrate()
+
+    def migrate(self):
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            with self._db:
+                self._db.execute("BEGIN")
+                for statement in script.split(";"):
+                    if statement.strip():
+                        self._db.execute(statement)
+                self._db.execute(f"PRAGMA user_version = {number}")
+            print(f"Reminder store migrated to schema v{number}")
+
+    def _get_meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _is_empty(self):
+        return self._get_meta("next_id") is None
+
+    def load(self, default_state):
+        if self._is_empty():
+            if self.import_from and self.import_from.exists():
+                state = read_json_state(self.import_from)
+                print(f"Imported {len(state['reminders'])} reminder(s) from {self.import_from}")
+            else:
+                state = json.loads(json.dumps(default_state))
+            self.save(state)
+            return state
+
+        reminders = {}
+        migrated = []
+        for row in self._db.execute(f"SELECT id, {', '.join(REMINDER_COLUMNS)} FROM reminders ORDER BY CAST(id AS INTEGER)"):
+            rem_data = dict(zip(REMINDER_COLUMNS, row[1:]))
+            rem_data["enabled"] = bool(rem_data["enabled"])
+            if not rem_data["schedule"]:
+                migrated.append(row[0])
+            reminders[row[0]] = normalize_reminder(rem_data)
+        state = {"reminders": reminders, "next_id": int(self._get_meta("next_id", "1"))}
+        if migrated:
+            self.save(state, migrated)
+            print(f"Converted {len(migrated)} reminder(s) to schedules")
+        return state
+
+    def save(self, state, rem_ids=None, deleted=()):
+        # rem_ids=None writes every reminder; otherwise only the listed ones
+        reminders = state.get("reminders", {})
+        ids = reminders.keys() if rem_ids is None else [r for r in rem_ids if r in reminders]
+        rows = [(rem_id, *(self._column(reminders[rem_id], c) for c in REMINDER_COLUMNS)) for rem_id in ids]
+        placeholders = ", ".join("?" for _ in range(len(REMINDER_COLUMNS) + 1))
+        updates = ", ".join(f"{c}=excluded.{c}" for c in REMINDER_COLUMNS)
+
+        with self._db:
+            self._db.execute("BEGIN")
+            if rows:
+                self._db.executemany(
+                    f"INSERT INTO reminders (id, {', '.join(REMINDER_COLUMNS)}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                    rows
+                )
+            if deleted:
+                self._db.executemany("DELETE FROM reminders WHERE id = ?", [(r,) for r in deleted])
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (str(state.get("next_id", 1)),)
+            )
+
+    @staticmethod
+    def _column(rem_data, column):
+        value = rem_data.get(column, REMINDER_DEFAULTS[column])
+        return int(value) if column == "enabled" else value
+
+    def close(self):
+        self._db.close()
+
+
+def open_store(backend, db_path, json_path):
+    if backend == "json":
+        return JsonStateStore(json_path)
+    return SqliteStateStore(db_path, import_from=json_path)
+
+
+if __name__ == "__main__":
+    # One-shot import: python storage.py reminder_state.json data/reminder_state.db
+    if len(sys.argv) != 3:
+        print("usage: python storage.py <reminder_state.json> <reminder_state.db>")
+        sys.exit(1)
+    source, target = sys.argv[1:]
+    store = SqliteStateStore(target)
+    imported = read_json_state(source)
+    store.save(imported)
+    store.close()
+    print(f"Imported {len(imported['reminders'])} reminder(s) into {target}")
@@ -0,0 +1,267 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from itertools import islice
+from schedules import WEEKDAYS, compile_schedule, legacy_schedule, schedule_since_for
+
+# Bulk reminder export/import for /exportreminders and /importreminders. Files are JSONL (one
+# object per line) or CSV with the columns below. On import, rows with an id update that
+# reminder, rows without one create a new reminder; instead of `schedule` a row may give the
+# older days/time/day trio.
+
+EXPORT_FIELDS = ["id", "enabled", "schedule", "timezone", "channel_id", "message"]
+LEGACY_FIELDS = ["days", "time", "day"]
+
+FORMATS = ("jsonl", "csv")
+MAX_MESSAGE = 2000
+TRUE_WORDS = {"1", "true", "yes", "y", "on", "enabled"}
+FALSE_WORDS = {"0", "false", "no", "n", "off", "disabled"}
+
+
+def export_rows(reminders):
+    for rem_id in sorted(reminders, key=lambda r: int(r) if r.isdigit() else 0):
+        rem_data = reminders[rem_id]
+        yield {
+            "id": rem_id,
+            "enabled": bool(rem_data.get("enabled", True)),
+            "schedule": rem_data.get("schedule") or legacy_schedule(rem_data),
+            "timezone": rem_data.get("timezone") or "",
+            "channel_id": str(rem_data["channel_id"]) if rem_data.get("channel_id") else "",
+            "message": rem_data.get("message", ""),
+        }
+
+
+def write_export(rows, fmt):
+    # Returns the file contents as bytes
+    out = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return out.getvalue().encode("utf-8")
+
+
+def detect_format(filename, text):
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "jsonl" if text.lstrip().startswith("{") else "csv"
+
+
+def read_rows(text, fmt):
+    # Yields (line number, row dict or None, error or None) without loading the file into rows first
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        try:
+            for row in reader:
+                yield reader.line_num, {k.strip().lower(): v for k, v in row.items() if k}, None
+        except csv.Error as e:
+            yield reader.line_num, None, f"unreadable CSV: {e}"
+        return
+    for line_no, line in enumerate(io.StringIO(text), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, "expected a JSON object"
+            continue
+        yield line_no, {str(k).strip().lower(): v for k, v in row.items()}, None
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = _text(value).lower()
+    if text == "" or text in TRUE_WORDS:
+        return True
+    if text in FALSE_WORDS:
+        return False
+    raise ValueError(f"enabled must be true or false, not {value!r}")
+
+
+def _row_schedule(row):
+    # The row's schedule, or one built from days/time/day like /editinterval etc. would
+    schedule = _text(row.get("schedule"))
+    if schedule:
+        return schedule
+    if not any(_text(row.get(field)) for field in LEGACY_FIELDS):
+        return None
+    legacy = {"interval_days": 3, "target_time": None, "target_day": None}
+    days = _text(row.get("days"))
+    if days:
+        if not days.isdigit() or int(days) < 1:
+            raise ValueError(f"days must be a whole number of 1 or higher, not {days!r}")
+        legacy["interval_days"] = int(days)
+    at = _text(row.get("time"))
+    if at:
+        try:
+            legacy["target_time"] = datetime.strptime(at, "%H:%M").strftime("%H:%M")
+        except ValueError:
+            raise ValueError(f"time must be HH:MM (24-hour), not {at!r}")
+    day = _text(row.get("day")).lower()
+    if day:
+        if day not in WEEKDAYS:
+            raise ValueError(f"day must be a weekday name, not {day!r}")
+        legacy["target_day"] = day
+    return legacy_schedule(legacy)
+
+
+class ImportPlan:
+    # Validates import rows against one guild's reminders and works out what would change.
+    # Nothing is touched until apply(); errors are kept per row.
+
+    def __init__(self, reminders, default_tz, channel_ok, max_rows=5000):
+        self.reminders = reminders
+        self.default_tz = default_tz
+        self.channel_ok = channel_ok
+        self.max_rows = max_rows
+        self.creates = []
+        # [(line, rem_id, {field: (old, new)})]
+        self.updates = []
+        self.unchanged = 0
+        self.errors = []
+        self.rows = 0
+        self._seen = {}
+
+    def add_batch(self, rows):
+        for line, row, error in rows:
+            self.rows += 1
+            if self.rows > self.max_rows:
+                if self.rows == self.max_rows + 1:
+                    self.errors.append((line, f"more than {self.max_rows} rows; split the file"))
+                continue
+            if error:
+                self.errors.append((line, error))
+                continue
+            try:
+                self._add(line, row)
+            except ValueError as e:
+                self.errors.append((line, str(e)))
+
+    def _add(self, line, row):
+        rem_id = _text(row.get("id")).lstrip("#")
+        if rem_id:
+            if rem_id not in self.reminders:
+                raise ValueError(f"id {rem_id} is not a reminder in this server (leave id empty to create one)")
+            if rem_id in self._seen:
+                raise ValueError(f"id {rem_id} is already on line {self._seen[rem_id]}")
+            self._seen[rem_id] = line
+
+        fields = {"enabled": _parse_bool(row.get("enabled"))}
+        message = row.get("message")
+        message = "" if message is None else str(message)
+        if not message.strip():
+            raise ValueError("message is empty")
+        if len(message) > MAX_MESSAGE:
+            raise ValueError(f"message is {len(message)} characters (max {MAX_MESSAGE})")
+        fields["message"] = message
+
+        timezone = _text(row.get("timezone")) or None
+        schedule = _row_schedule(row)
+        if schedule is None:
+            raise ValueError("needs a schedule (or days/time/day)")
+        try:
+            compile_schedule(schedule, timezone or self.default_tz)
+        except ValueError as e:
+            raise ValueError(f"invalid schedule {schedule!r}: {e}")
+        fields["schedule"] = schedule
+        fields["timezone"] = timezone
+
+        channel = _text(row.get("channel_id")).strip("<#>")
+        if channel:
+            if not channel.isdigit() or not self.channel_ok(int(channel)):
+                raise ValueError(f"channel {channel} is not a channel in this server")
+            fields["channel_id"] = int(channel)
+        else:
+            fields["channel_id"] = None
+
+        if not rem_id:
+            self.creates.append((line, fields))
+            return
+        current = self.reminders[rem_id]
+        changes = {k: (current.get(k), v) for k, v in fields.items() if current.get(k) != v}
+        if changes:
+            self.updates.append((line, rem_id, changes))
+        else:
+            self.unchanged += 1
+
+    def recheck(self, reminders):
+        # Updates to reminders deleted since validation become errors (validation yields to the
+        # event loop between batches, so other commands can run meanwhile)
+        for line, rem_id, changes in list(self.updates):
+            if rem_id not in reminders:
+                self.updates.remove((line, rem_id, changes))
+                self.errors.append((line, f"id {rem_id} was deleted while the import was checked"))
+
+    def apply(self, state, guild_id, now=None):
+        # Writes every create and update into `state` in one go; returns (created, updated) ids.
+        # Only call this for a plan without errors.
+        now = int(time.time() if now is None else now)
+        created = []
+        for _, fields in self.creates:
+            rem_id = str(state.get("next_id", 1))
+            state["next_id"] = int(rem_id) + 1
+            state["reminders"][rem_id] = {
+                "interval_days": 3,
+                "last_sent": 0,
+                "last_sent_date": "",
+                "target_time": None,
+                "target_day": None,
+                **fields,
+                "schedule_since": now,
+                "guild_id": guild_id,
+            }
+            created.append(rem_id)
+        updated = []
+        for _, rem_id, changes in self.updates:
+            rem_data = state["reminders"][rem_id]
+            rem_data.update({field: new for field, (_, new) in changes.items()})
+            if "schedule" in changes or "timezone" in changes:
+                # Like set_schedule: a new cron schedule doesn't fire for times before now
+                rem_data["schedule_since"] = schedule_since_for(rem_data["schedule"], rem_data.get("last_sent", 0), now)
+            updated.append(rem_id)
+        return created, updated
+
+    def diff_lines(self, describe):
+        # Human-readable plan, one line per change; describe(schedule, timezone) -> str
+        lines = [f"! line {line}: {error}" for line, error in self.errors]
+        for line, fields in self.creates:
+            preview = fields["message"].replace("\n", " ").replace("`", "'")[:60]
+            lines.append(f"+ line {line}: new, {describe(fields['schedule'], fields['timezone'])}: {preview}")
+        for line, rem_id, changes in self.updates:
+            parts = []
+            for field, (old, new) in changes.items():
+                if field == "message":
+                    parts.append("message changed")
+                else:
+                    parts.append(f"{field} {old!r} -> {new!r}")
+            lines.append(f"~ line {line}: #{rem_id} " + ", ".join(parts))
+        return lines
+
+    def summary(self):
+        return (f"{len(self.creates)} new, {len(self.updates)} changed, {self.unchanged} unchanged, "
+                f"{len(self.errors)} error(s)")
@@ -0,0 +1,142 @@
+import json
+import re
+import time
+from pathlib import Path
+from storage import write_json_atomic
+
+MATCH_TYPES = ("exact", "substring", "word")
+
+# How often allow() drops cooldowns that have run out, so channels that went quiet don't pile up
+COOLDOWN_SWEEP_INTERVAL = 60
+
+# The auto-replies that used to be hard-coded in on_message, in the same priority order
+DEFAULT_TRIGGERS = [
+    {"pattern": "bleu", "match": "substring", "reply": "ang pogi mo <@433607960493555722>"},
+    {"pattern": "shann", "match": "substring", "reply": "Bading na bading si shann"},
+    {"pattern": "shnncrypt", "match": "substring", "reply": "Bading na bading si shann"},
+    {"pattern": "404287153213014038", "match": "substring", "reply": "Bading na bading si shann"},
+    {"pattern": "tanginamo", "match": "exact", "reply": "tangina mo rin"},
+    {"pattern": "tangina mo", "match": "exact", "reply": "tangina mo rin"},
+    {"pattern": "inamo", "match": "exact", "reply": "tangina mo rin"},
+    {"pattern": "taena mo", "match": "exact", "reply": "tangina mo rin"},
+    {"pattern": "putanginamo", "match": "exact", "reply": "putangina mo rin"},
+    {"pattern": "putangina mo", "match": "exact", "reply": "putangina mo rin"},
+    {"pattern": "749211272008171601", "match": "substring", "reply": "Ang ganda ni ren"},
+    {"pattern": "princess", "match": "substring", "reply": "GA Hunter, una pa sa first"},
+    {"pattern": "1081556256394842112", "match": "substring", "reply": "GA Hunter, una pa sa first"},
+    {"pattern": "ulol", "match": "exact", "reply": "ulol ka rin"},
+    {"pattern": "ulol ka", "match": "exact", "reply": "ulol ka rin"},
+    {"pattern": "gago", "match": "exact", "reply": "gago ka rin"},
+    {"pattern": "panget", "match": "exact", "reply": "panget ka rin"},
+    {"pattern": "panget ka", "match": "exact", "reply": "panget ka rin"},
+    {"pattern": "bading", "match": "exact", "reply": "puro ka kabadingan!!!>"},
+    {"pattern": "gay", "match": "exact", "reply": "puro ka kabadingan!!!>"},
+    {"pattern": "g4y", "match": "exact", "reply": "puro ka kabadingan!!!>"},
+]
+
+
+def load_triggers(path):
+    # Returns (triggers, next_id); seeds the defaults when the file doesn't exist yet
+    path = Path(path)
+    if path.exists():
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["triggers"], data["next_id"]
+
+    triggers = [dict(t, id=i, cooldown=0) for i, t in enumerate(DEFAULT_TRIGGERS, start=1)]
+    save_triggers(path, triggers, len(triggers) + 1)
+    return triggers, len(triggers) + 1
+
+
+def save_triggers(path, triggers, next_id):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json_atomic(path, {"triggers": triggers, "next_id": next_id})
+
+
+def _trie_pattern(words):
+    # Regex alternation with shared prefixes factored out ("ab|ac" -> "a(?:b|c)"), which the
+    # re engine rejects far faster than a flat alternation once there are many patterns
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        optional = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if optional else body
+
+    return build(trie)
+
+
+class TriggerMatcher:
+    # All triggers compiled into one hash set (exact) and one trie-shaped regex per match type
+    # (substring/word) that rejects non-matching messages in a single pass. Earlier triggers win,
+    # like the old if/elif chain. Rebuilt only when triggers change.
+
+    def __init__(self, triggers=()):
+        self._cooldowns = {}  # (trigger id, channel id) -> monotonic time the cooldown ends
+        self._next_sweep = 0
+        self.rebuild(triggers)
+
+    def rebuild(self, triggers):
+        self.triggers = list(triggers)
+        self._exact = {}
+        self._ordered = []
+        substrings = []
+        words = []
+        for priority, trigger in enumerate(self.triggers):
+            pattern = trigger["pattern"].lower().strip()
+            if not pattern:
+                continue
+            if trigger["match"] == "exact":
+                self._exact.setdefault(pattern, priority)
+            elif trigger["match"] == "word":
+                words.append(pattern)
+                self._ordered.append((priority, re.compile(rf"(?<!\w){re.escape(pattern)}(?!\w)").search))
+            else:
+                substrings.append(pattern)
+                self._ordered.append((priority, pattern))
+
+        self._substring_regex = re.compile(_trie_pattern(substrings)) if substrings else None
+        self._word_regex = re.compile(rf"(?<!\w){_trie_pattern(words)}(?!\w)") if words else None
+
+    def _any_hit(self, content):
+        return bool(
+            (self._substring_regex is not None and self._substring_regex.search(content))
+            or (self._word_regex is not None and self._word_regex.search(content))
+        )
+
+    def match(self, content):
+        # content is expected lowercased and stripped; returns the winning trigger or None
+        best = self._exact.get(content)
+        if self._any_hit(content):
+            # Rare path: find the highest-priority substring/word trigger that matched
+            for priority, test in self._ordered:
+                if best is not None and priority > best:
+                    break
+                if (test in content) if isinstance(test, str) else test(content):
+                    best = priority
+                    break
+        return None if best is None else self.triggers[best]
+
+    def allow(self, trigger, channel_id, now=None):
+        # Per-channel cooldown; returns True (and starts the cooldown) if the trigger may reply
+        cooldown = trigger.get("cooldown") or 0
+        if cooldown <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        if now >= self._next_sweep:
+            self._cooldowns = {k: until for k, until in self._cooldowns.items() if until > now}
+            self._next_sweep = now + COOLDOWN_SWEEP_INTERVAL
+        key = (trigger["id"], channel_id)
+        if now < self._cooldowns.get(key, 0):
+            return False
+        self._cooldowns[key] = now + cooldown
+        return True
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+import discord
+
+# Slash command sync for both bots (and the host that runs them together)
+
+
+def tree_fingerprint(tree, guild=None):
+    # Stable hash of exactly what tree.sync() would upload for this scope
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CommandSyncer:
+    # Uploads the command tree only when it differs from what was last synced. Hashes are kept
+    # per application and scope ("global" or a guild id), so a restart or a gateway reconnect
+    # with unchanged commands makes no sync request at all.
+
+    def __init__(self, tree, path):
+        self.tree = tree
+        self.path = Path(path)
+
+    def _load(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, hashes):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(tmp, self.path)
+
+    async def sync(self, guild_id=None, force=False):
+        # Returns True if commands were uploaded. With guild_id the global commands are copied
+        # to that guild, which Discord applies instantly (handy while developing).
+        guild = discord.Object(id=guild_id) if guild_id else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        key = f"{self.tree.client.application_id}:{guild_id or 'global'}"
+        fingerprint = tree_fingerprint(self.tree, guild)
+
+        hashes = self._load()
+        if not force and hashes.get(key) == fingerprint:
+            return False
+        await self.tree.sync(guild=guild)
+        hashes[key] = fingerprint
+        self._save(hashes)
+        return True
+
+
+async def sync_commands(tree, path, mode="auto", dev_guild_id=0):
+    # Call once per process before connecting (and after reloading commands), so gateway
+    # reconnects, which fire on_ready again, never touch the sync rate limit.
+    # mode: "auto" uploads only what changed, "force" always uploads, "off" never does
+    if mode == "off":
+        return
+    syncer = CommandSyncer(tree, path)
+    scopes = [None, dev_guild_id] if dev_guild_id else [None]
+    for guild_id in scopes:
+        scope = f"guild {guild_id}" if guild_id else "global"
+        try:
+            if await syncer.sync(guild_id, force=mode == "force"):
+                print(f"✅ Slash commands synced ({scope})")
+            else:
+                print(f"Slash commands unchanged ({scope}), skipped sync")
+        except Exception as e:
+            print(f"Failed to sync commands ({scope}): {e}")
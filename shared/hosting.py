@@ -0,0 +1,57 @@
+import asyncio
+import signal
+from discord.ext import commands
+import metrics
+
+# Pieces both bots need to run as discord.ext extensions, either standalone (app.py builds its
+# own bot) or together inside host/app.py on one gateway connection.
+
+
+def build_bot(intents, *, sharded=False, **options):
+    # Slash commands only; commands.Bot wants a prefix, so mentioning the bot is it
+    bot_class = commands.AutoShardedBot if sharded else commands.Bot
+    return bot_class(command_prefix=commands.when_mentioned, intents=intents, help_command=None, **options)
+
+
+async def stop_loop(loop):
+    # Cancel a tasks.loop and wait for it, so nothing it uses is closed underneath it
+    task = loop.get_task()
+    loop.cancel()
+    if task:
+        await asyncio.gather(task, return_exceptions=True)
+
+
+class Instrumentation:
+    # The once-per-process metrics pieces: Discord client hooks, the Prometheus endpoint and the
+    # event-loop lag probe. Whoever owns the bot (app.py standalone, or the host) starts these.
+
+    def __init__(self, bot, *, host="127.0.0.1", port=0, json_logs=False, lag_threshold=0.25, root=None):
+        self.bot = bot
+        self.port = port
+        self.host = host
+        metrics.REGISTRY.json_logs = json_logs
+        metrics.instrument_client(bot, bot.tree)
+        self.server = metrics.MetricsServer(host=host, port=port)
+        self.probe = metrics.LoopLagProbe(threshold=lag_threshold, root=root)
+
+    async def start(self):
+        self.probe.start()
+        if self.port:
+            await self.server.start()
+            print(f"Metrics on http://{self.host}:{self.port}/metrics")
+
+    async def close(self):
+        await self.server.close()
+        await self.probe.close()
+
+
+async def serve(bot, token):
+    # Runs until the gateway connection ends; docker stop sends SIGTERM, which closes cleanly
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(bot.close()))
+        except NotImplementedError:
+            pass
+    async with bot:
+        await bot.start(token)
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from aiohttp import web
+
+# In-process metrics for both bots: counters, gauges and latency histograms, served in the
+# Prometheus text format on a local HTTP port, plus an event-loop lag probe that names the
+# line of code blocking the loop. No dependencies beyond aiohttp (already pulled in by discord.py).
+#
+# This file lives in shared/ and is copied next to app.py in each Docker image.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Gateway lifecycle events worth counting (reconnects show up as disconnect + connect/resumed)
+GATEWAY_EVENTS = {
+    "connect", "disconnect", "ready", "resumed",
+    "shard_connect", "shard_disconnect", "shard_ready", "shard_resumed",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        # Observations also come from to_thread workers and the lag watchdog thread
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "value": v} for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        super().__init__(name, help_text, labels)
+        # Unlabelled gauges can be read from a callable at scrape time instead
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _read(self):
+        if self.function:
+            try:
+                value = self.function()
+            except Exception:
+                value = None
+            if value is not None:
+                self.set(value)
+
+    def _samples(self):
+        self._read()
+        return super()._samples()
+
+    def snapshot(self):
+        self._read()
+        return super().snapshot()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return [{"labels": dict(zip(self.labels, k)), "count": c, "sum": round(s, 6)}
+                    for k, (_, s, c) in self._values.items()]
+
+
+class Registry:
+    # Metrics by name. Asking for an existing name returns the same metric, so modules can
+    # declare what they record at import time and reloading them doesn't duplicate anything.
+
+    def __init__(self):
+        self._metrics = {}
+        self.json_logs = False
+
+    def _get(self, cls, name, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=(), function=None):
+        gauge = self._get(Gauge, name, help_text, labels)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def log(self, event, **fields):
+        # One JSON line per event when structured logs are on; otherwise nothing
+        if self.json_logs:
+            print(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str), flush=True)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+log = REGISTRY.log
+
+TICK_SECONDS = histogram("bot_loop_tick_seconds", "Duration of one background loop iteration", ["loop"])
+LOOP_LAG = histogram("event_loop_lag_seconds", "How late the event loop ran a timer that should have fired")
+LOOP_BLOCKED = counter("event_loop_blocked_total", "Event loop stalls, by the line that was running", ["site"])
+DISCORD_HTTP = histogram("discord_http_request_seconds", "Discord REST calls", ["method", "route", "status"])
+DISCORD_EVENTS = counter("discord_gateway_events_total", "Gateway lifecycle events", ["event"])
+COMMAND_SECONDS = histogram("discord_command_seconds", "Slash command handling time", ["command", "status"])
+
+
+@contextmanager
+def tick(loop_name):
+    # Times one iteration of a tasks.loop body
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        TICK_SECONDS.observe(elapsed, loop=loop_name)
+        log("tick", loop=loop_name, seconds=round(elapsed, 6))
+
+
+def instrument_client(client, tree=None):
+    # Times every Discord REST call, counts gateway reconnects and times slash commands
+    request = client.http.request
+
+    async def timed_request(route, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await request(route, **kwargs)
+        except Exception as e:
+            status = str(getattr(e, "status", type(e).__name__))
+            raise
+        finally:
+            DISCORD_HTTP.observe(time.perf_counter() - started, method=route.method, route=route.path, status=status)
+
+    client.http.request = timed_request
+
+    dispatch = client.dispatch
+
+    def counting_dispatch(event, *args, **kwargs):
+        if event in GATEWAY_EVENTS:
+            DISCORD_EVENTS.inc(event=event)
+            log("gateway", gateway_event=event)
+        elif event == "interaction":
+            args[0].extras.setdefault("metrics_started", time.perf_counter())
+        elif event == "app_command_completion":
+            _command_done(args[0], args[1], "ok")
+        return dispatch(event, *args, **kwargs)
+
+    client.dispatch = counting_dispatch
+    gauge("discord_gateway_latency_seconds", "Heartbeat round trip", function=lambda: _finite(client.latency))
+
+    if tree is not None:
+        on_error = tree.on_error
+
+        async def counting_on_error(interaction, error):
+            _command_done(interaction, interaction.command, "error")
+            await on_error(interaction, error)
+
+        tree.on_error = counting_on_error
+
+
+def _finite(value):
+    return value if value == value and value != float("inf") else None
+
+
+def _command_done(interaction, command, status):
+    started = interaction.extras.get("metrics_started")
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    name = getattr(command, "qualified_name", None) or "unknown"
+    COMMAND_SECONDS.observe(elapsed, command=name, status=status)
+    log("command", command=name, status=status, seconds=round(elapsed, 6))
+
+
+class LoopLagProbe:
+    # A timer on the loop measures how late it wakes up (lag); a watchdog thread notices when
+    # that timer hasn't run for `threshold` seconds and samples the loop thread's stack right
+    # then, so a stall is attributed to the blocking call itself (a sync HTTP request, a file
+    # write) rather than to whatever ran next.
+
+    def __init__(self, interval=0.5, threshold=0.25, root=None):
+        self.interval = interval
+        self.threshold = threshold
+        # Stack frames under this directory are preferred when naming the blocking site
+        self.root = str(Path(root).resolve()) if root else None
+        self._beat = time.monotonic()
+        self._reported = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._loop_thread = None
+
+    def start(self):
+        if self._task:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG.observe(max(0.0, now - expected))
+            self._beat = now
+
+    def _watch(self):
+        while not self._stop.wait(min(self.interval, self.threshold) / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or self._reported == beat:
+                continue
+            # Report each stall once, with where the loop thread is right now
+            self._reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            site = self._site(frame)
+            LOOP_BLOCKED.inc(site=site)
+            log("loop_blocked", site=site, seconds=round(stalled, 3))
+            if not REGISTRY.json_logs:
+                print(f"⚠️ Event loop blocked for {stalled:.2f}s+ at {site}")
+
+    def _site(self, frame):
+        if frame is None:
+            return "unknown"
+        innermost = frame
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if self.root and filename.startswith(self.root) and filename != __file__:
+                break
+            frame = frame.f_back
+        frame = frame or innermost
+        return f"{Path(frame.f_code.co_filename).name}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+class MetricsServer:
+    # GET /metrics (Prometheus text format) and /metrics.json on a local port
+
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+        self.app = web.Application()
+        self.app.router.add_get("/metrics", self.metrics)
+        self.app.router.add_get("/metrics.json", self.metrics_json)
+
+    async def start(self):
+        if self._runner:
+            return
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def metrics(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def metrics_json(self, request):
+        return web.json_response(self.registry.snapshot())
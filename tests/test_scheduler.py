@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "reminderBot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "shared"))
+
+from scheduler import CATCHUP_POLICIES, ReminderScheduler, collect_due, next_fire
+from schedules import schedule_since_for
+from storage import normalize_reminder
+
+NOW = 1_780_000_000
+DAY = 86400
+
+
+def reminder(schedule, last_sent=0, since=0):
+    return {"enabled": True, "schedule": schedule, "timezone": "UTC", "last_sent": last_sent,
+            "schedule_since": since, "message": "hello", "channel_id": 1}
+
+
+def due_now(reminders, policy):
+    scheduler = ReminderScheduler(clock=lambda: NOW, default_tz="UTC")
+    scheduler.rebuild(reminders)
+    deliveries, handled = collect_due(scheduler, reminders, NOW, lambda r: r["channel_id"], policy=policy)
+    return scheduler, deliveries, handled
+
+
+@pytest.mark.parametrize("policy", CATCHUP_POLICIES)
+@pytest.mark.parametrize("rem_data", [
+    reminder("every 3 days"),
+    reminder("every 3 days", since=NOW),
+    reminder("every 3 days", since=NOW - 10 * DAY),
+    reminder("every 1 days at 00:00"),
+    reminder("0 * * * *", since=NOW - 10 * DAY),
+], ids=["interval", "interval-just-added", "interval-set-long-ago", "interval-at", "cron"])
+def test_never_sent_reminder_is_due_once(policy, rem_data):
+    scheduler, deliveries, handled = due_now({"1": rem_data}, policy)
+    assert handled == ["1"]
+    assert len(deliveries) == 1
+    assert scheduler.fire_ts("1") is None
+
+
+@pytest.mark.parametrize("policy", CATCHUP_POLICIES)
+def test_missed_fires_still_caught_up_after_a_send(policy):
+    rem_data = reminder("every 1 days", last_sent=NOW - 5 * DAY - 60)
+    scheduler, deliveries, handled = due_now({"1": rem_data}, policy)
+    expected = {"once": 1, "skip": 0, "all": 5}[policy]
+    assert len(deliveries) == expected
+    if policy == "skip":
+        assert scheduler.fire_ts("1") > NOW
+
+
+def test_migrated_interval_reminder_keeps_counting_from_its_last_send():
+    last_sent = NOW - int(2.9 * DAY)
+    rem_data = normalize_reminder({"interval_days": 3, "last_sent": last_sent, "message": "hello"})
+    assert rem_data["schedule"] == "every 3 days"
+    assert next_fire(rem_data, NOW) == last_sent + 3 * DAY
+
+
+def test_migrated_weekday_reminder_does_not_fire_on_upgrade():
+    rem_data = normalize_reminder({"target_day": "monday", "last_sent": NOW - 30 * DAY, "message": "hello"})
+    assert rem_data["schedule_since"] > 0
+    assert next_fire(rem_data, rem_data["schedule_since"]) > rem_data["schedule_since"]
+
+
+@pytest.mark.parametrize("schedule, last_sent, expected", [
+    ("every 3 days", NOW - DAY, 0),
+    ("every 3 days at 10:00", NOW - DAY, 0),
+    ("every 3 days", 0, NOW),
+    ("0 9 * * 1", NOW - DAY, NOW),
+])
+def test_schedule_since_only_anchors_cron_or_unsent(schedule, last_sent, expected):
+    assert schedule_since_for(schedule, last_sent, NOW) == expected
+
+
+def test_restore_puts_a_failed_pass_back_unchanged():
+    reminders = {"1": reminder("every 1 days", last_sent=NOW - DAY - 60)}
+    scheduler = ReminderScheduler(clock=lambda: NOW, default_tz="UTC")
+    scheduler.rebuild(reminders)
+    due = scheduler.pop_due(NOW)
+    first, _ = collect_due(scheduler, reminders, NOW, lambda r: r["channel_id"], due=due)
+    # Say enqueueing failed: the same fire times come due again and map to the same keys
+    scheduler.restore(due)
+    again, _ = collect_due(scheduler, reminders, NOW, lambda r: r["channel_id"])
+    assert [d[0] for d in again] == [d[0] for d in first]
+
+
+@pytest.mark.parametrize("channel_id, policy", [(None, "once"), (1, "skip")], ids=["no-channel", "skip"])
+def test_defer_reports_the_moved_reminder(channel_id, policy):
+    reminders = {"1": reminder("every 1 days", last_sent=NOW - 5 * DAY - 60)}
+    deferred = []
+    scheduler = ReminderScheduler(clock=lambda: NOW, default_tz="UTC", on_defer=deferred.append)
+    scheduler.rebuild(reminders)
+    collect_due(scheduler, reminders, NOW, lambda r: channel_id, policy=policy)
+    assert deferred == ["1"]
+    assert scheduler.fire_ts("1") > NOW